@@ -17,6 +17,14 @@ def init_db(db_path='database/sports_venue.db', schema_path='database/schema.sql
             cursor.executescript(schema_sql)
         print(f"数据库已成功初始化: {db_path}")
         print("表结构已根据 schema.sql 创建。")
+        # 全文索引需要 FTS5 (trigram 分词器需 SQLite 3.34+)，单独执行，失败不影响其他表
+        fts_path = os.path.join(os.path.dirname(schema_path), 'schema_fts.sql')
+        try:
+            with open(fts_path, 'r', encoding='utf-8') as f:
+                cursor.executescript(f.read())
+            print("公告全文索引已创建。")
+        except sqlite3.Error as e:
+            print(f"当前 SQLite 不支持全文索引 ({e})，公告检索将使用 LIKE。")
     except Exception as e:
         print(f"初始化数据库时出错: {e}")
     finally:
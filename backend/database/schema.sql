@@ -96,3 +96,90 @@ CREATE TABLE IF NOT EXISTS class_schedules (
     FOREIGN KEY (teacher_account) REFERENCES users(user_account),
     FOREIGN KEY (venue_id) REFERENCES venues(venue_id)
 );
+
+-- 索引 (均为 IF NOT EXISTS，服务器启动时会对已有数据库重新执行本文件以补齐)
+-- 管理员预约列表: 按创建时间倒序的 keyset 分页
+CREATE INDEX IF NOT EXISTS idx_reservations_create_time ON reservations(create_time, reservation_id);
+CREATE INDEX IF NOT EXISTS idx_reservations_user ON reservations(user_account, create_time);
+CREATE INDEX IF NOT EXISTS idx_reservations_status ON reservations(status, create_time);
+CREATE INDEX IF NOT EXISTS idx_reservations_slot ON reservations(slot_id, status);
+CREATE INDEX IF NOT EXISTS idx_time_slots_court_date ON time_slots(court_id, date, start_time);
+CREATE INDEX IF NOT EXISTS idx_time_slots_date ON time_slots(date);
+CREATE INDEX IF NOT EXISTS idx_courts_venue ON courts(venue_id);
+-- 管理员用户列表: 账号/姓名/电话前缀搜索与按信用分排序
+CREATE INDEX IF NOT EXISTS idx_users_name ON users(name);
+CREATE INDEX IF NOT EXISTS idx_users_phone ON users(phone);
+CREATE INDEX IF NOT EXISTS idx_users_credit ON users(credit_score, user_account);
+-- 天气缓存: 按日期读取最新一条
+CREATE INDEX IF NOT EXISTS idx_weather_info_date ON weather_info(date, update_time);
+
+-- 10. 公告/帖子全文索引 (announcements_fts) 见 schema_fts.sql，需要 FTS5 支持，单独执行
+
+-- 11. 号源变更版本 (slot_versions / slot_changes)
+-- 每个 (场馆, 日期) 维护单调递增的版本号，time_slots 的每次增删改由下方触发器递增版本并记录变更，
+-- 客户端缓存号源后只需按版本号拉取变更部分
+CREATE TABLE IF NOT EXISTS slot_versions (
+    venue_id INTEGER NOT NULL,
+    date DATE NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0, -- 当前版本号
+    PRIMARY KEY (venue_id, date)
+);
+CREATE TABLE IF NOT EXISTS slot_changes (
+    venue_id INTEGER NOT NULL,
+    date DATE NOT NULL,
+    slot_id INTEGER NOT NULL,
+    version INTEGER NOT NULL, -- 该时间段最后一次变更时的版本号
+    deleted BOOLEAN NOT NULL DEFAULT 0, -- 是否已删除
+    PRIMARY KEY (venue_id, date, slot_id)
+);
+CREATE INDEX IF NOT EXISTS idx_slot_changes_version ON slot_changes(venue_id, date, version);
+-- 场地被删除后无法再通过 courts 找到场馆，回退到该时间段已有的变更记录
+CREATE TRIGGER IF NOT EXISTS time_slots_version_ai AFTER INSERT ON time_slots
+WHEN (SELECT venue_id FROM courts WHERE court_id = new.court_id) IS NOT NULL
+BEGIN
+    INSERT INTO slot_versions(venue_id, date, version)
+    VALUES ((SELECT venue_id FROM courts WHERE court_id = new.court_id), new.date, 1)
+    ON CONFLICT(venue_id, date) DO UPDATE SET version = version + 1;
+    INSERT OR REPLACE INTO slot_changes(venue_id, date, slot_id, version, deleted)
+    SELECT venue_id, date, new.slot_id, version, 0 FROM slot_versions
+    WHERE venue_id = (SELECT venue_id FROM courts WHERE court_id = new.court_id) AND date = new.date;
+END;
+CREATE TRIGGER IF NOT EXISTS time_slots_version_au AFTER UPDATE ON time_slots
+WHEN (SELECT venue_id FROM courts WHERE court_id = new.court_id) IS NOT NULL
+BEGIN
+    -- 日期或场地发生变化时，旧的 (场馆, 日期) 记为删除
+    INSERT INTO slot_versions(venue_id, date, version)
+    SELECT venue_id, old.date, 1 FROM courts
+    WHERE court_id = old.court_id AND (old.date != new.date OR old.court_id != new.court_id)
+    ON CONFLICT(venue_id, date) DO UPDATE SET version = version + 1;
+    INSERT OR REPLACE INTO slot_changes(venue_id, date, slot_id, version, deleted)
+    SELECT sv.venue_id, sv.date, old.slot_id, sv.version, 1 FROM slot_versions sv
+    JOIN courts c ON c.venue_id = sv.venue_id AND c.court_id = old.court_id
+    WHERE sv.date = old.date AND (old.date != new.date OR old.court_id != new.court_id);
+
+    INSERT INTO slot_versions(venue_id, date, version)
+    VALUES ((SELECT venue_id FROM courts WHERE court_id = new.court_id), new.date, 1)
+    ON CONFLICT(venue_id, date) DO UPDATE SET version = version + 1;
+    INSERT OR REPLACE INTO slot_changes(venue_id, date, slot_id, version, deleted)
+    SELECT venue_id, date, new.slot_id, version, 0 FROM slot_versions
+    WHERE venue_id = (SELECT venue_id FROM courts WHERE court_id = new.court_id) AND date = new.date;
+END;
+CREATE TRIGGER IF NOT EXISTS time_slots_version_ad AFTER DELETE ON time_slots
+WHEN COALESCE(
+    (SELECT venue_id FROM courts WHERE court_id = old.court_id),
+    (SELECT venue_id FROM slot_changes WHERE slot_id = old.slot_id AND date = old.date)
+) IS NOT NULL
+BEGIN
+    INSERT INTO slot_versions(venue_id, date, version)
+    VALUES (COALESCE(
+        (SELECT venue_id FROM courts WHERE court_id = old.court_id),
+        (SELECT venue_id FROM slot_changes WHERE slot_id = old.slot_id AND date = old.date)
+    ), old.date, 1)
+    ON CONFLICT(venue_id, date) DO UPDATE SET version = version + 1;
+    INSERT OR REPLACE INTO slot_changes(venue_id, date, slot_id, version, deleted)
+    SELECT venue_id, date, old.slot_id, version, 1 FROM slot_versions
+    WHERE venue_id = COALESCE(
+        (SELECT venue_id FROM courts WHERE court_id = old.court_id),
+        (SELECT venue_id FROM slot_changes WHERE slot_id = old.slot_id AND date = old.date)
+    ) AND date = old.date;
+END;
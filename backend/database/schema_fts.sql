@@ -0,0 +1,21 @@
+-- 公告/帖子全文索引 (announcements_fts)
+-- 单独执行: 依赖 FTS5 与 trigram 分词器 (SQLite 3.34+)，不支持时跳过，检索改用 LIKE 扫描 (见 db_manager.apply_fts_schema，由 DBManager.ensure_schema 调用)
+-- 外部内容 FTS5 表，内容存放在 announcements 中，由下方触发器保持同步
+-- trigram 分词器按 3 字切分，支持中文任意子串检索
+CREATE VIRTUAL TABLE IF NOT EXISTS announcements_fts USING fts5(
+    title,
+    content,
+    content='announcements',
+    content_rowid='announcement_id',
+    tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS announcements_fts_ai AFTER INSERT ON announcements BEGIN
+    INSERT INTO announcements_fts(rowid, title, content) VALUES (new.announcement_id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS announcements_fts_ad AFTER DELETE ON announcements BEGIN
+    INSERT INTO announcements_fts(announcements_fts, rowid, title, content) VALUES ('delete', old.announcement_id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS announcements_fts_au AFTER UPDATE OF title, content ON announcements BEGIN
+    INSERT INTO announcements_fts(announcements_fts, rowid, title, content) VALUES ('delete', old.announcement_id, old.title, old.content);
+    INSERT INTO announcements_fts(rowid, title, content) VALUES (new.announcement_id, new.title, new.content);
+END;
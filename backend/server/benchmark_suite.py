@@ -0,0 +1,374 @@
+"""
+DBManager / StatisticsManager 微基准测试
+
+对各热点方法 (预约、带候补转正的取消、号源查询、教师课表导入/移除、每日定时任务、
+管理员列表、全部统计查询等) 在不同规模的模拟数据集上计时，结果写入 JSON。
+指定 --baseline 时与保存的基线逐项比较，变慢超过阈值的项目视为性能回归，进程以 1 退出。
+
+数据集由 data_generator.py 生成并缓存在临时目录 (按规模/seed/日期区分)，
+每个规模在一份工作副本上运行，不会修改原数据集与 sports_venue.db。
+
+用法:
+    python benchmark_suite.py [--sizes small,medium] [--repeat 5] [--only 关键字]
+                              [--out 结果.json] [--save-baseline 基线.json] [--baseline 基线.json]
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+try:
+    from server.db_manager import DBManager
+    from server.statistics_manager import StatisticsManager
+    from server.data_generator import DataGenerator
+    from server.sql_tracer import format_report, sql_tracer
+except ImportError:
+    from db_manager import DBManager
+    from statistics_manager import StatisticsManager
+    from data_generator import DataGenerator
+    from sql_tracer import format_report, sql_tracer
+
+# 数据集规模 (DataGenerator 参数)
+SIZES = {
+    "small": {"students": 2000, "teachers": 100, "venues": 9, "months": 1},
+    "medium": {"students": 20000, "teachers": 500, "venues": 12, "months": 6},
+    "large": {"students": 100000, "teachers": 1000, "venues": 24, "months": 12},
+}
+SEED = 42
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "sports_venue_bench")
+
+# 基线比较: 中位数变慢超过 TOLERANCE 且绝对差值超过 MIN_DELTA_MS 才算回归 (过滤计时噪声)
+TOLERANCE = 0.25
+MIN_DELTA_MS = 1.0
+
+
+def dataset_path(size):
+    """返回 (必要时生成) 某规模的数据集；日期不同则重新生成，保证 '今天' 附近有号源"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    today = datetime.date.today().strftime("%Y%m%d")
+    path = os.path.join(CACHE_DIR, f"{size}-{SEED}-{today}.db")
+    if not os.path.exists(path):
+        print(f"[*] 生成 {size} 数据集 ...")
+        partial = path + ".tmp"
+        if os.path.exists(partial):
+            os.remove(partial)
+        DataGenerator(partial, seed=SEED, **SIZES[size]).generate()
+        os.replace(partial, path)
+    return path
+
+
+class Fixtures:
+    """从工作副本中挑选各基准需要的账号、时段等"""
+
+    def __init__(self, db_path, count):
+        conn = sqlite3.connect(db_path)
+        try:
+            self.today = datetime.date.today()
+            tomorrow = self.today + datetime.timedelta(days=1)
+            self.date = tomorrow.strftime("%Y-%m-%d")
+
+            self.students = [row[0] for row in conn.execute("""
+                SELECT user_account FROM users WHERE role = 'student' AND credit_score = 100
+                ORDER BY user_account LIMIT ?
+            """, (count * 8,))]
+            self.teachers = [row[0] for row in conn.execute("""
+                SELECT user_account FROM users u WHERE role = 'teacher'
+                AND NOT EXISTS (SELECT 1 FROM class_schedules cs WHERE cs.teacher_account = u.user_account)
+                ORDER BY user_account LIMIT ?
+            """, (count,))]
+            # 预约最多的用户 (个人预约列表/个人统计的最坏情况)
+            self.heavy_user = conn.execute("""
+                SELECT user_account FROM reservations GROUP BY user_account ORDER BY COUNT(*) DESC LIMIT 1
+            """).fetchone()[0]
+            # 场地最多的场馆
+            self.venue_id = conn.execute("""
+                SELECT venue_id FROM courts GROUP BY venue_id ORDER BY COUNT(*) DESC, venue_id LIMIT 1
+            """).fetchone()[0]
+            # 明天空闲、非热门、未被课表占用的单人时段 (每次迭代使用不同时段)
+            self.free_slots = [row[0] for row in conn.execute("""
+                SELECT ts.slot_id FROM time_slots ts JOIN courts c ON ts.court_id = c.court_id
+                WHERE ts.date = ? AND ts.max_reservations = 1 AND ts.current_reservations = 0 AND ts.is_hot = 0
+                AND NOT EXISTS (
+                    SELECT 1 FROM class_schedules cs
+                    WHERE cs.venue_id = c.venue_id AND cs.day_of_week = ?
+                    AND cs.start_time < ts.end_time AND cs.end_time > ts.start_time
+                )
+                ORDER BY ts.slot_id
+            """, (self.date, tomorrow.weekday()))]
+            self.slot_version = conn.execute(
+                "SELECT version FROM slot_versions WHERE venue_id = ? AND date = ?", (self.venue_id, self.date)
+            ).fetchone()
+        finally:
+            conn.close()
+        needed = count * 2
+        if len(self.free_slots) < needed or len(self.students) < count * 5 or len(self.teachers) < count:
+            raise RuntimeError("数据集太小，无法为每次迭代准备独立的账号/时段，请减小 --repeat")
+
+    def take_slot(self):
+        return self.free_slots.pop(0)
+
+
+class Suite:
+    def __init__(self, db_path, repeat):
+        self.db_path = db_path
+        self.repeat = repeat
+        self.db = DBManager(db_path)
+        self.stats = StatisticsManager(db_path)
+        # 预热一次 + repeat 次计时，每次迭代都需要独立的数据
+        self.fx = Fixtures(db_path, repeat + 1)
+        self.cases = []
+
+    def case(self, name, run, before=None):
+        """
+        注册一个基准
+        :param run: run(*args) -> (bool, result)，只有这一步被计时
+        :param before: before(i) -> args，不计时的准备工作 (为第 i 次迭代构造独立数据)
+        """
+        self.cases.append((name, run, before))
+
+    def execute(self, sql, params=()):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(sql, params)
+            conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def run(self, only=None):
+        results = {}
+        for name, run, before in self.cases:
+            if only and only not in name:
+                continue
+            samples = []
+            ok = True
+            for i in range(self.repeat + 1):
+                args = before(i) if before else ()
+                # 被测方法自身的日志 (如定时任务) 不输出到终端
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    started = time.perf_counter()
+                    success, result = run(*args)
+                    elapsed = (time.perf_counter() - started) * 1000
+                ok = ok and success
+                if not success:
+                    print(f"    [!] {name}: {result}")
+                if i > 0:  # 第 0 次为预热
+                    samples.append(elapsed)
+            results[name] = {
+                "median_ms": round(statistics.median(samples), 3),
+                "min_ms": round(min(samples), 3),
+                "max_ms": round(max(samples), 3),
+                "runs": len(samples),
+                "ok": ok,
+            }
+            print(f"  {name:<36} {results[name]['median_ms']:>10.3f} ms{'' if ok else '  (调用失败)'}")
+        return results
+
+    # ---------------- 基准定义 ---------------- #
+    def register_all(self):
+        db, stats, fx = self.db, self.stats, self.fx
+        today = fx.today.strftime("%Y-%m-%d")
+
+        # 登录与号源
+        self.case("validate_login", lambda: db.validate_login(fx.students[0], "123456"))
+        self.case("get_available_slots", lambda: db.get_available_slots(fx.venue_id, fx.date))
+        self.case("get_available_slots.summary", lambda: db.get_available_slots(fx.venue_id, fx.date, summary=True))
+        self.case("get_available_slots.window", lambda: db.get_available_slots(
+            fx.venue_id, fx.date, start_time="18:00", end_time="21:00", only_available=True))
+        self.case("get_slot_changes.full", lambda: db.get_slot_changes(fx.venue_id, fx.date))
+        since = max(0, (fx.slot_version[0] if fx.slot_version else 1) - 1)
+        self.case("get_slot_changes.delta", lambda: db.get_slot_changes(fx.venue_id, fx.date, since))
+        self.case("get_slot_versions", db.get_slot_versions)
+        self.case("get_user_reservations.heavy", lambda: db.get_user_reservations(fx.heavy_user))
+
+        # 预约与取消 (每次迭代使用不同的学生和时段)
+        booked = []
+
+        def before_book(i):
+            account, slot_id = fx.students[i], fx.take_slot()
+            booked.append((account, slot_id))
+            return account, slot_id
+        self.case("create_reservation", db.create_reservation, before_book)
+
+        def before_cancel(i):
+            account, slot_id = booked[i]
+            conn = sqlite3.connect(self.db_path)
+            try:
+                reservation_id = conn.execute(
+                    "SELECT reservation_id FROM reservations WHERE user_account = ? AND slot_id = ? AND status = 'confirmed'",
+                    (account, slot_id)).fetchone()[0]
+            finally:
+                conn.close()
+            return account, reservation_id
+        self.case("cancel_reservation", db.cancel_reservation, before_cancel)
+
+        def before_cancel_promote(i):
+            # 满员时段: 一个已确认预约 + 三个不同信用分的候补
+            slot_id = fx.take_slot()
+            base = len(fx.students) // 2 + i * 4
+            holder = fx.students[base]
+            now = datetime.datetime.now()
+            reservation_id = self.execute(
+                "INSERT INTO reservations (user_account, slot_id, status, create_time) VALUES (?, ?, 'confirmed', ?)",
+                (holder, slot_id, now))
+            for k in range(1, 4):
+                self.execute(
+                    "INSERT INTO reservations (user_account, slot_id, status, create_time) VALUES (?, ?, 'queued', ?)",
+                    (fx.students[base + k], slot_id, now))
+            self.execute("UPDATE time_slots SET current_reservations = max_reservations WHERE slot_id = ?", (slot_id,))
+            return holder, reservation_id
+        self.case("cancel_reservation.queue_promotion", db.cancel_reservation, before_cancel_promote)
+
+        # 签到
+        def before_check_in(i):
+            account = fx.students[len(fx.students) // 4 + i]
+            reservation_id = self.execute(
+                "INSERT INTO reservations (user_account, slot_id, status, create_time) VALUES (?, ?, 'confirmed', ?)",
+                (account, fx.take_slot(), datetime.datetime.now()))
+            return account, reservation_id
+        self.case("check_in_reservation", db.check_in_reservation, before_check_in)
+
+        # 教师课表导入 / 移除 (每次迭代使用不同教师)
+        schedules = []
+
+        def before_add_schedule(i):
+            return fx.teachers[i], fx.venue_id, i % 7, "08:00", "09:00"
+
+        def add_schedule(*args):
+            success, result = db.add_teacher_schedule(*args)
+            if success:
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    schedules.append((args[0], conn.execute(
+                        "SELECT MAX(schedule_id) FROM class_schedules WHERE teacher_account = ?", (args[0],)
+                    ).fetchone()[0]))
+                finally:
+                    conn.close()
+            return success, result
+        self.case("add_teacher_schedule", add_schedule, before_add_schedule)
+        self.case("remove_teacher_schedule", db.remove_teacher_schedule, lambda i: schedules[i])
+
+        # 定时任务
+        self.case("process_daily_tasks", db.process_daily_tasks)
+
+        # 管理员
+        self.case("admin_get_users.page", lambda: db.admin_get_users(page=5, page_size=100, sort="credit_asc"))
+        self.case("admin_get_users.keyword", lambda: db.admin_get_users(keyword=fx.students[0][:4]))
+        self.case("admin_get_all_reservations", lambda: db.admin_get_all_reservations(limit=100))
+        self.case("admin_get_all_reservations.filtered", lambda: db.admin_get_all_reservations(
+            limit=100, venue_id=fx.venue_id, status="checked_in", start_date=today))
+        self.case("get_announcements", db.get_announcements)
+        self.case("search_announcements", lambda: db.search_announcements("通知"))
+
+        # 统计
+        self.case("stats.get_venue_stats", stats.get_venue_stats)
+        self.case("stats.get_heatmap_data", stats.get_heatmap_data)
+        self.case("stats.get_user_stats.heavy", lambda: stats.get_user_stats(fx.heavy_user))
+        self.case("stats.get_batch_user_stats", lambda: stats.get_batch_user_stats(page=1, page_size=50))
+        self.case("stats.get_activity_leaderboard", lambda: stats.get_activity_leaderboard(10, "weekly"))
+
+
+def compare(results, baseline, tolerance=TOLERANCE, min_delta_ms=MIN_DELTA_MS):
+    """
+    与基线逐项比较
+    :return: 回归项列表 [(规模, 名称, 基线 ms, 当前 ms), ...]
+    """
+    regressions = []
+    print(f"\n{'规模/基准':<46}{'基线':>10}{'当前':>10}{'变化':>9}")
+    for size, cases in results.items():
+        for name, current in cases.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                print(f"{size + '/' + name:<46}{'-':>10}{current['median_ms']:>10.3f}{'新增':>9}")
+                continue
+            before, after = base["median_ms"], current["median_ms"]
+            change = (after - before) / before if before > 0 else 0
+            regressed = change > tolerance and after - before > min_delta_ms
+            flag = "  <-- 回归" if regressed else ""
+            print(f"{size + '/' + name:<46}{before:>10.3f}{after:>10.3f}{change:>+9.0%}{flag}")
+            if regressed:
+                regressions.append((size, name, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DBManager / StatisticsManager 微基准测试")
+    parser.add_argument("--sizes", default="small,medium", help=f"数据集规模，逗号分隔 ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=5, help="每个基准计时次数 (另有一次预热)")
+    parser.add_argument("--only", help="只运行名称包含该关键字的基准")
+    parser.add_argument("--out", default="benchmark_results.json", help="结果 JSON 文件")
+    parser.add_argument("--baseline", help="与该基线 JSON 比较，出现回归时返回非 0")
+    parser.add_argument("--save-baseline", help="把本次结果另存为基线")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="允许的相对变慢比例")
+    parser.add_argument("--min-delta-ms", type=float, default=MIN_DELTA_MS, help="忽略小于该值的绝对变化")
+    parser.add_argument("--sql-trace", type=int, metavar="N", help="追踪 SQL 并打印每个规模耗时最多的 N 条语句及查询计划")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"未知规模: {', '.join(unknown)}")
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        for size in sizes:
+            work_db = os.path.join(workdir, f"{size}.db")
+            shutil.copyfile(dataset_path(size), work_db)
+            print(f"\n[{size}]")
+            suite = Suite(work_db, args.repeat)
+            suite.register_all()
+            sql_tracer.configure(enabled=bool(args.sql_trace), reset=True)
+            results[size] = suite.run(args.only)
+            if args.sql_trace:
+                print(f"\n[{size}] 耗时最多的 SQL:")
+                print(format_report(sql_tracer.report(args.sql_trace)))
+                sql_tracer.configure(enabled=False)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        "meta": {
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": SEED,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入 {args.out}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.save_baseline}")
+
+    failed = [f"{size}/{name}" for size, cases in results.items() for name, r in cases.items() if not r["ok"]]
+    if failed:
+        print(f"[!] 以下基准调用失败: {', '.join(failed)}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n[!] {len(regressions)} 项性能回归")
+            sys.exit(1)
+        print("\n未发现性能回归")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,405 @@
+"""
+大规模模拟数据生成器 (压测/基准测试用)
+
+按参数批量生成一个完整的数据库：
+  - 用户: 学生/教师/管理员
+  - 场馆与场地 (按常见场馆模板扩展)
+  - 过去 K 个月到未来若干天的全部时间段
+  - 预约历史: 按星期/时段热度分布抽样，过去的预约为已签到/爽约/已取消，未来的为已预约/已取消
+  - 教师课表、爽约扣分记录、公告
+同一 seed 与 --today 生成完全相同的数据。
+
+为了速度，生成期间关闭日志与同步、暂时删除索引和号源版本触发器，
+数据写完后一次性补齐号源版本表，再执行 schema.sql 重建索引与触发器 (全文索引见 schema_fts.sql)。
+
+用法:
+    python data_generator.py 输出.db [--students 20000] [--teachers 500] [--venues 12]
+                             [--months 6] [--days-ahead 7] [--fill-rate 0.55] [--seed 42] [--force]
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import time
+
+try:
+    from server.db_manager import apply_fts_schema
+except ImportError:
+    from db_manager import apply_fts_schema
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(BASE_DIR, 'database', 'schema.sql')
+
+# 与 test_addData.py 相同的场馆模板: (名称, 是否户外, 场地数量, 描述, 每个时段最大预约人数)
+VENUE_TEMPLATES = [
+    ("足球场", True, 1, "标准11人制足球场", 1),
+    ("篮球场", True, 6, "室外塑胶篮球场", 1),
+    ("排球场", True, 2, "室外排球场", 1),
+    ("网球场", True, 3, "标准硬地网球场", 1),
+    ("羽毛球馆", False, 8, "室内木地板羽毛球场", 1),
+    ("乒乓球馆", False, 8, "专业乒乓球台", 1),
+    ("健身房", False, 1, "综合器械健身区", 100),
+    ("台球室", False, 8, "英式斯诺克/美式黑八", 1),
+    ("游泳馆", False, 1, "恒温标准泳池", 100),
+]
+CAMPUSES = ["北校区", "南校区", "东校区", "西校区"]
+
+OPEN_HOUR, CLOSE_HOUR = 9, 22  # 营业 9:00-22:00，每小时一个时段
+HOT_HOURS = (19, 21)           # 热门时段 [19, 21)
+
+# 预约热度: 周一..周日、9 点..21 点 (相对值，最热为 1)
+WEEKDAY_WEIGHTS = [0.55, 0.6, 0.6, 0.65, 0.8, 1.0, 0.95]
+HOUR_WEIGHTS = [0.35, 0.4, 0.45, 0.5, 0.4, 0.45, 0.55, 0.7, 0.8, 0.9, 1.0, 1.0, 0.85]
+
+# 大容量场馆 (健身房/游泳馆) 在最热时段的平均上座率
+LARGE_VENUE_PEAK_RATIO = 0.4
+
+# 过去的有效预约结果分布 / 任意预约被取消的概率
+PAST_OUTCOMES = [("checked_in", 0.9), ("no_show", 0.1)]
+CANCEL_RATE = 0.12
+NO_SHOW_PENALTY = 10
+CREDIT_WINDOW_DAYS = 30  # 只有最近 30 天内的爽约会体现在当前信用分上
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈"
+GIVEN_CHARS = "伟芳娜秀敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红建文辉力明永健世广志义兴良海山仁波宁贵福生龙元全国胜学祥才发武新利清飞彬富顺信子杰涛昌成康星光天达安岩中茂进林有坚和彪博诚先敬震振壮会思群豪心邦承乐绍功松善厚庆磊民友裕河哲江超浩亮政谦亨奇固之轮翰朗伯宏言若鸣朋斌梁栋维启克伦翔旭鹏泽晨辰士以建家致树炎德行时泰盛雄琛钧冠策腾楠榕风航弘"
+
+CHUNK_SIZE = 50000
+
+
+def random_name(rng):
+    return rng.choice(SURNAMES) + "".join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2))))
+
+
+def random_phone(rng):
+    return "1" + rng.choice("3578") + "".join(rng.choice("0123456789") for _ in range(9))
+
+
+def random_moment(rng, day, start_hour=0, end_hour=24):
+    """某天 [start_hour, end_hour) 内的随机时刻"""
+    seconds = rng.randrange(start_hour * 3600, end_hour * 3600)
+    return datetime.datetime.combine(day, datetime.time()) + datetime.timedelta(seconds=seconds)
+
+
+class DataGenerator:
+    def __init__(self, db_path, students=20000, teachers=500, admins=5, venues=12,
+                 months=6, days_ahead=7, fill_rate=0.55, announcements=200, seed=42, today=None):
+        self.db_path = db_path
+        self.students = students
+        self.teachers = teachers
+        self.admins = admins
+        self.venues = venues
+        self.months = months
+        self.days_ahead = days_ahead
+        self.fill_rate = fill_rate
+        self.announcements = announcements
+        self.rng = random.Random(seed)
+        self.today = today or datetime.date.today()
+        self.counts = {}
+
+    # ---------------- 辅助 ---------------- #
+    def _insert(self, cursor, table, sql, rows):
+        """分块 executemany，rows 可以是生成器"""
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                cursor.executemany(sql, chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(sql, chunk)
+        self.counts[table] = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _pick_user(self, n):
+        """活跃度偏斜的用户抽样: 少数用户贡献大部分预约"""
+        return int(n * self.rng.random() ** 2)
+
+    # ---------------- 生成 ---------------- #
+    def generate(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode = OFF")
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA temp_store = MEMORY")
+            cursor.execute("PRAGMA cache_size = -200000")
+            with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+                schema_sql = f.read()
+            cursor.executescript(schema_sql)
+
+            # 暂时去掉索引与号源版本触发器，写完后重建
+            cursor.execute("""
+                SELECT type, name FROM sqlite_master
+                WHERE (type = 'index' AND name LIKE 'idx_%') OR (type = 'trigger' AND name LIKE 'time_slots_version_%')
+            """)
+            for obj_type, name in cursor.fetchall():
+                cursor.execute(f"DROP {obj_type.upper()} {name}")
+
+            cursor.execute("BEGIN")
+            accounts = self._generate_users_accounts()
+            venue_rows = self._generate_venues(cursor)
+            no_shows = self._generate_slots_and_reservations(cursor, venue_rows, accounts)
+            self._generate_users(cursor, accounts, no_shows)
+            self._generate_schedules(cursor, accounts, venue_rows)
+            self._generate_announcements(cursor, venue_rows)
+            self._build_slot_versions(cursor)
+            conn.commit()
+
+            # 重建索引、触发器与全文索引 (SQLite 不支持 FTS5 时跳过全文索引)
+            cursor.executescript(schema_sql)
+            fts_ok, fts_message = apply_fts_schema(conn)
+            if fts_ok:
+                cursor.execute("INSERT INTO announcements_fts(announcements_fts) VALUES ('rebuild')")
+            else:
+                print(f"[!] {fts_message}")
+            cursor.execute("ANALYZE")
+            conn.commit()
+            cursor.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            conn.close()
+        return self.counts
+
+    def _generate_users_accounts(self):
+        """先确定账号列表 (信用分要等预约生成后才能算出)"""
+        start_year = self.today.year - 4
+        students = [f"{start_year + i % 4}{i:07d}" for i in range(self.students)]
+        teachers = [f"T{i:06d}" for i in range(self.teachers)]
+        admins = ["admin"] + [f"admin{i}" for i in range(1, self.admins)]
+        return {"student": students, "teacher": teachers, "admin": admins[:self.admins]}
+
+    def _generate_users(self, cursor, accounts, no_shows):
+        recent_limit = self.today - datetime.timedelta(days=CREDIT_WINDOW_DAYS)
+        earliest = self.today - datetime.timedelta(days=self.months * 30 + 365)
+
+        def rows():
+            for role, role_accounts in accounts.items():
+                for account in role_accounts:
+                    recent = sum(1 for day in no_shows.get(account, ()) if day >= recent_limit)
+                    score = max(0, 100 - NO_SHOW_PENALTY * recent)
+                    created = random_moment(self.rng, earliest + datetime.timedelta(days=self.rng.randrange(365)))
+                    password = "admin888" if role == "admin" else "123456"
+                    yield (account, password, random_name(self.rng), role, random_phone(self.rng), score, created)
+
+        self._insert(cursor, "users", """
+            INSERT INTO users (user_account, password, name, role, phone, credit_score, create_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows())
+
+        # 爽约扣分记录 (爽约当天时段结束后)
+        def logs():
+            for account, days in no_shows.items():
+                for day in days:
+                    yield (account, -NO_SHOW_PENALTY, '爽约扣分', random_moment(self.rng, day, CLOSE_HOUR - 1, 24))
+
+        self._insert(cursor, "credit_logs", """
+            INSERT INTO credit_logs (user_account, change_amount, reason, time)
+            VALUES (?, ?, ?, ?)
+        """, logs())
+
+    def _generate_venues(self, cursor):
+        """
+        :return: [(venue_id, [court_id, ...], max_reservations), ...]
+        """
+        venue_rows = []
+        court_id = 0
+        for i in range(self.venues):
+            name, is_outdoor, court_count, desc, max_res = VENUE_TEMPLATES[i % len(VENUE_TEMPLATES)]
+            campus = CAMPUSES[(i // len(VENUE_TEMPLATES)) % len(CAMPUSES)]
+            round_no = i // (len(VENUE_TEMPLATES) * len(CAMPUSES))
+            if i >= len(VENUE_TEMPLATES):
+                name = f"{name} ({campus}{'' if round_no == 0 else round_no + 1})"
+            venue_id = i + 1
+            cursor.execute("""
+                INSERT INTO venues (venue_id, venue_name, is_outdoor, location, description)
+                VALUES (?, ?, ?, ?, ?)
+            """, (venue_id, name, is_outdoor, f"{campus}体育中心", desc))
+            courts = []
+            for c in range(1, court_count + 1):
+                court_id += 1
+                court_name = f"{name} {c}号场" if court_count > 1 else name
+                cursor.execute("INSERT INTO courts (court_id, venue_id, court_name) VALUES (?, ?, ?)",
+                               (court_id, venue_id, court_name))
+                courts.append(court_id)
+            venue_rows.append((venue_id, courts, max_res))
+        self.counts["venues"] = len(venue_rows)
+        self.counts["courts"] = court_id
+        return venue_rows
+
+    def _generate_slots_and_reservations(self, cursor, venue_rows, accounts):
+        """
+        逐个时段抽样预约人数，时段与预约一起生成，current_reservations 直接写入最终值
+        :return: {account: [爽约日期, ...]}
+        """
+        rng = self.rng
+        bookers = accounts["student"] + accounts["teacher"]
+        n_bookers = len(bookers)
+        first_day = self.today - datetime.timedelta(days=self.months * 30)
+        days = (self.today - first_day).days + self.days_ahead + 1
+        now = datetime.datetime.combine(self.today, datetime.time(OPEN_HOUR))
+        no_shows = {}
+        slot_rows = []
+        reservation_rows = []
+        slot_id = 0
+
+        def flush():
+            cursor.executemany("""
+                INSERT INTO time_slots (slot_id, court_id, date, start_time, end_time, max_reservations, current_reservations, is_hot)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, slot_rows)
+            cursor.executemany("""
+                INSERT INTO reservations (user_account, slot_id, status, create_time, cancel_time)
+                VALUES (?, ?, ?, ?, ?)
+            """, reservation_rows)
+            slot_rows.clear()
+            reservation_rows.clear()
+
+        for offset in range(days):
+            day = first_day + datetime.timedelta(days=offset)
+            day_str = day.strftime("%Y-%m-%d")
+            weekday_weight = WEEKDAY_WEIGHTS[day.weekday()]
+            for venue_id, courts, max_res in venue_rows:
+                for court_id in courts:
+                    for hour in range(OPEN_HOUR, CLOSE_HOUR):
+                        slot_id += 1
+                        start = datetime.datetime.combine(day, datetime.time(hour))
+                        demand = self.fill_rate * weekday_weight * HOUR_WEIGHTS[hour - OPEN_HOUR]
+                        if max_res == 1:
+                            booked = 1 if rng.random() < min(0.95, demand) else 0
+                        else:
+                            mean = max_res * LARGE_VENUE_PEAK_RATIO * demand / max(self.fill_rate, 0.01)
+                            booked = min(max_res, max(0, int(rng.gauss(mean, mean * 0.25))))
+                        # 未来的时段只有一部分已经被订出 (越远越少)
+                        if start >= now:
+                            booked = int(booked * max(0.0, 1 - (day - self.today).days / (self.days_ahead + 1)) + rng.random())
+                            booked = min(booked, max_res)
+
+                        active = 0
+                        users = {self._pick_user(n_bookers) for _ in range(booked)} if booked else ()
+                        for user_index in users:
+                            account = bookers[user_index]
+                            created = start - datetime.timedelta(seconds=rng.randrange(3600, 7 * 86400))
+                            if rng.random() < CANCEL_RATE:
+                                cancel = created + (start - created) * rng.random()
+                                reservation_rows.append((account, slot_id, 'cancelled', created, cancel))
+                                continue
+                            active += 1
+                            if start >= now:
+                                status = 'confirmed'
+                            else:
+                                status = 'no_show' if rng.random() < PAST_OUTCOMES[1][1] else 'checked_in'
+                                if status == 'no_show':
+                                    no_shows.setdefault(account, []).append(day)
+                            reservation_rows.append((account, slot_id, status, created, None))
+
+                        is_hot = 1 if HOT_HOURS[0] <= hour < HOT_HOURS[1] else 0
+                        # 与服务器 _auto_manage_slots / add_teacher_schedule 一致使用 HH:MM:SS
+                        slot_rows.append((slot_id, court_id, day_str, f"{hour:02d}:00:00", f"{hour + 1:02d}:00:00",
+                                          max_res, active, is_hot))
+                        if len(slot_rows) >= CHUNK_SIZE:
+                            flush()
+        flush()
+        self.counts["time_slots"] = slot_id
+        self.counts["reservations"] = cursor.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+        return no_shows
+
+    def _generate_schedules(self, cursor, accounts, venue_rows):
+        """约三成教师每周有 1-3 节 2 小时的课"""
+        rng = self.rng
+
+        def rows():
+            for teacher in accounts["teacher"]:
+                if rng.random() >= 0.3:
+                    continue
+                for _ in range(rng.randint(1, 3)):
+                    venue_id = rng.choice(venue_rows)[0]
+                    hour = rng.randrange(OPEN_HOUR, CLOSE_HOUR - 2)
+                    end_date = self.today + datetime.timedelta(days=rng.randrange(30, 150))
+                    yield (teacher, venue_id, rng.randrange(5), f"{hour:02d}:00:00", f"{hour + 2:02d}:00:00",
+                           end_date.strftime("%Y-%m-%d"))
+
+        self._insert(cursor, "class_schedules", """
+            INSERT INTO class_schedules (teacher_account, venue_id, day_of_week, start_time, end_time, end_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows())
+
+    def _generate_announcements(self, cursor, venue_rows):
+        rng = self.rng
+        topics = ["场地维修", "开放时间调整", "比赛通知", "设备更新", "安全提示", "活动报名"]
+
+        def rows():
+            for i in range(self.announcements):
+                topic = rng.choice(topics)
+                venue_id = rng.choice(venue_rows)[0] if rng.random() < 0.6 else None
+                start = self.today - datetime.timedelta(days=rng.randrange(self.months * 30 + 1))
+                end = start + datetime.timedelta(days=rng.randrange(1, 30))
+                content = f"{topic}：请各位同学注意相关安排，如有疑问请联系场馆管理员。（第 {i + 1} 号通知）"
+                yield (f"{topic}通知 #{i + 1}", content, "admin", venue_id,
+                       start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), random_moment(rng, start))
+
+        self._insert(cursor, "announcements", """
+            INSERT INTO announcements (title, content, author_account, related_venue_id, start_date, end_date, create_time)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows())
+
+    def _build_slot_versions(self, cursor):
+        """触发器被暂时移除，这里一次性算出每个 (场馆, 日期) 的版本号与变更记录"""
+        cursor.execute("""
+            INSERT INTO slot_changes (venue_id, date, slot_id, version, deleted)
+            SELECT c.venue_id, ts.date, ts.slot_id,
+                   ROW_NUMBER() OVER (PARTITION BY c.venue_id, ts.date ORDER BY ts.slot_id), 0
+            FROM time_slots ts JOIN courts c ON ts.court_id = c.court_id
+        """)
+        cursor.execute("""
+            INSERT INTO slot_versions (venue_id, date, version)
+            SELECT venue_id, date, MAX(version) FROM slot_changes GROUP BY venue_id, date
+        """)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成大规模模拟数据库 (压测/基准测试用)")
+    parser.add_argument("db", help="输出数据库路径 (不会修改 sports_venue.db，除非显式指定)")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--teachers", type=int, default=500)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--venues", type=int, default=12)
+    parser.add_argument("--months", type=int, default=6, help="生成过去多少个月的时段与预约历史")
+    parser.add_argument("--days-ahead", type=int, default=7, help="生成未来多少天的时段")
+    parser.add_argument("--fill-rate", type=float, default=0.55, help="最热时段的预约概率")
+    parser.add_argument("--announcements", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", help="以该日期 (YYYY-MM-DD) 为今天，配合 --seed 可完全复现")
+    parser.add_argument("--force", action="store_true", help="输出文件已存在时覆盖")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        if not args.force:
+            print(f"{args.db} 已存在，如需覆盖请加 --force")
+            sys.exit(1)
+        os.remove(args.db)
+
+    today = datetime.datetime.strptime(args.today, "%Y-%m-%d").date() if args.today else None
+    generator = DataGenerator(
+        args.db,
+        students=args.students,
+        teachers=args.teachers,
+        admins=max(1, args.admins),
+        venues=max(1, args.venues),
+        months=args.months,
+        days_ahead=args.days_ahead,
+        fill_rate=args.fill_rate,
+        announcements=args.announcements,
+        seed=args.seed,
+        today=today,
+    )
+    started = time.perf_counter()
+    counts = generator.generate()
+    elapsed = time.perf_counter() - started
+
+    for table, count in counts.items():
+        print(f"  {table:<16} {count:>12,}")
+    print(f"共 {sum(counts.values()):,} 行，耗时 {elapsed:.1f} 秒 -> {args.db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,138 @@
 import sqlite3
 import os
+import threading
+import contextlib
+
+try:
+    from server.sql_tracer import sql_tracer
+except ImportError:
+    from sql_tracer import sql_tracer
 
 # 获取项目根目录 (假设此文件在 server/ 目录下)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, 'database', 'sports_venue.db')
+SCHEMA_PATH = os.path.join(BASE_DIR, 'database', 'schema.sql')
+FTS_SCHEMA_PATH = os.path.join(BASE_DIR, 'database', 'schema_fts.sql')
+
+
+def apply_fts_schema(conn, fts_schema_path=FTS_SCHEMA_PATH):
+    """
+    创建公告全文索引 (FTS5 + trigram 分词) 及其触发器
+    部分 SQLite 版本没有 FTS5 或 trigram 分词器 (3.34 之前)，失败时不影响其余表结构
+    :return: (bool, str)
+    """
+    try:
+        with open(fts_schema_path, 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        return True, "全文索引可用"
+    except sqlite3.Error as e:
+        return False, f"当前 SQLite 不支持全文索引 ({str(e)})，公告检索使用 LIKE"
+
+class SharedConnection:
+    """
+    批量请求期间共享的只读连接
+    各查询方法照常调用 close()/commit()，均不生效，事务由 read_snapshot 统一结束
+    """
+
+    def __init__(self, conn, db_path):
+        self._conn = conn
+        self.db_path = db_path
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# 当前线程正在使用的共享连接 (DBManager 与 StatisticsManager 共用)
+_pinned = threading.local()
+
+
+def pinned_connection(db_path):
+    """当前线程处于 read_snapshot 中且数据库相同时返回共享连接，否则返回 None"""
+    shared = getattr(_pinned, "conn", None)
+    if shared is not None and shared.db_path == db_path:
+        return shared
+    return None
+
 
 class DBManager:
+    # 管理员列表分页: 默认/最大每页条数
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
+        self._fts_available = None  # 公告全文索引是否可用 (首次检索或 ensure_schema 时确定)
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        # 开启 SQL 追踪时返回记录耗时的连接代理
+        return pinned_connection(self.db_path) or sql_tracer.wrap(sqlite3.connect(self.db_path), self.db_path)
+
+    @contextlib.contextmanager
+    def read_snapshot(self):
+        """
+        在当前线程内开启一个只读事务，期间所有 get_connection() 都返回同一连接，
+        多个查询看到的是同一时刻的数据 (用于批量请求)
+        """
+        if pinned_connection(self.db_path) is not None:
+            # 已在快照中 (嵌套调用)，直接复用
+            yield
+            return
+        conn = sql_tracer.wrap(sqlite3.connect(self.db_path), self.db_path)
+        try:
+            conn.execute("BEGIN")
+            # 立即读取一次以取得读锁，快照从此刻固定
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            _pinned.conn = SharedConnection(conn, self.db_path)
+            yield
+        finally:
+            _pinned.conn = None
+            conn.rollback()
+            conn.close()
+
+    def ensure_schema(self, schema_path=SCHEMA_PATH):
+        """
+        对已有数据库重新执行 schema.sql，再单独创建全文索引 (schema_fts.sql)
+        schema 中的建表/建索引语句均为 IF NOT EXISTS，可重复执行，用于补齐新增的表和索引
+        """
+        conn = self.get_connection()
+        try:
+            with open(schema_path, 'r', encoding='utf-8') as f:
+                conn.executescript(f.read())
+            self._fts_available, fts_message = apply_fts_schema(conn)
+            if self._fts_available:
+                # 全文索引由触发器维护；对于建索引之前已有的公告，首次启动时整体重建一次
+                indexed = conn.execute("SELECT COUNT(*) FROM announcements_fts_docsize").fetchone()[0]
+                total = conn.execute("SELECT COUNT(*) FROM announcements").fetchone()[0]
+                if indexed != total:
+                    conn.execute("INSERT INTO announcements_fts(announcements_fts) VALUES ('rebuild')")
+            conn.commit()
+            return True, f"数据库结构检查完成，{fts_message}"
+        except Exception as e:
+            return False, f"数据库结构检查失败: {str(e)}"
+        finally:
+            conn.close()
+
+    @classmethod
+    def _clamp_page_size(cls, limit):
+        try:
+            limit = int(limit) if limit is not None else cls.DEFAULT_PAGE_SIZE
+        except (TypeError, ValueError):
+            raise ValueError("分页参数必须是整数")
+        return min(max(1, limit), cls.MAX_PAGE_SIZE)
+
+    @staticmethod
+    def _prefix_range(prefix):
+        """
+        前缀匹配转换为区间查询 [prefix, prefix 末字符+1)
+        与 LIKE 'prefix%' 等价 (区分大小写)，但可以直接使用普通 BINARY 索引
+        """
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
 
     @staticmethod
     def _normalize_time_str(time_str):
@@ -176,9 +298,14 @@ class DBManager:
         finally:
             conn.close()
 
-    def get_available_slots(self, venue_id, date_str):
+    def get_available_slots(self, venue_id, date_str, start_time=None, end_time=None,
+                            only_available=False, summary=False):
         """
         查询某场馆某天的可用时间段
+        :param start_time/end_time: 可选时间窗口，按时间段开始时间过滤 (start_time <= 开始 < end_time)
+        :param only_available: 只返回还有余量的时间段
+        :param summary: 为 True 时不返回明细，按时间段分组返回场地数与剩余名额
+                        [{"start_time", "end_time", "courts", "remaining"}, ...]
         """
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -192,18 +319,48 @@ class DBManager:
             
             if query_date < today or query_date > max_date:
                 return False, "只能查询未来3天内的号源"
+
+            conditions = ["c.venue_id = ?", "ts.date = ?"]
+            params = [venue_id, date_str]
+            if start_time:
+                conditions.append("ts.start_time >= ?")
+                params.append(self._normalize_time_str(start_time))
+            if end_time:
+                conditions.append("ts.start_time < ?")
+                params.append(self._normalize_time_str(end_time))
+            if only_available:
+                conditions.append("ts.current_reservations < ts.max_reservations")
+            where = " AND ".join(conditions)
+
+            if summary:
+                # 分组汇总直接在 SQL 中完成，只返回每个时间段一行
+                cursor.execute(f"""
+                    SELECT ts.start_time, ts.end_time, COUNT(*),
+                           SUM(MAX(ts.max_reservations - ts.current_reservations, 0))
+                    FROM time_slots ts
+                    JOIN courts c ON ts.court_id = c.court_id
+                    WHERE {where}
+                    GROUP BY ts.start_time, ts.end_time
+                    ORDER BY ts.start_time
+                """, params)
+                return True, [{
+                    "start_time": row[0],
+                    "end_time": row[1],
+                    "courts": row[2],
+                    "remaining": row[3]
+                } for row in cursor.fetchall()]
             
             # 关联查询：时间段 -> 场地 -> 场馆
-            # 查询所有时间段（包括已满），由前端判断是否可预约
-            sql = """
+            # 默认查询所有时间段（包括已满），由前端判断是否可预约
+            sql = f"""
                 SELECT ts.slot_id, c.court_name, ts.start_time, ts.end_time, 
                        ts.current_reservations, ts.max_reservations, ts.is_hot
                 FROM time_slots ts
                 JOIN courts c ON ts.court_id = c.court_id
-                WHERE c.venue_id = ? AND ts.date = ?
+                WHERE {where}
                 ORDER BY ts.start_time, c.court_name
             """
-            cursor.execute(sql, (venue_id, date_str))
+            cursor.execute(sql, params)
             rows = cursor.fetchall()
             
             slots = []
@@ -223,6 +380,89 @@ class DBManager:
         finally:
             conn.close()
 
+    def get_slot_changes(self, venue_id, date_str, since_version=None):
+        """
+        按版本号增量同步某场馆某天的号源 (配合客户端缓存)
+        :param since_version: 客户端缓存的版本号；为空或与服务器不一致 (如数据库重建) 时返回全量
+        :return: (bool, {"version", "full", "slots": [...], "deleted": [slot_id, ...]})
+                 full=True 时 slots 为全部时间段，否则只包含 since_version 之后有变化的时间段
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            import datetime
+            today = datetime.date.today()
+            query_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+            if query_date < today or query_date > today + datetime.timedelta(days=2):
+                return False, "只能查询未来3天内的号源"
+
+            # 先读版本号再读变更: 期间若有新的写入，多拉到的变更下次会再拉一次，不会遗漏
+            cursor.execute("SELECT version FROM slot_versions WHERE venue_id = ? AND date = ?", (venue_id, date_str))
+            row = cursor.fetchone()
+            version = row[0] if row else 0
+
+            slot_columns = """
+                ts.slot_id, c.court_name, ts.start_time, ts.end_time,
+                ts.current_reservations, ts.max_reservations, ts.is_hot
+            """
+            full = since_version is None or since_version < 0 or since_version > version
+            deleted = []
+            if full:
+                cursor.execute(f"""
+                    SELECT {slot_columns}
+                    FROM time_slots ts
+                    JOIN courts c ON ts.court_id = c.court_id
+                    WHERE c.venue_id = ? AND ts.date = ?
+                    ORDER BY ts.start_time, c.court_name
+                """, (venue_id, date_str))
+                rows = cursor.fetchall()
+            else:
+                cursor.execute(f"""
+                    SELECT {slot_columns}, sc.slot_id, sc.deleted
+                    FROM slot_changes sc
+                    LEFT JOIN time_slots ts ON ts.slot_id = sc.slot_id
+                    LEFT JOIN courts c ON ts.court_id = c.court_id
+                    WHERE sc.venue_id = ? AND sc.date = ? AND sc.version > ?
+                    ORDER BY ts.start_time, c.court_name
+                """, (venue_id, date_str, since_version))
+                rows = []
+                for row in cursor.fetchall():
+                    if row[8] or row[0] is None:
+                        deleted.append(row[7])
+                    else:
+                        rows.append(row[:7])
+
+            slots = [{
+                "slot_id": row[0],
+                "court_name": row[1],
+                "start_time": row[2],
+                "end_time": row[3],
+                "current": row[4],
+                "max": row[5],
+                "is_hot": row[6]
+            } for row in rows]
+            return True, {"version": version, "full": full, "slots": slots, "deleted": deleted}
+        except Exception as e:
+            return False, str(e)
+        finally:
+            conn.close()
+
+    def get_slot_versions(self):
+        """
+        读取今天及以后各 (场馆, 日期) 的号源版本号
+        :return: (bool, {(venue_id, date): version})
+        """
+        conn = self.get_connection()
+        try:
+            import datetime
+            today = datetime.date.today().strftime("%Y-%m-%d")
+            rows = conn.execute("SELECT venue_id, date, version FROM slot_versions WHERE date >= ?", (today,)).fetchall()
+            return True, {(venue_id, date): version for venue_id, date, version in rows}
+        except Exception as e:
+            return False, str(e)
+        finally:
+            conn.close()
+
     def create_reservation(self, user_account, slot_id):
         """
         创建预约 (核心事务逻辑)
@@ -890,6 +1130,9 @@ class DBManager:
         """, (today_date,))
         deleted_count = cursor.rowcount
         print(f"[Task] 已清理未使用的过期号源: {deleted_count} 条 (保留了有历史订单的号源)")
+        # 过期日期不再允许查询，其变更版本记录一并清理
+        cursor.execute("DELETE FROM slot_changes WHERE date < ?", (today_date,))
+        cursor.execute("DELETE FROM slot_versions WHERE date < ?", (today_date,))
         
         # 2. 生成未来3天号源
         # 获取所有场地及其所属场馆名称
@@ -1048,12 +1291,59 @@ class DBManager:
         finally:
             conn.close()
 
-    def admin_get_users(self):
-        """获取所有用户"""
+    # 用户列表允许的排序方式 -> ORDER BY 子句 (均以账号作为次级排序保证分页稳定)
+    USER_SORTS = {
+        "account": "user_account ASC",
+        "name": "name ASC, user_account ASC",
+        "credit_asc": "credit_score ASC, user_account ASC",
+        "credit_desc": "credit_score DESC, user_account DESC",
+        "create_time": "create_time DESC, user_account ASC",
+    }
+
+    def admin_get_users(self, page=1, page_size=None, sort="account", keyword=None, role=None):
+        """
+        分页获取用户
+        :param sort: USER_SORTS 中的排序方式
+        :param keyword: 账号/姓名/电话前缀搜索
+        :param role: 按角色过滤
+        :return: (bool, (list, int)) - 本页用户, 符合条件的总数
+        """
+        if sort not in self.USER_SORTS:
+            return False, f"不支持的排序方式: {sort}"
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT user_account, name, role, phone, credit_score FROM users")
+            try:
+                page = max(1, int(page or 1))
+                page_size = self._clamp_page_size(page_size)
+            except ValueError:
+                return False, "分页参数必须是整数"
+
+            conditions = []
+            params = []
+            keyword = (keyword or "").strip()
+            if keyword:
+                low, high = self._prefix_range(keyword)
+                conditions.append("""(
+                    (user_account >= ? AND user_account < ?)
+                    OR (name >= ? AND name < ?)
+                    OR (phone >= ? AND phone < ?)
+                )""")
+                params.extend([low, high] * 3)
+            if role:
+                conditions.append("role = ?")
+                params.append(role)
+            where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            cursor.execute(f"SELECT COUNT(*) FROM users {where_sql}", params)
+            total = cursor.fetchone()[0]
+
+            cursor.execute(f"""
+                SELECT user_account, name, role, phone, credit_score FROM users
+                {where_sql}
+                ORDER BY {self.USER_SORTS[sort]}
+                LIMIT ? OFFSET ?
+            """, params + [page_size, (page - 1) * page_size])
             rows = cursor.fetchall()
             users = []
             for row in rows:
@@ -1064,7 +1354,7 @@ class DBManager:
                     "phone": row[3],
                     "credit_score": row[4]
                 })
-            return True, users
+            return True, (users, total)
         except Exception as e:
             return False, str(e)
         finally:
@@ -1156,21 +1446,65 @@ class DBManager:
         finally:
             conn.close()
 
-    def admin_get_all_reservations(self):
-        """获取所有预约"""
+    def admin_get_all_reservations(self, after=None, limit=None, venue_id=None, start_date=None,
+                                   end_date=None, status=None, user_account=None):
+        """
+        分页获取预约 (按创建时间倒序)
+        使用 keyset 分页: after 为上一页返回的 next_cursor {"create_time", "reservation_id"}，
+        过滤条件全部下推到 SQL，配合 idx_reservations_* 索引避免全表扫描
+        :param status: 单个状态或状态列表
+        :return: (bool, (list, dict/None)) - 本页预约, 下一页游标 (无更多数据时为 None)
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         try:
-            sql = """
-                SELECT r.reservation_id, r.user_account, v.venue_name, c.court_name, ts.date, ts.start_time, ts.end_time, r.status
+            try:
+                limit = self._clamp_page_size(limit)
+            except ValueError as e:
+                return False, str(e)
+
+            conditions = []
+            params = []
+            if after:
+                if not isinstance(after, dict) or "create_time" not in after or "reservation_id" not in after:
+                    return False, "分页游标格式错误"
+                conditions.append("(r.create_time, r.reservation_id) < (?, ?)")
+                params.extend([after["create_time"], after["reservation_id"]])
+            if venue_id:
+                conditions.append("c.venue_id = ?")
+                params.append(venue_id)
+            if start_date:
+                conditions.append("ts.date >= ?")
+                params.append(start_date)
+            if end_date:
+                conditions.append("ts.date <= ?")
+                params.append(end_date)
+            if status:
+                statuses = status if isinstance(status, list) else [status]
+                conditions.append(f"r.status IN ({','.join('?' * len(statuses))})")
+                params.extend(statuses)
+            if user_account:
+                conditions.append("r.user_account = ?")
+                params.append(user_account)
+
+            where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            sql = f"""
+                SELECT r.reservation_id, r.user_account, v.venue_name, c.court_name, ts.date, ts.start_time, ts.end_time, r.status,
+                       r.create_time
                 FROM reservations r
                 JOIN time_slots ts ON r.slot_id = ts.slot_id
                 JOIN courts c ON ts.court_id = c.court_id
                 JOIN venues v ON c.venue_id = v.venue_id
-                ORDER BY r.create_time DESC
+                {where_sql}
+                ORDER BY r.create_time DESC, r.reservation_id DESC
+                LIMIT ?
             """
-            cursor.execute(sql)
+            # 多取一条用于判断是否还有下一页
+            cursor.execute(sql, params + [limit + 1])
             rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
             res_list = []
             for row in rows:
                 res_list.append({
@@ -1180,9 +1514,13 @@ class DBManager:
                     "court": row[3],
                     "date": row[4],
                     "time": f"{row[5]}-{row[6]}",
-                    "status": row[7]
+                    "status": row[7],
+                    "create_time": row[8]
                 })
-            return True, res_list
+            next_cursor = None
+            if has_more:
+                next_cursor = {"create_time": rows[-1][8], "reservation_id": rows[-1][0]}
+            return True, (res_list, next_cursor)
         except Exception as e:
             return False, str(e)
         finally:
@@ -1275,6 +1613,124 @@ class DBManager:
         finally:
             conn.close()
 
+    # trigram 分词: 少于 3 个字的检索词无法走全文索引，改用 LIKE 扫描
+    FTS_MIN_TERM_LENGTH = 3
+
+    def fts_available(self):
+        """全文索引表存在且当前 SQLite 能读取 (没有 FTS5 时检索全部改用 LIKE)"""
+        if self._fts_available is None:
+            conn = self.get_connection()
+            try:
+                conn.execute("SELECT rowid FROM announcements_fts LIMIT 0").fetchall()
+                self._fts_available = True
+            except sqlite3.Error:
+                self._fts_available = False
+            finally:
+                conn.close()
+        return self._fts_available
+
+    @staticmethod
+    def _make_snippet(text, terms, width=30):
+        """为 LIKE 检索结果生成与 FTS snippet() 类似的摘要"""
+        text = text or ""
+        pos = min((text.find(t) for t in terms if t in text), default=-1)
+        if pos < 0:
+            return text[:width * 2] + ("…" if len(text) > width * 2 else "")
+        start = max(0, pos - width)
+        end = min(len(text), pos + width)
+        snippet = text[start:end]
+        for t in terms:
+            snippet = snippet.replace(t, f"【{t}】")
+        return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+    def search_announcements(self, keyword, page=1, page_size=None):
+        """
+        全文检索有效公告/帖子 (标题 + 内容)
+        多个检索词以空格分隔，须同时命中；结果按 bm25 相关度排序，返回高亮摘要而非全文
+        :return: (bool, (list, int)) - 本页结果, 命中总数
+        """
+        terms = [t for t in (keyword or "").split() if t]
+        if not terms:
+            return False, "检索词不能为空"
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            import datetime
+            try:
+                page = max(1, int(page or 1))
+                page_size = self._clamp_page_size(page_size)
+            except ValueError:
+                return False, "分页参数必须是整数"
+            today = datetime.date.today()
+            offset = (page - 1) * page_size
+
+            if self.fts_available() and all(len(t) >= self.FTS_MIN_TERM_LENGTH for t in terms):
+                # 每个检索词作为一个短语，双引号转义后交给 FTS5
+                match_expr = " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+                cursor.execute("""
+                    SELECT COUNT(*)
+                    FROM announcements_fts f
+                    JOIN announcements a ON a.announcement_id = f.rowid
+                    WHERE announcements_fts MATCH ? AND a.end_date >= ?
+                """, (match_expr, today))
+                total = cursor.fetchone()[0]
+                cursor.execute("""
+                    SELECT a.announcement_id,
+                           snippet(announcements_fts, 0, '【', '】', '…', 16),
+                           snippet(announcements_fts, 1, '【', '】', '…', 32),
+                           a.create_time, u.name, u.role, a.author_account,
+                           bm25(announcements_fts) AS score
+                    FROM announcements_fts
+                    JOIN announcements a ON a.announcement_id = announcements_fts.rowid
+                    LEFT JOIN users u ON a.author_account = u.user_account
+                    WHERE announcements_fts MATCH ? AND a.end_date >= ?
+                    ORDER BY score
+                    LIMIT ? OFFSET ?
+                """, (match_expr, today, page_size, offset))
+                rows = cursor.fetchall()
+            else:
+                like_sql = " AND ".join(["(a.title LIKE ? ESCAPE '\\' OR a.content LIKE ? ESCAPE '\\')"] * len(terms))
+                like_params = []
+                for t in terms:
+                    pattern = "%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                    like_params.extend([pattern, pattern])
+                cursor.execute(f"""
+                    SELECT COUNT(*) FROM announcements a
+                    WHERE a.end_date >= ? AND {like_sql}
+                """, [today] + like_params)
+                total = cursor.fetchone()[0]
+                cursor.execute(f"""
+                    SELECT a.announcement_id, a.title, a.content,
+                           a.create_time, u.name, u.role, a.author_account, 0
+                    FROM announcements a
+                    LEFT JOIN users u ON a.author_account = u.user_account
+                    WHERE a.end_date >= ? AND {like_sql}
+                    ORDER BY a.create_time DESC
+                    LIMIT ? OFFSET ?
+                """, [today] + like_params + [page_size, offset])
+                rows = [
+                    (r[0], self._make_snippet(r[1], terms, 16), self._make_snippet(r[2], terms)) + tuple(r[3:])
+                    for r in cursor.fetchall()
+                ]
+
+            results = []
+            for row in rows:
+                results.append({
+                    "id": row[0],
+                    "title_snippet": row[1],
+                    "content_snippet": row[2],
+                    "create_time": row[3],
+                    "author_name": row[4] if row[4] else "管理员",
+                    "author_role": row[5] if row[5] else "admin",
+                    "author_account": row[6],
+                    "score": row[7]
+                })
+            return True, (results, total)
+        except Exception as e:
+            return False, str(e)
+        finally:
+            conn.close()
+
     def admin_delete_announcement(self, ann_id):
         """删除公告"""
         conn = self.get_connection()
@@ -0,0 +1,252 @@
+import sqlite3
+import os
+import io
+import csv
+import zlib
+import uuid
+import time
+import base64
+import threading
+
+# 获取数据库路径 (与 db_manager 保持一致)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, 'database', 'sports_venue.db')
+EXPORT_DIR = os.path.join(BASE_DIR, 'exports')
+
+# 可选依赖: 安装了 pyarrow 时支持导出 Parquet 列式文件
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# 可导出的表: 表名 -> (主键, 列)
+EXPORT_TABLES = {
+    "reservations": ("reservation_id", ["reservation_id", "user_account", "slot_id", "status", "create_time", "cancel_time"]),
+    "time_slots": ("slot_id", ["slot_id", "court_id", "date", "start_time", "end_time", "max_reservations", "current_reservations", "is_hot"]),
+    "credit_logs": ("log_id", ["log_id", "user_account", "change_amount", "reason", "time"]),
+}
+# 整数列 (其余列在列式文件中按字符串保存)
+INTEGER_COLUMNS = {
+    "reservation_id", "slot_id", "court_id", "max_reservations",
+    "current_reservations", "is_hot", "log_id", "change_amount",
+}
+
+
+class ExportManager:
+    """
+    历史数据导出
+    按主键分批 (keyset) 翻页读取，每批只持有 batch_size 行，
+    因此无论历史数据多大，内存占用都是常数，也不会长时间占用数据库读锁。
+    """
+
+    BATCH_SIZE = 2000
+    SESSION_TTL = 300  # 通过 socket 分块导出时，会话空闲超过 5 分钟自动清理
+
+    def __init__(self, db_path=DB_PATH, export_dir=EXPORT_DIR):
+        self.db_path = db_path
+        self.export_dir = export_dir
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    @staticmethod
+    def available_formats():
+        formats = ["csv", "csv.gz"]
+        if pyarrow is not None:
+            formats.append("parquet")
+        return formats
+
+    def iter_batches(self, table, batch_size=None):
+        """
+        按主键顺序逐批产出 (columns, rows)
+        每批单独查询，游标位置 (上一批最后的主键) 保存在生成器中
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"不支持导出的表: {table}")
+        pk, columns = EXPORT_TABLES[table]
+        batch_size = batch_size or self.BATCH_SIZE
+        sql = f"SELECT {', '.join(columns)} FROM {table} WHERE {pk} > ? ORDER BY {pk} LIMIT ?"
+
+        last_pk = -1
+        while True:
+            conn = self.get_connection()
+            try:
+                rows = conn.execute(sql, (last_pk, batch_size)).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+            yield columns, rows
+            if len(rows) < batch_size:
+                return
+            last_pk = rows[-1][0]
+
+    def iter_csv_chunks(self, table, compress=True, batches=None):
+        """
+        逐批产出 CSV 字节块 (compress=True 时为 gzip 流)
+        拼接全部块即得到完整文件
+        :param batches: 可选，自定义的 (columns, rows) 批次迭代器，默认为 iter_batches(table)
+        """
+        if batches is None:
+            batches = self.iter_batches(table)
+        # wbits=31 生成标准 gzip 格式，可直接用 gzip/zcat 解压
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        header_written = False
+        for columns, rows in batches:
+            text = io.StringIO()
+            writer = csv.writer(text)
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+            data = text.getvalue().encode('utf-8')
+            if compressor:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if not header_written:
+            # 空表也输出表头
+            text = io.StringIO()
+            csv.writer(text).writerow(EXPORT_TABLES[table][1])
+            data = text.getvalue().encode('utf-8')
+            if compressor:
+                data = compressor.compress(data)
+            yield data
+        if compressor:
+            tail = compressor.flush()
+            if tail:
+                yield tail
+
+    def export_to_file(self, table, path, fmt="csv.gz"):
+        """
+        导出整张表到本地文件
+        :param fmt: 'csv' | 'csv.gz' | 'parquet' (需要 pyarrow)
+        :return: (bool, dict/str)
+        """
+        if table not in EXPORT_TABLES:
+            return False, f"不支持导出的表: {table}"
+        if fmt not in self.available_formats():
+            return False, f"不支持的导出格式: {fmt} (可用: {', '.join(self.available_formats())})"
+
+        tmp_path = path + ".part"
+        row_count = 0
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            if fmt == "parquet":
+                columns = EXPORT_TABLES[table][1]
+                schema = pyarrow.schema([
+                    (col, pyarrow.int64() if col in INTEGER_COLUMNS else pyarrow.string()) for col in columns
+                ])
+                writer = pyarrow.parquet.ParquetWriter(tmp_path, schema)
+                try:
+                    for columns, rows in self.iter_batches(table):
+                        # 每批写一个 row group，内存只保留当前批
+                        arrays = {}
+                        for i, col in enumerate(columns):
+                            values = [row[i] for row in rows]
+                            if col not in INTEGER_COLUMNS:
+                                values = [None if v is None else str(v) for v in values]
+                            arrays[col] = values
+                        writer.write_table(pyarrow.table(arrays, schema=schema))
+                        row_count += len(rows)
+                finally:
+                    writer.close()
+            else:
+                def counted_batches():
+                    nonlocal row_count
+                    for columns, rows in self.iter_batches(table):
+                        row_count += len(rows)
+                        yield columns, rows
+
+                with open(tmp_path, 'wb') as f:
+                    for chunk in self.iter_csv_chunks(table, compress=(fmt == "csv.gz"), batches=counted_batches()):
+                        f.write(chunk)
+            os.replace(tmp_path, path)
+            return True, {"path": path, "format": fmt, "rows": row_count, "bytes": os.path.getsize(path)}
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False, f"导出失败: {str(e)}"
+
+    # --- 通过 socket 分块导出 (拉取模式) ---
+    def start_stream(self, table, compress=True):
+        """
+        创建导出会话，客户端随后反复调用 next_chunk 拉取数据块
+        """
+        if table not in EXPORT_TABLES:
+            return False, f"不支持导出的表: {table}"
+        self._expire_sessions()
+        export_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[export_id] = {
+                "chunks": self.iter_csv_chunks(table, compress=compress),
+                "table": table,
+                "seq": 0,
+                "last_access": time.time(),
+                "lock": threading.RLock(),
+            }
+        return True, {
+            "export_id": export_id,
+            "table": table,
+            "format": "csv.gz" if compress else "csv",
+            "columns": EXPORT_TABLES[table][1],
+        }
+
+    def next_chunk(self, export_id):
+        """
+        拉取下一块数据 (base64 编码)；done=True 表示导出结束，会话随即释放
+        """
+        with self._lock:
+            session = self._sessions.get(export_id)
+        if not session:
+            return False, "导出会话不存在或已过期"
+        with session["lock"]:
+            session["last_access"] = time.time()
+            try:
+                chunk = next(session["chunks"], None)
+            except Exception as e:
+                self.close_stream(export_id)
+                return False, f"导出失败: {str(e)}"
+            if chunk is None:
+                self.close_stream(export_id)
+                return True, {"export_id": export_id, "seq": session["seq"], "done": True, "chunk": ""}
+            session["seq"] += 1
+            return True, {
+                "export_id": export_id,
+                "seq": session["seq"],
+                "done": False,
+                "chunk": base64.b64encode(chunk).decode('ascii'),
+            }
+
+    def close_stream(self, export_id):
+        with self._lock:
+            session = self._sessions.pop(export_id, None)
+        if session:
+            with session["lock"]:
+                session["chunks"].close()
+        return True, "导出会话已关闭"
+
+    def _expire_sessions(self):
+        now = time.time()
+        with self._lock:
+            expired = [eid for eid, s in self._sessions.items() if now - s["last_access"] > self.SESSION_TTL]
+        for eid in expired:
+            self.close_stream(eid)
+
+
+if __name__ == "__main__":
+    # 命令行导出: python export_manager.py reservations [输出路径] [csv|csv.gz|parquet]
+    import sys
+    if len(sys.argv) < 2:
+        print(f"用法: python export_manager.py <{'|'.join(EXPORT_TABLES)}> [输出路径] [{'|'.join(ExportManager.available_formats())}]")
+        sys.exit(1)
+    table_name = sys.argv[1]
+    out_fmt = sys.argv[3] if len(sys.argv) > 3 else "csv.gz"
+    out_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(EXPORT_DIR, f"{table_name}.{out_fmt}")
+    ok, result = ExportManager().export_to_file(table_name, out_path, out_fmt)
+    print(result)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,183 @@
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from server.wire_codec import MessageWriter
+except ImportError:
+    from wire_codec import MessageWriter
+
+
+class ClientConnection:
+    """
+    一个客户端 TCP 连接
+    请求响应与推送消息共用同一把发送锁，保证每条消息完整写出、不会交错
+    """
+
+    def __init__(self, sock, connection_id=None):
+        self.sock = sock
+        self.connection_id = connection_id  # 服务器内递增编号 (请求录制用)
+        self.send_lock = threading.Lock()
+        # 通过 hello 协商的编码与压缩 (见 wire_codec)，未协商的连接保持 JSON
+        self.writer = MessageWriter()
+        self.session = None  # login 成功后绑定的会话 (session_manager.Session)
+        try:
+            self.address = sock.getpeername()[0]  # 来源 IP (限流用)
+        except (OSError, IndexError):
+            self.address = None
+
+    def configure(self, encoding="json", table=False, compression=None, stats=None):
+        self.writer = MessageWriter(encoding, table, compression, stats=stats)
+
+    def send(self, message):
+        """发送一条消息，返回实际写出的帧字节数"""
+        # 序列化在锁外进行，大响应不会阻塞同一连接上的其他发送；
+        # 压缩流有状态，分帧/压缩与发送必须在锁内按同一顺序进行
+        writer = self.writer
+        payload = writer.serialize(message)
+        with self.send_lock:
+            frame = writer.frame(payload)
+            self.sock.sendall(frame)
+        return len(frame)
+
+
+class SlotPushHub:
+    """
+    号源实时推送中心
+    客户端通过 subscribe_slots 订阅 (场馆, 日期)，号源发生变化时主动推送增量:
+        {"type": "push", "event": "slot_changes", "data": {venue_id, date, version, full, slots, deleted}}
+
+    合并推送: 写操作只负责 notify() 唤醒，推送线程稍等片刻再统一检查版本号，
+    同一时间窗口内的多次变更合并成一条消息；每个订阅者记录自己已收到的版本，
+    处于同一版本的订阅者共用一次增量查询，发送缓慢的连接不会阻塞其他订阅者，
+    它错过的变更会在下一轮合并补发。
+    """
+
+    COALESCE_WINDOW = 0.2  # 被唤醒后等待更多变更一起推送 (秒)
+    POLL_INTERVAL = 5      # 没有通知时也定期检查，覆盖定时任务等其他写入路径
+    PUSH_WORKERS = 8
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        self._subscriptions = {}  # (venue_id, date) -> {connection: {"version": int, "busy": bool}}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=self.PUSH_WORKERS, thread_name_prefix="push")
+        self.running = False
+
+    def start(self):
+        self.running = True
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def notify(self):
+        """号源可能发生变化 (预约/取消/候补转正等写操作成功后调用)"""
+        self._wake.set()
+
+    def subscribe(self, connection, venue_id, date_str, since_version=None):
+        """
+        订阅某场馆某天的号源变化
+        :param since_version: 客户端缓存的版本号 (重新订阅时)，为空时返回全量
+        :return: (bool, dict/str) 成功时返回号源 (全量或 since_version 之后的增量) 及版本号，此后只推送增量
+        """
+        # 版本号按数据库中的整数场馆 ID 索引，JSON 客户端可能发送字符串 "1"
+        try:
+            venue_id = int(venue_id)
+        except (TypeError, ValueError):
+            return False, "场馆ID必须是整数"
+        success, result = self.db_manager.get_slot_changes(venue_id, date_str, since_version)
+        if not success:
+            return False, result
+        with self._lock:
+            subscribers = self._subscriptions.setdefault((venue_id, date_str), {})
+            subscribers[connection] = {"version": result["version"], "busy": False}
+        return True, result
+
+    def unsubscribe(self, connection, venue_id=None, date_str=None):
+        """取消订阅；不指定场馆/日期时取消该连接的全部订阅 (连接关闭时调用)"""
+        if venue_id is not None:
+            try:
+                venue_id = int(venue_id)
+            except (TypeError, ValueError):
+                return
+        with self._lock:
+            for key in list(self._subscriptions):
+                if venue_id is not None and key != (venue_id, date_str):
+                    continue
+                self._subscriptions[key].pop(connection, None)
+                if not self._subscriptions[key]:
+                    del self._subscriptions[key]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscriptions.values())
+
+    def _run(self):
+        while self.running:
+            self._wake.wait(self.POLL_INTERVAL)
+            if not self.running:
+                break
+            if self._wake.is_set():
+                time.sleep(self.COALESCE_WINDOW)
+                self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Push] 推送检查出错: {e}")
+
+    def flush(self):
+        """检查所有被订阅的 (场馆, 日期)，向版本落后的订阅者推送增量"""
+        with self._lock:
+            if not self._subscriptions:
+                return
+        success, versions = self.db_manager.get_slot_versions()
+        if not success:
+            print(f"[Push] 读取号源版本失败: {versions}")
+            return
+
+        today = datetime.date.today().strftime("%Y-%m-%d")
+        for key in list(self._subscriptions):
+            venue_id, date_str = key
+            if date_str < today:
+                # 日期已过，不会再有变化
+                with self._lock:
+                    self._subscriptions.pop(key, None)
+                continue
+
+            version = versions.get(key, 0)
+            with self._lock:
+                due = []
+                for connection, state in self._subscriptions.get(key, {}).items():
+                    if state["version"] < version and not state["busy"]:
+                        state["busy"] = True
+                        due.append((connection, state))
+            if not due:
+                continue
+
+            deltas = {}  # 同一起始版本的订阅者共用一次查询
+            for connection, state in due:
+                since = state["version"]
+                if since not in deltas:
+                    success, result = self.db_manager.get_slot_changes(venue_id, date_str, since)
+                    deltas[since] = result if success else None
+                delta = deltas[since]
+                if delta is None:
+                    state["busy"] = False
+                    continue
+                message = {"type": "push", "event": "slot_changes", "data": dict(delta, venue_id=venue_id, date=date_str)}
+                self._pool.submit(self._push, connection, state, message)
+
+    def _push(self, connection, state, message):
+        try:
+            connection.send(message)
+            state["version"] = message["data"]["version"]
+        except OSError:
+            # 连接已断开，移除其全部订阅
+            self.unsubscribe(connection)
+        finally:
+            state["busy"] = False
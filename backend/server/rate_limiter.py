@@ -0,0 +1,233 @@
+import os
+import time
+import threading
+from collections import Counter
+
+# 默认限额: 范围 (按账号 / 按来源 IP) -> 动作类别 -> 每秒补充的令牌数 rate 与桶容量 burst
+# 同一 IP 后面可能有多个用户 (校园网 NAT)，IP 限额比账号宽松
+DEFAULT_LIMITS = {
+    "account": {
+        "read": {"rate": 10, "burst": 30},
+        "write": {"rate": 1, "burst": 5},
+        "admin": {"rate": 20, "burst": 60},
+    },
+    "ip": {
+        "read": {"rate": 50, "burst": 150},
+        "write": {"rate": 10, "burst": 30},
+        "admin": {"rate": 50, "burst": 150},
+    },
+}
+ACTION_CLASSES = ("read", "write", "admin")
+# 登录失败限额: 按 (账号, 来源 IP) 计数，与账号的 write 桶互不影响；
+# 他人冒用账号名反复登录失败只会锁住其自己的来源，不影响账号本人
+DEFAULT_LOGIN_LIMIT = {"rate": 1 / 60, "burst": 5}
+# 不受 IP 限额约束的来源 (本机运行的压测/重放工具)，账号限额仍然生效
+DEFAULT_EXEMPT_ADDRESSES = ("127.0.0.1", "::1")
+
+
+class RateLimiter:
+    """
+    令牌桶限流 (按账号与来源 IP 分别计数，每类动作各自一个桶)
+
+    每个桶以 rate 个/秒的速度补充令牌，最多积累 burst 个；一个请求消耗一个令牌
+    (批量请求按各类子请求的数量一次性扣除)。账号桶与 IP 桶都有足够令牌时才放行，
+    否则拒绝并给出需要等待的秒数，不做任何数据库操作。
+    登录失败另有按 (账号, 来源 IP) 计数的桶: 登录前检查，失败后才扣除。
+    长时间未使用的桶已恢复为满，定期删除，用到时再重新创建。
+    """
+
+    SWEEP_INTERVAL = 60   # 清理空闲桶的最小间隔 (秒)
+    TOP_THROTTLED = 10    # 指标中列出的被限流最多的账号/IP 数
+
+    def __init__(self, enabled=None, limits=None, exempt_addresses=DEFAULT_EXEMPT_ADDRESSES,
+                 login_limit=DEFAULT_LOGIN_LIMIT):
+        # 环境变量 RATE_LIMIT=0 时启动即关闭限流
+        self.enabled = os.environ.get("RATE_LIMIT") != "0" if enabled is None else enabled
+        self.limits = {scope: {cls: dict(limit) for cls, limit in classes.items()}
+                       for scope, classes in (limits or DEFAULT_LIMITS).items()}
+        self.exempt_addresses = set(exempt_addresses)
+        self.login_limit = dict(login_limit)
+        self._buckets = {}  # (范围, 键, 类别) -> [令牌数, 上次更新时间]
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.reset_metrics()
+
+    # ---------------- 配置 ---------------- #
+    def configure(self, enabled=None, limits=None, exempt_addresses=None, login_limit=None, reset_metrics=False):
+        """
+        修改配置，未提供的项保持不变
+        :param limits: 部分覆盖，如 {"account": {"write": {"rate": 0.5, "burst": 3}}}
+        :param login_limit: 登录失败限额的部分覆盖，如 {"burst": 10}
+        :return: (bool, dict/str) 当前配置
+        """
+        try:
+            if limits is not None:
+                merged = {scope: {cls: dict(limit) for cls, limit in classes.items()}
+                          for scope, classes in self.limits.items()}
+                for scope, classes in limits.items():
+                    for cls, limit in classes.items():
+                        if scope not in merged or cls not in ACTION_CLASSES:
+                            return False, f"未知的限流项: {scope}.{cls}"
+                        error = self._merge_limit(merged[scope][cls], limit, f"{scope}.{cls}")
+                        if error:
+                            return False, error
+            if login_limit is not None:
+                merged_login = dict(self.login_limit)
+                error = self._merge_limit(merged_login, login_limit, "login")
+                if error:
+                    return False, error
+        except (AttributeError, TypeError, ValueError):
+            return False, "限额格式错误"
+
+        with self._lock:
+            if enabled is not None:
+                self.enabled = bool(enabled)
+            if limits is not None:
+                self.limits = merged
+            if login_limit is not None:
+                self.login_limit = merged_login
+            if limits is not None or login_limit is not None:
+                self._buckets = {}  # 限额变化后按新容量重新计数
+            if exempt_addresses is not None:
+                self.exempt_addresses = set(exempt_addresses)
+        if reset_metrics:
+            self.reset_metrics()
+        return True, self.status()
+
+    @staticmethod
+    def _merge_limit(target, limit, name):
+        if not isinstance(limit, dict):
+            raise TypeError(name)
+        for field in ("rate", "burst"):
+            if field in limit:
+                value = float(limit[field])
+                if value <= 0:
+                    return f"{name}.{field} 必须大于 0"
+                target[field] = value
+        return None
+
+    def status(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "limits": self.limits,
+                "login_limit": self.login_limit,
+                "exempt_addresses": sorted(self.exempt_addresses),
+                "buckets": len(self._buckets),
+            }
+
+    # ---------------- 限流 ---------------- #
+    def check(self, account, address, costs):
+        """
+        :param account: 会话账号 (未登录时为 None，只按 IP 限流；不能使用请求中自称的账号，
+                        否则他人可以冒用账号名耗尽其令牌)
+        :param address: 来源 IP (批量子请求等场景下为 None)
+        :param costs: {动作类别: 消耗的令牌数}
+        :return: (是否放行, 需要等待的秒数)
+        """
+        if not self.enabled:
+            return True, 0
+        keys = []
+        if account:
+            keys.append(("account", account))
+        if address and address not in self.exempt_addresses:
+            keys.append(("ip", address))
+        if not keys:
+            return True, 0
+
+        now = time.monotonic()
+        with self._lock:
+            # 先检查全部相关的桶，都够时才一起扣除，被拒绝的请求不消耗令牌
+            buckets = []
+            retry_after = 0
+            for scope, key in keys:
+                for cls, cost in costs.items():
+                    bucket, rate, burst = self._bucket_locked(scope, key, cls, now)
+                    cost = min(cost, burst)  # 超过容量的批量请求按满桶计算，否则永远无法通过
+                    if bucket[0] < cost:
+                        retry_after = max(retry_after, (cost - bucket[0]) / rate)
+                    buckets.append((bucket, cost))
+
+            allowed = retry_after == 0
+            if allowed:
+                for bucket, cost in buckets:
+                    bucket[0] -= cost
+            for cls, cost in costs.items():
+                self._counts[cls]["throttled" if not allowed else "allowed"] += cost
+            if not allowed:
+                for scope, key in keys:
+                    self._throttled_keys[f"{scope}:{key}"] += 1
+            self._sweep_locked(now)
+        return allowed, round(retry_after, 3)
+
+    def check_login(self, account, address):
+        """
+        登录前检查该账号在该来源上的失败次数是否超限 (只检查，不扣除令牌)
+        :return: (是否放行, 需要等待的秒数)
+        """
+        if not self.enabled or not account:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            bucket, rate, _ = self._bucket_locked("login", (account, address), "fail", now)
+            if bucket[0] >= 1:
+                return True, 0
+            self._login_counts["throttled"] += 1
+            self._throttled_keys[f"login:{account}@{address}"] += 1
+            return False, round((1 - bucket[0]) / rate, 3)
+
+    def record_login_failure(self, account, address):
+        """登录失败 (账号或密码错误) 后扣除该 (账号, 来源) 的一个令牌"""
+        if not self.enabled or not account:
+            return
+        now = time.monotonic()
+        with self._lock:
+            bucket, _, _ = self._bucket_locked("login", (account, address), "fail", now)
+            bucket[0] = max(0, bucket[0] - 1)
+            self._login_counts["failed"] += 1
+            self._sweep_locked(now)
+
+    def _limit(self, scope, cls):
+        return self.login_limit if scope == "login" else self.limits[scope][cls]
+
+    def _bucket_locked(self, scope, key, cls, now):
+        """取出 (必要时创建) 桶并按经过的时间补充令牌，返回 (桶, rate, burst)"""
+        limit = self._limit(scope, cls)
+        rate, burst = limit["rate"], limit["burst"]
+        bucket = self._buckets.get((scope, key, cls))
+        if bucket is None:
+            bucket = self._buckets[(scope, key, cls)] = [burst, now]
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket, rate, burst
+
+    def _sweep_locked(self, now):
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        idle = []
+        for (scope, key, cls), (tokens, updated) in self._buckets.items():
+            limit = self._limit(scope, cls)
+            if tokens + (now - updated) * limit["rate"] >= limit["burst"]:
+                idle.append((scope, key, cls))
+        for bucket_key in idle:
+            del self._buckets[bucket_key]
+
+    # ---------------- 指标 ---------------- #
+    def reset_metrics(self):
+        with self._lock:
+            self._counts = {cls: Counter() for cls in ACTION_CLASSES}
+            self._login_counts = Counter()
+            self._throttled_keys = Counter()
+            self._since = time.time()
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "since": self._since,
+                "classes": {cls: {"allowed": c["allowed"], "throttled": c["throttled"]}
+                            for cls, c in self._counts.items()},
+                "login": {"failed": self._login_counts["failed"], "throttled": self._login_counts["throttled"]},
+                "top_throttled": self._throttled_keys.most_common(self.TOP_THROTTLED),
+            }
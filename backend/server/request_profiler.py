@@ -0,0 +1,220 @@
+import os
+import io
+import sys
+import json
+import time
+import random
+import pstats
+import cProfile
+import datetime
+import threading
+from collections import Counter, deque
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# 记录请求参数时隐去的字段 (密码与会话 token 不写入剖析记录)
+SENSITIVE_KEYS = frozenset({"password", "new_password", "old_password", "token", "session"})
+REDACTED = "***"
+
+
+def redact(value):
+    """返回把敏感字段替换为 REDACTED 后的副本 (递归处理批量请求的子请求)，不修改原请求"""
+    if isinstance(value, dict):
+        return {key: REDACTED if key in SENSITIVE_KEYS and item else redact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [redact(item) for item in value]
+    return value
+
+
+class RequestProfiler:
+    """
+    请求级性能剖析 (默认关闭，可通过管理员动作在运行时开关)
+
+    开启后:
+      - 后台线程每隔 SAMPLE_INTERVAL 秒抓取正在处理请求的线程调用栈，
+        按请求累计为折叠栈 ("根;...;叶 次数"，可直接交给 flamegraph.pl / speedscope)；
+      - 按 sample_rate 抽样的请求额外用 cProfile 完整剖析 (同一时刻只剖析一个请求)；
+      - 耗时超过 slow_ms 的请求总会被记录，连同动作、参数与调用栈；
+    记录保存在内存 (最近 MAX_CAPTURES 条) 并写入 backend/profiles/ 目录。
+    """
+
+    SAMPLE_INTERVAL = 0.005  # 调用栈采样间隔 (秒)
+    MAX_CAPTURES = 50
+    MAX_STACK_DEPTH = 64
+    MAX_PARAM_CHARS = 2000   # 记录的请求参数最多保留的字符数
+    TOP_FUNCTIONS = 30       # cProfile 报告保留的函数数
+
+    def __init__(self, output_dir=PROFILE_DIR):
+        self.output_dir = output_dir
+        self.enabled = False
+        self.sample_rate = 0.01
+        self.slow_ms = 500
+        self.captures = deque(maxlen=self.MAX_CAPTURES)
+        self.total_stacks = Counter()  # 开启以来所有请求的折叠栈，用于整体火焰图
+        self._active = {}              # 线程 ID -> 该请求的折叠栈计数
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._sampler = None
+        self._next_id = 0
+
+    # ---------------- 配置 ---------------- #
+    def configure(self, enabled=None, sample_rate=None, slow_ms=None):
+        """
+        修改配置，未提供的项保持不变
+        :return: (bool, dict/str) 当前配置
+        """
+        try:
+            if sample_rate is not None:
+                sample_rate = float(sample_rate)
+                if not 0 <= sample_rate <= 1:
+                    return False, "采样比例必须在 0 到 1 之间"
+            if slow_ms is not None:
+                slow_ms = float(slow_ms)
+                if slow_ms < 0:
+                    return False, "慢请求阈值不能为负数"
+        except (TypeError, ValueError):
+            return False, "参数格式错误"
+
+        with self._lock:
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            if slow_ms is not None:
+                self.slow_ms = slow_ms
+            if enabled is not None:
+                self.enabled = bool(enabled)
+                if self.enabled and (self._sampler is None or not self._sampler.is_alive()):
+                    self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+                    self._sampler.start()
+        return True, self.status()
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "captures": len(self.captures),
+            "output_dir": self.output_dir,
+        }
+
+    # ---------------- 剖析入口 ---------------- #
+    def run(self, request, func):
+        """执行 func() 处理请求；开启时记录调用栈，慢请求或被抽中的请求保存剖析结果"""
+        if not self.enabled:
+            return func()
+
+        thread_id = threading.get_ident()
+        stacks = Counter()
+        profiler = None
+        if random.random() < self.sample_rate and self._cprofile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+
+        with self._lock:
+            self._active[thread_id] = stacks
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            return func()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_lock.release()
+            duration_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._active.pop(thread_id, None)
+                self.total_stacks.update(stacks)
+            if duration_ms >= self.slow_ms or profiler is not None:
+                try:
+                    self._capture(request, duration_ms, stacks, profiler)
+                except Exception as e:
+                    print(f"[Profiler] 保存剖析结果失败: {e}")
+
+    def _sample_loop(self):
+        run_code = self.run.__code__
+        while self.enabled:
+            time.sleep(self.SAMPLE_INTERVAL)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in active:
+                frame = frames.get(thread_id)
+                names = []
+                # 从当前帧向上回溯到 run()，只保留请求处理本身的调用栈
+                while frame is not None and frame.f_code is not run_code and len(names) < self.MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if names:
+                    stacks[";".join(reversed(names))] += 1
+
+    # ---------------- 结果 ---------------- #
+    def _capture(self, request, duration_ms, stacks, profiler):
+        with self._lock:
+            self._next_id += 1
+            capture_id = self._next_id
+        action = request.get('action') if isinstance(request, dict) else None
+        params = json.dumps(redact(request.get('data') if isinstance(request, dict) else request),
+                            ensure_ascii=False, default=str)
+        capture = {
+            "id": capture_id,
+            "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "action": action,
+            "params": params[:self.MAX_PARAM_CHARS],
+            "duration_ms": round(duration_ms, 2),
+            "slow": duration_ms >= self.slow_ms,
+            "sampled": profiler is not None,
+            "folded": "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()),
+            "cprofile": None,
+        }
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base_name = f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{capture_id}_{action}"
+        if profiler is not None:
+            text = io.StringIO()
+            stats = pstats.Stats(profiler, stream=text)
+            stats.sort_stats("cumulative").print_stats(self.TOP_FUNCTIONS)
+            capture["cprofile"] = text.getvalue()
+            # .prof 可用 snakeviz / flameprof 等工具查看
+            stats.dump_stats(os.path.join(self.output_dir, base_name + ".prof"))
+        if capture["folded"]:
+            with open(os.path.join(self.output_dir, base_name + ".folded"), "w", encoding="utf-8") as f:
+                f.write(capture["folded"] + "\n")
+        with open(os.path.join(self.output_dir, base_name + ".json"), "w", encoding="utf-8") as f:
+            json.dump(capture, f, ensure_ascii=False, indent=2)
+
+        self.captures.append(capture)
+        print(f"[Profiler] 记录请求 {action}: {capture['duration_ms']} ms"
+              f"{' (慢请求)' if capture['slow'] else ''}{' (cProfile)' if capture['sampled'] else ''}")
+
+    def get_captures(self, capture_id=None):
+        """
+        :param capture_id: 为空时返回最近记录的摘要列表 (新的在前)，否则返回该条完整记录
+        :return: (bool, list/dict/str)
+        """
+        captures = list(self.captures)
+        if capture_id is None:
+            summary_keys = ("id", "time", "action", "duration_ms", "slow", "sampled")
+            return True, [{key: c[key] for key in summary_keys} for c in reversed(captures)]
+        for capture in captures:
+            if capture["id"] == capture_id:
+                return True, capture
+        return False, "剖析记录不存在或已被淘汰"
+
+    def dump_flamegraph(self, path=None):
+        """
+        把开启以来累计的折叠栈写入文件 (flamegraph.pl / speedscope 可直接读取)
+        :return: (bool, str) 文件路径
+        """
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.total_stacks.most_common()]
+        if not lines:
+            return False, "尚无采样数据"
+        if path is None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"all_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return True, path
@@ -0,0 +1,185 @@
+import os
+import gzip
+import hmac
+import json
+import queue
+import struct
+import hashlib
+import secrets
+import sqlite3
+import datetime
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RECORD_DIR = os.path.join(BASE_DIR, 'recordings')
+
+# 日志格式: 文件头 MAGIC，之后每条记录为 定长头 (时间戳 double, 连接 ID uint32, 类型 uint8, 长度 uint32) + JSON 正文
+# 整个文件以 gzip 压缩
+MAGIC = b"SVREC1\n"
+RECORD_HEADER = struct.Struct("<dIBI")
+EVENT_CONNECT, EVENT_REQUEST, EVENT_RESPONSE, EVENT_DISCONNECT = range(4)
+# 录制时隐去的字段: 密码替换为 REDACTED (重放工具按快照中的密码补回)；
+# 会话 token 替换为本次录制内固定的假名 "rec_..."，同一 token 总是得到同一假名，
+# 重放时仍可把请求携带的 token 对应到录制的登录响应
+PASSWORD_KEYS = frozenset({"password", "new_password", "old_password"})
+TOKEN_KEYS = frozenset({"token", "session"})
+REDACTED = "***"
+TOKEN_PREFIX = "rec_"
+
+EVENT_NAMES = {
+    EVENT_CONNECT: "connect",
+    EVENT_REQUEST: "request",
+    EVENT_RESPONSE: "response",
+    EVENT_DISCONNECT: "disconnect",
+}
+
+
+def read_log(path):
+    """
+    逐条读取录制日志
+    :return: 生成器 (时间戳, 连接 ID, 事件名, 正文 dict/None)
+    """
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} 不是请求录制日志")
+        while True:
+            try:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return  # 文件结尾 (或录制被中断时不完整的最后一条)
+                timestamp, connection_id, kind, length = RECORD_HEADER.unpack(header)
+                body = f.read(length)
+            except EOFError:
+                return  # 服务器未正常停止录制，gzip 缺少结尾，已落盘的记录仍可读取
+            if len(body) < length:
+                return
+            yield timestamp, connection_id, EVENT_NAMES.get(kind, "unknown"), json.loads(body) if length else None
+
+
+class RequestRecorder:
+    """
+    请求录制 (默认关闭，环境变量 RECORD_REQUESTS=1 或管理员动作 admin_set_recorder 开启)
+
+    开始录制时先用 SQLite backup 保存一份数据库快照，之后每个连接的建立/断开、
+    收到的请求与发出的响应都带时间戳和连接 ID 追加到日志。写文件在后台线程进行，
+    请求处理线程只负责入队。replay_requests.py 可在快照上重放日志并比较响应。
+    """
+
+    FLUSH_INTERVAL = 1.0  # 最多每秒落盘一次
+
+    def __init__(self, db_path, output_dir=RECORD_DIR):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.enabled = False
+        self.path = None
+        self.snapshot_path = None
+        self.records = 0
+        self._queue = None
+        self._writer = None
+        self._token_key = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        开始新的录制 (快照 + 日志文件)
+        :return: (bool, dict/str)
+        """
+        with self._lock:
+            if self.enabled:
+                return True, self.status()
+            os.makedirs(self.output_dir, exist_ok=True)
+            base = os.path.join(self.output_dir, f"requests_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+            try:
+                source = sqlite3.connect(self.db_path)
+                target = sqlite3.connect(base + ".db")
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+            except sqlite3.Error as e:
+                return False, f"保存数据库快照失败: {str(e)}"
+
+            self.path = base + ".log.gz"
+            self.snapshot_path = base + ".db"
+            self.records = 0
+            self._token_key = secrets.token_bytes(16)  # 每次录制不同，假名无法在录制之间对应
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, args=(self.path, self._queue), daemon=True)
+            self._writer.start()
+            self.enabled = True
+        print(f"[Recorder] 开始录制请求: {self.path}")
+        return True, self.status()
+
+    def stop(self):
+        with self._lock:
+            if self.enabled:
+                self.enabled = False
+                self._queue.put(None)
+                self._writer.join()
+                print(f"[Recorder] 录制结束: {self.records} 条记录")
+        return True, self.status()
+
+    def status(self):
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "snapshot": self.snapshot_path,
+            "records": self.records,
+        }
+
+    def _scrub(self, value):
+        """返回隐去密码、token 换成假名后的副本 (递归处理批量请求的子请求)"""
+        if isinstance(value, dict):
+            result = {}
+            for key, item in value.items():
+                if key in PASSWORD_KEYS and item:
+                    result[key] = REDACTED
+                elif key in TOKEN_KEYS and isinstance(item, str) and item:
+                    digest = hmac.new(self._token_key, item.encode("utf-8"), hashlib.sha256).hexdigest()
+                    result[key] = TOKEN_PREFIX + digest[:32]
+                else:
+                    result[key] = self._scrub(item)
+            return result
+        if isinstance(value, list):
+            return [self._scrub(item) for item in value]
+        return value
+
+    def _record(self, connection_id, kind, body):
+        if not self.enabled:
+            return
+        body = self._scrub(body)
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        header = RECORD_HEADER.pack(datetime.datetime.now().timestamp(), connection_id or 0, kind, len(payload))
+        self._queue.put(header + payload)
+
+    def record_connect(self, connection_id):
+        self._record(connection_id, EVENT_CONNECT, None)
+
+    def record_disconnect(self, connection_id):
+        self._record(connection_id, EVENT_DISCONNECT, None)
+
+    def record_request(self, connection_id, request):
+        self._record(connection_id, EVENT_REQUEST, request)
+
+    def record_response(self, connection_id, response):
+        self._record(connection_id, EVENT_RESPONSE, response)
+
+    def _write_loop(self, path, records):
+        with gzip.open(path, "wb") as f:
+            f.write(MAGIC)
+            last_flush = datetime.datetime.now()
+            while True:
+                try:
+                    record = records.get(timeout=self.FLUSH_INTERVAL)
+                except queue.Empty:
+                    record = False
+                if record is None:
+                    break
+                if record:
+                    f.write(record)
+                    self.records += 1
+                now = datetime.datetime.now()
+                if (now - last_flush).total_seconds() >= self.FLUSH_INTERVAL:
+                    f.flush()
+                    last_flush = now
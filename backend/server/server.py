@@ -1,8 +1,12 @@
 import socket
 import threading
 import json
+import codecs
+import itertools
+from collections import Counter
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # 将项目根目录添加到 sys.path，以便导入 server.db_manager
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,66 +17,323 @@ if project_root not in sys.path:
 try:
     from server.db_manager import DBManager
     from server.statistics_manager import StatisticsManager
+    from server.export_manager import ExportManager
+    from server.push_hub import ClientConnection, SlotPushHub
+    from server.weather_manager import WeatherManager
+    from server.request_profiler import RequestProfiler, redact
+    from server.sql_tracer import sql_tracer
+    from server.request_recorder import RequestRecorder
+    from server.session_manager import SessionManager
+    from server.rate_limiter import RateLimiter
+    from server.wire_codec import CODEC_BACKEND, COMPRESS_THRESHOLD, FrameReader, WireStats, choose_compression, choose_encoding
 except ImportError:
     # Fallback for direct execution
     sys.path.append(current_dir)
     from db_manager import DBManager
     from statistics_manager import StatisticsManager
+    from export_manager import ExportManager
+    from push_hub import ClientConnection, SlotPushHub
+    from weather_manager import WeatherManager
+    from request_profiler import RequestProfiler, redact
+    from sql_tracer import sql_tracer
+    from request_recorder import RequestRecorder
+    from session_manager import SessionManager
+    from rate_limiter import RateLimiter
+    from wire_codec import CODEC_BACKEND, COMPRESS_THRESHOLD, FrameReader, WireStats, choose_compression, choose_encoding
+
+# 流水线请求: 带 request_id 的请求交给线程池并发处理，响应按完成顺序返回
+REQUEST_WORKERS = 16
+MAX_INFLIGHT_PER_CONNECTION = 32  # 单个连接未完成的流水线请求上限 (超过时暂停读取)
+MAX_REQUEST_BYTES = 1024 * 1024   # 单个未完整请求的缓冲上限
+
+# 控制台日志默认只输出动作/状态/字节数；LOG_PAYLOADS=1 时额外输出完整请求/响应 (已脱敏，仅供调试)
+LOG_PAYLOADS = os.environ.get("LOG_PAYLOADS") == "1"
+
+# 批量请求: 单次最多携带的子请求数，以及可在共享只读快照中执行的动作
+BATCH_MAX_REQUESTS = 50
+READ_ONLY_ACTIONS = {
+    'get_available_slots', 'get_slot_changes', 'get_my_reservations', 'get_my_schedules',
+    'admin_get_venues', 'admin_get_courts', 'admin_get_users', 'admin_get_all_reservations',
+    'get_announcements', 'search_announcements', 'get_weather',
+    'get_venue_stats', 'get_heatmap_data', 'get_user_stats', 'get_batch_user_stats', 'get_user_leaderboard',
+}
+
+# 成功后可能改变号源余量的动作 (含取消后的候补转正)，执行后唤醒推送中心
+SLOT_WRITE_ACTIONS = {
+    'book_venue', 'cancel_booking', 'admin_cancel_reservation', 'add_schedule', 'remove_schedule',
+    'delete_my_account', 'admin_delete_user', 'admin_delete_court',
+}
+
+# 以调用者身份执行的动作及其账号字段: 必须先登录，请求可省略该字段 (由会话补全)，
+# 与会话账号不一致时拒绝 (管理员除外)
+ACTOR_FIELDS = {
+    'book_venue': 'user_account', 'get_my_reservations': 'user_account', 'cancel_booking': 'user_account',
+    'check_in': 'user_account', 'get_user_stats': 'user_account',
+    'add_schedule': 'teacher_account', 'remove_schedule': 'teacher_account', 'get_my_schedules': 'teacher_account',
+    'delete_my_account': 'account', 'add_post': 'account',
+}
+# 不需要登录的动作 (REQUIRE_SESSION=1 时其余动作必须先登录；批量请求的子请求逐个检查)
+PUBLIC_ACTIONS = {
+    'hello', 'login', 'register', 'resume_session', 'logout', 'batch',
+    'get_available_slots', 'get_slot_changes', 'subscribe_slots', 'unsubscribe_slots',
+    'get_announcements', 'search_announcements', 'get_weather',
+}
+# 仅管理员可用的动作 (除 admin_ 开头的动作外)，无论是否 REQUIRE_SESSION 都必须以管理员会话调用
+ADMIN_ACTIONS = {'get_venue_stats', 'get_heatmap_data', 'get_batch_user_stats', 'get_user_leaderboard'}
+# 虽以 admin_ 开头，但教师端等也用来列出场馆/场地，登录用户均可调用
+SHARED_ADMIN_READS = {'admin_get_venues', 'admin_get_courts'}
+
+# 限流类别: 管理员动作为 admin，查询类 (含登录用户共用的场馆/场地列表) 为 read，
+# 其余 (预约、登录、注册等) 为 write
+RATE_READ_ACTIONS = READ_ONLY_ACTIONS | SHARED_ADMIN_READS | {'subscribe_slots', 'unsubscribe_slots', 'resume_session'}
+RATE_EXEMPT_ACTIONS = {'logout'}
+
+JSON_DECODER = json.JSONDecoder()
+JSON_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
 
 class SportsVenueServer:
-    def __init__(self, host='0.0.0.0', port=8888):
+    def __init__(self, host='0.0.0.0', port=8888, db_path=None):
         self.host = host
         self.port = port
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.db_manager = DBManager()
-        self.stats_manager = StatisticsManager()
+        # db_path 为空时使用默认数据库 (压测时可指向 data_generator.py 生成的库)
+        db_args = (db_path,) if db_path else ()
+        self.db_manager = DBManager(*db_args)
+        self.stats_manager = StatisticsManager(*db_args)
+        self.export_manager = ExportManager(*db_args)
+        self.request_pool = ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix="request")
+        self.push_hub = SlotPushHub(self.db_manager)
+        self.weather_manager = WeatherManager(*db_args)
+        self.profiler = RequestProfiler()
+        self.recorder = RequestRecorder(self.db_manager.db_path)
+        self._connection_ids = itertools.count(1)
+        self.wire_stats = WireStats()  # 所有协商过的连接发送方向的流量统计 (压缩节省的字节数)
+        self.sessions = SessionManager()
+        self.rate_limiter = RateLimiter()
         self.running = True
 
+    @staticmethod
+    def split_requests(buffer):
+        """
+        从接收缓冲区中切分出完整的 JSON 请求 (客户端可以连续发送多个请求)
+        :return: (请求列表, 尚未接收完整的剩余数据, 格式错误时的错误响应或 None)
+        """
+        requests = []
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                return requests, "", None
+            try:
+                request, end = JSON_DECODER.raw_decode(buffer)
+            except json.JSONDecodeError as e:
+                # 数据在结尾处中断 (字符串/字面量未写完) 说明请求尚未收完，继续等待
+                tail = buffer[e.pos:]
+                incomplete = (
+                    e.pos >= len(buffer)
+                    or e.msg.startswith("Unterminated string")
+                    or any(literal.startswith(tail) for literal in JSON_LITERALS)
+                )
+                if incomplete and len(buffer) <= MAX_REQUEST_BYTES:
+                    return requests, buffer, None
+                return requests, "", {"status": "error", "message": "无效的 JSON 格式"}
+            requests.append(request)
+            buffer = buffer[end:]
+
+    def safe_process(self, request, connection=None, session=None, throttle=True):
+        """
+        :param session: 调用者会话 (批量子请求沿用外层请求的会话)；为空时按请求的 token 或连接查找
+        :param throttle: 是否限流 (批量请求在外层按子请求数量统一扣除，子请求不再重复计数)
+        """
+        try:
+            if not isinstance(request, dict):
+                return {"status": "error", "message": "无效的请求格式"}
+            if session is None:
+                session = self.sessions.resolve(request.get('token'), connection)
+            denied = self.authorize(request, session) or (throttle and self.throttle(request, session, connection))
+            if denied:
+                return denied
+            # 剖析关闭时 profiler.run 直接调用处理函数
+            response = self.profiler.run(request, lambda: self.process_request(request, connection, session))
+            if request.get('action') in SLOT_WRITE_ACTIONS and response.get('status') == 'success':
+                self.push_hub.notify()
+            return response
+        except Exception as e:
+            return {"status": "error", "message": f"服务器内部错误: {str(e)}"}
+
+    def authorize(self, request, session):
+        """
+        根据会话检查权限，并用会话账号补全动作的账号字段 (见 ACTOR_FIELDS)
+        管理员动作与以调用者身份执行的动作始终需要会话；其余动作在兼容模式下无需登录
+        :return: 拒绝时的响应，允许时为 None
+        """
+        action = request.get('action')
+        admin_only = (str(action).startswith('admin_') and action not in SHARED_ADMIN_READS) or action in ADMIN_ACTIONS
+        if session is None:
+            if admin_only or action in ACTOR_FIELDS or (self.sessions.required and action not in PUBLIC_ACTIONS):
+                return {"status": "fail", "message": "请先登录"}
+            return None
+        if admin_only and not session.is_admin:
+            return {"status": "fail", "message": "需要管理员权限"}
+        field = ACTOR_FIELDS.get(action)
+        if field:
+            if not isinstance(request.get('data'), dict):
+                request['data'] = {}
+            account = request['data'].get(field)
+            if not account:
+                request['data'][field] = session.account
+            elif account != session.account and not session.is_admin:
+                return {"status": "fail", "message": "无权以其他用户身份操作"}
+        return None
+
+    @staticmethod
+    def action_class(action):
+        if (str(action).startswith('admin_') and action not in SHARED_ADMIN_READS) or action in ADMIN_ACTIONS:
+            return 'admin'
+        if action in RATE_READ_ACTIONS:
+            return 'read'
+        return 'write'
+
+    def throttle(self, request, session, connection):
+        """
+        限流检查 (在任何数据库操作之前): 按会话账号与来源 IP 扣除对应类别的令牌
+        未登录时只按来源 IP 限流 (请求中自称的账号未经验证，不能用来扣除该账号的令牌)；
+        登录失败次数在 handle_login 中另行限制
+        :return: 超限时的拒绝响应，否则为 None
+        """
+        action = request.get('action')
+        data = request.get('data') if isinstance(request.get('data'), dict) else {}
+        if action == 'batch':
+            requests = data.get('requests') if isinstance(data.get('requests'), list) else []
+            costs = Counter(self.action_class(r.get('action')) for r in requests if isinstance(r, dict))
+        elif action in RATE_EXEMPT_ACTIONS:
+            return None
+        else:
+            costs = {self.action_class(action): 1}
+        if not costs:
+            return None
+
+        allowed, retry_after = self.rate_limiter.check(
+            session.account if session is not None else None,
+            connection.address if connection is not None else None,
+            costs,
+        )
+        if allowed:
+            return None
+        return {"status": "fail", "message": f"请求过于频繁，请 {retry_after:.1f} 秒后重试", "retry_after": retry_after}
+
+    def send_response(self, connection, response):
+        # 同一连接上多个工作线程/推送可能同时发送，由连接的发送锁保证整条消息不交错
+        size = connection.send(response)
+        # 摘要日志复用发送时的字节数，不再为打印额外序列化一次
+        print(f"[<] 发送响应: status={response.get('status')} request_id={response.get('request_id')} bytes={size}")
+        if LOG_PAYLOADS:
+            # ensure_ascii=False 允许直接输出中文，而不是 Unicode 编码；会话 token 等敏感字段不输出
+            print(f"[<] 响应内容: {json.dumps(redact(response), ensure_ascii=False)}")
+        self.recorder.record_response(connection.connection_id, response)
+
+    def process_pipelined(self, connection, inflight, request):
+        """在线程池中处理带 request_id 的请求，响应原样带回 request_id 供客户端匹配"""
+        try:
+            response = dict(self.safe_process(request, connection))
+            response["request_id"] = request["request_id"]
+            self.send_response(connection, response)
+        except OSError:
+            # 客户端已断开，丢弃响应
+            pass
+        finally:
+            inflight.release()
+
     def handle_client(self, client_socket):
+        connection = ClientConnection(client_socket, next(self._connection_ids))
+        self.recorder.record_connect(connection.connection_id)
+        inflight = threading.BoundedSemaphore(MAX_INFLIGHT_PER_CONNECTION)
+        # 增量解码: 多字节字符可能被拆在两次 recv 之间
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ""
+        frames = None  # 协商为二进制编码或压缩后按长度前缀帧读取
         try:
             while True:
-                # 接收数据 (最大 4096 字节)
-                request_data = client_socket.recv(4096).decode('utf-8')
-                if not request_data:
+                chunk = client_socket.recv(4096)
+                if not chunk:
                     break
-                
-                print(f"[>] 收到请求: {request_data}")
-                
-                try:
-                    request = json.loads(request_data)
-                    response = self.process_request(request)
-                except json.JSONDecodeError:
-                    response = {"status": "error", "message": "无效的 JSON 格式"}
-                except Exception as e:
-                    response = {"status": "error", "message": f"服务器内部错误: {str(e)}"}
-                
-                # 发送响应
-                # ensure_ascii=False 允许直接输出中文，而不是 Unicode 编码
-                response_data = json.dumps(response, ensure_ascii=False)
-                print(f"[<] 发送响应: {response_data}")
-                client_socket.send(response_data.encode('utf-8'))
-                
+                if frames is not None:
+                    try:
+                        requests, error = frames.feed(chunk), None
+                    except ValueError as e:
+                        # 帧损坏后无法重新同步，回复错误并断开
+                        self.send_response(connection, {"status": "error", "message": f"无效的请求数据: {e}"})
+                        break
+                else:
+                    buffer += decoder.decode(chunk)
+                    requests, buffer, error = self.split_requests(buffer)
+
+                for request in requests:
+                    if isinstance(request, dict):
+                        print(f"[>] 收到请求: action={request.get('action')} request_id={request.get('request_id')}")
+                    if LOG_PAYLOADS:
+                        print(f"[>] 请求内容: {json.dumps(redact(request), ensure_ascii=False)}")
+                    self.recorder.record_request(connection.connection_id, request)
+                    if isinstance(request, dict) and request.get('action') == 'hello':
+                        # 编码协商在读取线程中同步处理: 先按旧编码回复，再切换，之后的数据按新格式解析
+                        # (客户端需在收到 hello 响应后再发送其他请求)
+                        response = self.handle_hello(request.get('data'))
+                        if request.get('request_id') is not None:
+                            response["request_id"] = request["request_id"]
+                        self.send_response(connection, response)
+                        negotiated = response["data"]
+                        connection.configure(negotiated["encoding"], negotiated["table"],
+                                             negotiated["compression"], self.wire_stats)
+                        frames = (FrameReader(negotiated["encoding"], negotiated["compression"])
+                                  if connection.writer.framed else None)
+                        continue
+                    if isinstance(request, dict) and request.get('request_id') is not None:
+                        # 流水线请求并发处理，未完成数达到上限时阻塞读取，形成背压
+                        inflight.acquire()
+                        self.request_pool.submit(self.process_pipelined, connection, inflight, request)
+                    else:
+                        # 旧协议: 不带 request_id 的请求按顺序一问一答
+                        self.send_response(connection, self.safe_process(request, connection))
+                if error:
+                    self.send_response(connection, error)
+
         except ConnectionResetError:
             print(f"[*] 客户端强制断开连接")
         except Exception as e:
             print(f"[!] 客户端处理错误: {e}")
         finally:
             print(f"[*] 连接关闭")
+            self.push_hub.unsubscribe(connection)
+            self.recorder.record_disconnect(connection.connection_id)
             client_socket.close()
 
-    def process_request(self, request):
+    def process_request(self, request, connection=None, session=None):
         """
         根据请求的 action 字段分发处理逻辑
+        :param connection: 请求所在的客户端连接 (订阅推送时需要)，批量子请求等场景下为 None
+        :param session: 已通过 authorize 检查的调用者会话 (未登录时为 None)
         """
         action = request.get('action')
         data = request.get('data')
         # 请求不同的操作——>调用不同的处理函数
-        if action == 'login':
-            return self.handle_login(data)
+        if action == 'batch':  # 批量请求 (一次往返执行多个子请求)
+            return self.handle_batch(data, session, connection)
+        elif action == 'login':  # 登录成功后创建会话并绑定到当前连接
+            return self.handle_login(data, connection)
+        elif action == 'logout':
+            return self.handle_logout(session, connection)
+        elif action == 'resume_session':  # 重连后凭 token 恢复会话
+            return self.handle_resume_session(data, connection)
         elif action == 'register':
             return self.handle_register(data)
         elif action == 'get_available_slots':  #获取场馆各个场地时间段(各场地预约情况)
             return self.handle_get_slots(data)
+        elif action == 'get_slot_changes':  # 按版本号增量同步号源 (客户端缓存)
+            return self.handle_get_slot_changes(data)
+        elif action == 'subscribe_slots':  # 订阅号源实时推送
+            return self.handle_subscribe_slots(data, connection)
+        elif action == 'unsubscribe_slots':
+            return self.handle_unsubscribe_slots(data, connection)
         elif action == 'book_venue':  #预约操作
             return self.handle_book(data)
         elif action == 'get_my_reservations':  #查看我的预约
@@ -120,8 +381,40 @@ class SportsVenueServer:
             return self.handle_get_announcements(data)
         elif action == 'admin_delete_announcement':
             return self.handle_admin_delete_announcement(data)
+        elif action == 'search_announcements':  # 公告/帖子全文检索
+            return self.handle_search_announcements(data)
+        elif action == 'get_weather':  # 天气 (服务器缓存)
+            return self.handle_get_weather(data)
         elif action == 'add_post': # 用户发帖
             return self.handle_add_post(data)
+        # --- Export Actions ---
+        elif action == 'admin_export_start':  # 开始分块导出 (socket)
+            return self.handle_admin_export_start(data)
+        elif action == 'admin_export_next':  # 拉取下一块导出数据
+            return self.handle_admin_export_next(data)
+        elif action == 'admin_export_close':
+            return self.handle_admin_export_close(data)
+        elif action == 'admin_export_to_file':  # 导出到服务器本地文件
+            return self.handle_admin_export_to_file(data)
+        # --- Profiler Actions ---
+        elif action == 'admin_set_profiler':  # 运行时开关请求剖析 / 调整采样比例与慢请求阈值
+            return self.handle_admin_set_profiler(data)
+        elif action == 'admin_get_profiler':  # 查看剖析状态与记录，或导出火焰图
+            return self.handle_admin_get_profiler(data)
+        elif action == 'admin_set_recorder':  # 开始/停止请求录制 (供 replay_requests.py 重放)
+            return self.handle_admin_set_recorder(data)
+        elif action == 'admin_set_rate_limit':  # 运行时开关限流 / 调整限额
+            return self.handle_admin_set_rate_limit(data)
+        elif action == 'admin_get_rate_limit':  # 限流配置与放行/拒绝计数
+            return self.handle_admin_get_rate_limit(data)
+        elif action == 'admin_get_sessions':  # 会话表概况 (在线会话数等)
+            return self.handle_admin_get_sessions(data)
+        elif action == 'admin_get_wire_stats':  # 协商连接的发送流量与压缩节省的字节数
+            return self.handle_admin_get_wire_stats(data)
+        elif action == 'admin_set_sql_trace':  # 开关 SQL 追踪 / 清空统计
+            return self.handle_admin_set_sql_trace(data)
+        elif action == 'admin_get_sql_report':  # 耗时最多的 SQL 语句及查询计划
+            return self.handle_admin_get_sql_report(data)
         # --- Statistics Actions ---
         elif action == 'get_venue_stats':
             return self.handle_get_venue_stats(data)
@@ -129,9 +422,40 @@ class SportsVenueServer:
             return self.handle_get_heatmap_data(data)
         elif action == 'get_user_stats':
             return self.handle_get_user_stats(data)
+        elif action == 'get_batch_user_stats':  # 批量用户统计 (分页)
+            return self.handle_get_batch_user_stats(data)
+        elif action == 'get_user_leaderboard':  # 运动活跃度排行榜
+            return self.handle_get_user_leaderboard(data)
         else:
             return {"status": "error", "message": f"未知的请求类型: {action}"}
 
+    def handle_batch(self, data, session=None, connection=None):
+        """
+        批量请求: 按顺序执行 data["requests"] 中的子请求，结果按相同顺序放在 results 中
+        data["snapshot"] 为 True 时所有子请求共用一个只读事务，看到一致的数据 (仅允许只读动作)
+        子请求与外层请求使用同一连接 (登录失败限流按连接的来源 IP 计数)
+        """
+        data = data or {}
+        requests = data.get('requests')
+        if not isinstance(requests, list) or not requests:
+            return {"status": "error", "message": "缺少子请求列表"}
+        if len(requests) > BATCH_MAX_REQUESTS:
+            return {"status": "fail", "message": f"单次批量请求最多 {BATCH_MAX_REQUESTS} 个子请求"}
+        if any(not isinstance(r, dict) for r in requests):
+            return {"status": "error", "message": "无效的子请求格式"}
+        if any(r.get('action') == 'batch' for r in requests):
+            return {"status": "fail", "message": "不支持嵌套批量请求"}
+
+        if data.get('snapshot'):
+            writes = [r.get('action') for r in requests if r.get('action') not in READ_ONLY_ACTIONS]
+            if writes:
+                return {"status": "fail", "message": f"只读快照中不允许执行: {', '.join(map(str, writes))}"}
+            with self.db_manager.read_snapshot():
+                results = [self.safe_process(r, connection, session=session, throttle=False) for r in requests]
+        else:
+            results = [self.safe_process(r, connection, session=session, throttle=False) for r in requests]
+        return {"status": "success", "results": results}
+
     def handle_register(self, data):
         if not data:
             return {"status": "error", "message": "缺少请求数据"}
@@ -153,7 +477,7 @@ class SportsVenueServer:
         else:
             return {"status": "fail", "message": message}
 
-    def handle_login(self, data):
+    def handle_login(self, data, connection=None):
         if not data:
             return {"status": "error", "message": "缺少请求数据"}
             
@@ -162,26 +486,108 @@ class SportsVenueServer:
         
         if not account or not password:
             return {"status": "error", "message": "账号或密码不能为空"}
+
+        # 登录失败次数按 (账号, 来源 IP) 限制 (批量请求中的 login 同样检查)
+        address = connection.address if connection is not None else None
+        allowed, retry_after = self.rate_limiter.check_login(str(account), address)
+        if not allowed:
+            return {"status": "fail", "message": f"登录失败次数过多，请 {retry_after:.1f} 秒后重试",
+                    "retry_after": retry_after}
             
         success, result = self.db_manager.validate_login(account, password)
         
         if success:
-            return {"status": "success", "message": "登录成功", "user": result}
+            session = self.sessions.create(result, connection)
+            return {"status": "success", "message": "登录成功", "user": result,
+                    "session": session.token, "expires_in": self.sessions.ttl}
         else:
+            self.rate_limiter.record_login_failure(str(account), address)
             return {"status": "fail", "message": result}
 
+    def handle_logout(self, session, connection=None):
+        if session is None:
+            return {"status": "fail", "message": "当前未登录"}
+        self.sessions.revoke(session.token)
+        if connection is not None and connection.session is session:
+            connection.session = None
+        return {"status": "success", "message": "已退出登录"}
+
+    def handle_resume_session(self, data, connection=None):
+        session = self.sessions.resolve((data or {}).get('token'))
+        if session is None:
+            return {"status": "fail", "message": "会话已过期，请重新登录"}
+        self.sessions.bind(session, connection)
+        user = {"account": session.account, "name": session.name, "role": session.role}
+        return {"status": "success", "user": user, "expires_in": self.sessions.ttl}
+
     def handle_get_slots(self, data):
         venue_id = data.get('venue_id')
         date_str = data.get('date')
         if not venue_id or not date_str:
             return {"status": "error", "message": "缺少场馆ID或日期"}
         
-        success, result = self.db_manager.get_available_slots(venue_id, date_str)
+        success, result = self.db_manager.get_available_slots(
+            venue_id,
+            date_str,
+            start_time=data.get('start_time'),
+            end_time=data.get('end_time'),
+            only_available=bool(data.get('only_available')),
+            summary=bool(data.get('summary')),
+        )
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    @staticmethod
+    def parse_since_version(data):
+        """:return: (since_version 或 None, 格式错误时的错误响应或 None)"""
+        since_version = data.get('since_version')
+        if since_version is None:
+            return None, None
+        try:
+            return int(since_version), None
+        except (TypeError, ValueError):
+            return None, {"status": "error", "message": "版本号格式错误"}
+
+    def handle_get_slot_changes(self, data):
+        venue_id = data.get('venue_id')
+        date_str = data.get('date')
+        if not venue_id or not date_str:
+            return {"status": "error", "message": "缺少场馆ID或日期"}
+        since_version, error = self.parse_since_version(data)
+        if error:
+            return error
+
+        success, result = self.db_manager.get_slot_changes(venue_id, date_str, since_version)
         if success:
             return {"status": "success", "data": result}
         else:
             return {"status": "fail", "message": result}
 
+    def handle_subscribe_slots(self, data, connection):
+        venue_id = data.get('venue_id')
+        date_str = data.get('date')
+        if not venue_id or not date_str:
+            return {"status": "error", "message": "缺少场馆ID或日期"}
+        if connection is None:
+            return {"status": "fail", "message": "订阅需要在客户端长连接上直接发送"}
+        # 客户端已缓存号源时带上版本号，订阅响应只包含之后的变化
+        since_version, error = self.parse_since_version(data)
+        if error:
+            return error
+
+        success, result = self.push_hub.subscribe(connection, venue_id, date_str, since_version)
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_unsubscribe_slots(self, data, connection):
+        if connection is not None:
+            self.push_hub.unsubscribe(connection, data.get('venue_id'), data.get('date'))
+        return {"status": "success", "message": "已取消订阅"}
+
     def handle_book(self, data):
         user_account = data.get('user_account')
         slot_id = data.get('slot_id')
@@ -280,6 +686,7 @@ class SportsVenueServer:
             
         success, message = self.db_manager.delete_user_account(account, password)
         if success:
+            self.sessions.revoke_user(account)
             return {"status": "success", "message": message}
         else:
             return {"status": "fail", "message": message}
@@ -350,9 +757,20 @@ class SportsVenueServer:
             return {"status": "fail", "message": message}
 
     def handle_admin_get_users(self, data):
-        success, result = self.db_manager.admin_get_users()
+        data = data or {}
+        page = data.get('page', 1)
+        page_size = data.get('page_size')
+        success, result = self.db_manager.admin_get_users(
+            page=page,
+            page_size=page_size,
+            sort=data.get('sort', 'account'),
+            keyword=data.get('keyword'),
+            role=data.get('role'),
+        )
         if success:
-            return {"status": "success", "data": result}
+            users, total = result
+            # data 仍为用户列表，分页信息放在顶层字段
+            return {"status": "success", "data": users, "total": total, "page": page}
         else:
             return {"status": "fail", "message": result}
 
@@ -371,6 +789,8 @@ class SportsVenueServer:
 
         success, message = self.db_manager.admin_update_user(old_account, new_account, password, name, role, phone, credit_score)
         if success:
+            # 账号、角色等可能已改变，该用户需重新登录
+            self.sessions.revoke_user(old_account)
             return {"status": "success", "message": message}
         else:
             return {"status": "fail", "message": message}
@@ -379,14 +799,26 @@ class SportsVenueServer:
         account = data.get('account')
         success, message = self.db_manager.admin_delete_user(account)
         if success:
+            self.sessions.revoke_user(account)
             return {"status": "success", "message": message}
         else:
             return {"status": "fail", "message": message}
 
     def handle_admin_get_all_reservations(self, data):
-        success, result = self.db_manager.admin_get_all_reservations()
+        data = data or {}
+        success, result = self.db_manager.admin_get_all_reservations(
+            after=data.get('cursor'),
+            limit=data.get('limit'),
+            venue_id=data.get('venue_id'),
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            status=data.get('status'),
+            user_account=data.get('user_account'),
+        )
         if success:
-            return {"status": "success", "data": result}
+            reservations, next_cursor = result
+            # data 仍为预约列表，分页信息放在顶层字段
+            return {"status": "success", "data": reservations, "next_cursor": next_cursor, "has_more": next_cursor is not None}
         else:
             return {"status": "fail", "message": result}
 
@@ -437,6 +869,29 @@ class SportsVenueServer:
         else:
             return {"status": "fail", "message": result}
 
+    def handle_search_announcements(self, data):
+        data = data or {}
+        keyword = data.get('keyword')
+        page = data.get('page', 1)
+        if not keyword or not str(keyword).strip():
+            return {"status": "error", "message": "检索词不能为空"}
+        success, result = self.db_manager.search_announcements(str(keyword), page, data.get('page_size'))
+        if success:
+            results, total = result
+            return {"status": "success", "data": results, "total": total, "page": page}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_get_weather(self, data):
+        date_str = (data or {}).get('date')
+        if not date_str:
+            return {"status": "error", "message": "缺少日期"}
+        success, result = self.weather_manager.get_weather(date_str)
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
     def handle_admin_delete_announcement(self, data):
         ann_id = data.get('ann_id')
         success, message = self.db_manager.admin_delete_announcement(ann_id)
@@ -445,6 +900,141 @@ class SportsVenueServer:
         else:
             return {"status": "fail", "message": message}
 
+    # --- Export Handlers ---
+    def handle_admin_export_start(self, data):
+        data = data or {}
+        table = data.get('table')
+        compress = data.get('compress', True)
+        if not table:
+            return {"status": "error", "message": "缺少导出表名"}
+        success, result = self.export_manager.start_stream(table, bool(compress))
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_admin_export_next(self, data):
+        export_id = (data or {}).get('export_id')
+        if not export_id:
+            return {"status": "error", "message": "缺少导出会话ID"}
+        success, result = self.export_manager.next_chunk(export_id)
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_admin_export_close(self, data):
+        export_id = (data or {}).get('export_id')
+        success, message = self.export_manager.close_stream(export_id)
+        return {"status": "success", "message": message}
+
+    def handle_admin_export_to_file(self, data):
+        data = data or {}
+        table = data.get('table')
+        fmt = data.get('format', 'csv.gz')
+        if not table:
+            return {"status": "error", "message": "缺少导出表名"}
+        # 只允许写入服务器导出目录，文件名由服务器生成
+        import datetime
+        filename = f"{table}_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        path = os.path.join(self.export_manager.export_dir, filename)
+        success, result = self.export_manager.export_to_file(table, path, fmt)
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    # --- Profiler Handlers ---
+    def handle_admin_set_profiler(self, data):
+        data = data or {}
+        success, result = self.profiler.configure(
+            enabled=data.get('enabled'),
+            sample_rate=data.get('sample_rate'),
+            slow_ms=data.get('slow_ms'),
+        )
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_admin_get_profiler(self, data):
+        data = data or {}
+        if data.get('flamegraph'):
+            # 服务器本地生成累计火焰图文件，返回路径
+            success, result = self.profiler.dump_flamegraph()
+            if success:
+                return {"status": "success", "data": self.profiler.status(), "flamegraph": result}
+            return {"status": "fail", "message": result}
+        success, result = self.profiler.get_captures(data.get('capture_id'))
+        if success:
+            return {"status": "success", "data": self.profiler.status(), "captures": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_hello(self, data):
+        """
+        协商连接的编码与压缩: data = {"encodings": ["msgpack", "json"], "table": true, "compression": ["zstd", "zlib"]}
+        服务器选择客户端列表中第一个支持的编码/压缩算法；table 为 true 时列表结果以列式表格返回；
+        协商了压缩时双方超过 threshold 字节的消息都会压缩
+        """
+        data = data if isinstance(data, dict) else {}
+        return {"status": "success", "data": {
+            "encoding": choose_encoding(data.get('encodings')),
+            "table": bool(data.get('table')),
+            "compression": choose_compression(data.get('compression')),
+            "threshold": COMPRESS_THRESHOLD,
+            "codec": CODEC_BACKEND,
+        }}
+
+    def handle_admin_set_rate_limit(self, data):
+        data = data or {}
+        success, result = self.rate_limiter.configure(
+            enabled=data.get('enabled'),
+            limits=data.get('limits'),
+            exempt_addresses=data.get('exempt_addresses'),
+            login_limit=data.get('login_limit'),
+            reset_metrics=bool(data.get('reset_metrics')),
+        )
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_admin_get_rate_limit(self, data):
+        return {"status": "success", "data": {
+            "config": self.rate_limiter.status(),
+            "metrics": self.rate_limiter.metrics(),
+        }}
+
+    def handle_admin_get_sessions(self, data):
+        return {"status": "success", "data": self.sessions.status()}
+
+    def handle_admin_get_wire_stats(self, data):
+        return {"status": "success", "data": self.wire_stats.snapshot()}
+
+    def handle_admin_set_recorder(self, data):
+        data = data or {}
+        if data.get('enabled') is None:
+            return {"status": "success", "data": self.recorder.status()}
+        success, result = self.recorder.start() if data.get('enabled') else self.recorder.stop()
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_admin_set_sql_trace(self, data):
+        data = data or {}
+        return {"status": "success", "data": sql_tracer.configure(data.get('enabled'), bool(data.get('reset')))}
+
+    def handle_admin_get_sql_report(self, data):
+        data = data or {}
+        try:
+            top_n = int(data.get('top_n', 20))
+        except (TypeError, ValueError):
+            return {"status": "error", "message": "top_n 必须是整数"}
+        report = sql_tracer.report(max(1, top_n), data.get('order_by', 'total_ms'))
+        return {"status": "success", "data": report, "tracer": sql_tracer.status()}
+
     # --- Statistics Handlers ---
     def handle_get_venue_stats(self, data):
         start_date = data.get('start_date')
@@ -474,6 +1064,30 @@ class SportsVenueServer:
         else:
             return {"status": "fail", "message": result}
 
+    def handle_get_batch_user_stats(self, data):
+        data = data or {}
+        user_accounts = data.get('user_accounts') # 为空则统计全部用户
+        page = data.get('page', 1)
+        page_size = data.get('page_size', 50)
+        order_by = data.get('order_by', 'account')
+        if user_accounts is not None and not isinstance(user_accounts, list):
+            return {"status": "error", "message": "user_accounts 必须是账号列表"}
+        success, result = self.stats_manager.get_batch_user_stats(user_accounts, page, page_size, order_by)
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
+    def handle_get_user_leaderboard(self, data):
+        data = data or {}
+        top_n = data.get('top_n', 10)
+        order_by = data.get('order_by', 'weekly')
+        success, result = self.stats_manager.get_activity_leaderboard(top_n, order_by)
+        if success:
+            return {"status": "success", "data": result}
+        else:
+            return {"status": "fail", "message": result}
+
     def start_scheduler(self):
         """
         启动后台定时任务线程
@@ -505,12 +1119,23 @@ class SportsVenueServer:
             self.server_socket.listen(5)
             print(f"[*] 服务器已启动，监听 {self.host}:{self.port}")
             
+            # 补齐 schema.sql 中新增的表和索引
+            success, message = self.db_manager.ensure_schema()
+            print(f"[*] {message}")
+
             # 启动时立即执行一次维护任务 (确保号源更新)
             print("[*] 正在执行启动时自检维护...")
             self.db_manager.process_daily_tasks()
 
             # 启动定时任务
             self.start_scheduler()
+            # 启动号源实时推送
+            self.push_hub.start()
+            # 启动天气刷新 (后台线程，启动时立即拉取一次)
+            self.weather_manager.start()
+            # 环境变量 RECORD_REQUESTS=1 时从启动起录制全部请求
+            if os.environ.get("RECORD_REQUESTS") == "1":
+                self.recorder.start()
             
             print(f"[*] 等待客户端连接...")
             
@@ -528,6 +1153,8 @@ class SportsVenueServer:
             self.server_socket.close()
 
 if __name__ == '__main__':
-    # 可以在这里配置 IP 和 端口
-    server = SportsVenueServer()
+    # 可以在这里配置 IP 和 端口；用法: python server.py [数据库路径] [端口]
+    db_path = sys.argv[1] if len(sys.argv) > 1 else None
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8888
+    server = SportsVenueServer(port=port, db_path=db_path)
     server.start()
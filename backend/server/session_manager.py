@@ -0,0 +1,132 @@
+import os
+import time
+import secrets
+import threading
+
+
+class Session:
+    """一次登录会话 (内存中)，account/role 在登录时确定，之后的请求无需再查询 users 表"""
+
+    __slots__ = ("token", "account", "name", "role", "connection_id", "created", "expires")
+
+    def __init__(self, token, user, connection_id, ttl):
+        now = time.monotonic()
+        self.token = token
+        self.account = user["account"]
+        self.name = user.get("name")
+        self.role = user.get("role")
+        self.connection_id = connection_id
+        self.created = now
+        self.expires = now + ttl
+
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+
+
+class SessionManager:
+    """
+    会话表: token -> Session，另按账号索引以便注销/删除用户时使其全部会话失效
+
+    login 成功后创建会话并绑定到当前连接，同一连接上的后续请求直接使用连接上的会话；
+    请求也可以携带 token 字段 (断线重连后继续使用原会话)。两种方式都是 O(1) 查找。
+    会话按空闲时间过期: 每次使用时顺延 ttl 秒，过期会话在查找时或定期清理时移除。
+    """
+
+    TTL = 2 * 60 * 60        # 空闲多久后过期 (秒)
+    SWEEP_INTERVAL = 60      # 清理过期会话的最小间隔 (秒)
+
+    def __init__(self, ttl=TTL, required=None):
+        self.ttl = ttl
+        # 为 True 时除公开动作外都必须先登录 (环境变量 REQUIRE_SESSION=1)；
+        # 默认兼容旧客户端: 没有会话也可调用查询等动作，管理员动作与以调用者身份执行的动作除外
+        self.required = os.environ.get("REQUIRE_SESSION") == "1" if required is None else required
+        self._sessions = {}     # token -> Session
+        self._by_account = {}   # account -> {token, ...}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def create(self, user, connection=None):
+        """
+        :param user: validate_login 返回的用户信息
+        :return: Session
+        """
+        session = Session(secrets.token_urlsafe(24), user, getattr(connection, "connection_id", None), self.ttl)
+        with self._lock:
+            self._sessions[session.token] = session
+            self._by_account.setdefault(session.account, set()).add(session.token)
+            self._sweep_locked()
+        if connection is not None:
+            connection.session = session
+        return session
+
+    def resolve(self, token=None, connection=None):
+        """
+        查找请求的会话: 优先使用请求携带的 token，否则使用连接上绑定的会话
+        :return: Session 或 None (未登录/已过期/已失效)
+        """
+        session = None
+        if token:
+            with self._lock:
+                session = self._sessions.get(token)
+        elif connection is not None:
+            session = getattr(connection, "session", None)
+            if session is not None and session.token not in self._sessions:
+                connection.session = session = None  # 已注销或被管理员删除
+        if session is None:
+            return None
+        now = time.monotonic()
+        if session.expires < now:
+            self.revoke(session.token)
+            if connection is not None and getattr(connection, "session", None) is session:
+                connection.session = None
+            return None
+        session.expires = now + self.ttl
+        return session
+
+    def bind(self, session, connection):
+        """把会话绑定到 (新) 连接，后续请求无需再携带 token"""
+        if connection is not None:
+            connection.session = session
+            session.connection_id = connection.connection_id
+
+    def revoke(self, token):
+        with self._lock:
+            session = self._sessions.pop(token, None)
+            if session is not None:
+                tokens = self._by_account.get(session.account)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._by_account[session.account]
+        return session is not None
+
+    def revoke_user(self, account):
+        """使某用户的全部会话失效 (注销账号、被管理员删除或修改后需重新登录)"""
+        with self._lock:
+            tokens = self._by_account.pop(account, set())
+            for token in tokens:
+                self._sessions.pop(token, None)
+        return len(tokens)
+
+    def _sweep_locked(self):
+        now = time.monotonic()
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for token in [t for t, s in self._sessions.items() if s.expires < now]:
+            session = self._sessions.pop(token)
+            tokens = self._by_account.get(session.account)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._by_account[session.account]
+
+    def status(self):
+        with self._lock:
+            return {
+                "required": self.required,
+                "ttl": self.ttl,
+                "sessions": len(self._sessions),
+                "users": len(self._by_account),
+            }
@@ -0,0 +1,248 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+
+# 语句归一化: 字面量替换为 ?，IN (?, ?, ...) 合并，空白折叠，使同一模板的语句归为一类
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("(?, ...)", sql)
+
+
+class TracedCursor:
+    """
+    记录语句耗时与返回行数的游标代理
+    一条语句的耗时 = execute + 之后所有 fetch 的时间，在下一次 execute 或关闭时计入统计
+    """
+
+    def __init__(self, cursor, tracer, db_path):
+        self._cursor = cursor
+        self._tracer = tracer
+        self._db_path = db_path
+        self._sql = None
+        self._params = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _finish(self):
+        if self._sql is not None:
+            self._tracer.record(self._db_path, self._sql, self._params, self._elapsed, self._rows)
+            self._sql = None
+
+    def _timed(self, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql, params=()):
+        self._finish()
+        self._sql, self._params, self._elapsed, self._rows = sql, params, 0.0, 0
+        self._timed(self._cursor.execute, sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        self._sql, self._params, self._elapsed, self._rows = sql, None, 0.0, 0
+        self._timed(self._cursor.executemany, sql, seq_of_params)
+        return self
+
+    def executescript(self, script):
+        # 脚本 (建表等) 不计入统计
+        self._finish()
+        self._cursor.executescript(script)
+        return self
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(self._cursor.fetchmany, *(() if size is None else (size,)))
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """连接代理: cursor() 与连接上的 execute 快捷方法均返回 TracedCursor"""
+
+    def __init__(self, conn, tracer, db_path):
+        self._conn = conn
+        self._tracer = tracer
+        self._db_path = db_path
+        self._cursors = []
+
+    def cursor(self):
+        cursor = TracedCursor(self._conn.cursor(), self._tracer, self._db_path)
+        self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def close(self):
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors = []
+        self._conn.close()
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class SQLTracer:
+    """
+    SQL 语句追踪 (默认关闭；环境变量 SQL_TRACE=1 或管理员动作 admin_set_sql_trace 开启)
+
+    开启后 wrap() 返回的连接会按归一化语句累计: 执行次数、总耗时、最大耗时、返回行数，
+    并保存最慢一次执行的参数；report() 对排名靠前的语句用这些参数执行 EXPLAIN QUERY PLAN，
+    标出未使用索引的全表扫描，用于判断哪些查询需要加索引。
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stats = {}  # 归一化语句 -> 统计
+        self._lock = threading.Lock()
+
+    def wrap(self, conn, db_path):
+        if not self.enabled:
+            return conn
+        return TracedConnection(conn, self, db_path)
+
+    def configure(self, enabled=None, reset=False):
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if reset:
+            self.reset()
+        return self.status()
+
+    def status(self):
+        with self._lock:
+            return {"enabled": self.enabled, "statements": len(self._stats)}
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def record(self, db_path, sql, params, elapsed, rows):
+        key = normalize_sql(sql)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                    "sql": sql, "params": None, "db_path": db_path, "plan": None,
+                }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["rows"] += rows
+            if elapsed_ms >= entry["max_ms"]:
+                # 最慢一次执行的原始语句与参数，用于 EXPLAIN
+                entry["max_ms"] = elapsed_ms
+                entry["sql"] = sql
+                entry["params"] = params
+                entry["plan"] = None
+
+    def explain(self, entry):
+        """用最慢一次执行的参数获取查询计划 (只读新连接，不影响业务连接)"""
+        if entry["params"] is None or not entry["sql"].lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")):
+            return []
+        conn = sqlite3.connect(entry["db_path"])
+        try:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + entry["sql"], entry["params"]).fetchall()
+            return [row[-1] for row in rows]
+        except sqlite3.Error as e:
+            return [f"无法获取查询计划: {e}"]
+        finally:
+            conn.close()
+
+    def report(self, top_n=20, order_by="total_ms"):
+        """
+        :param order_by: total_ms / max_ms / count / rows
+        :return: list of dict (按 order_by 降序的前 top_n 条语句)
+        """
+        if order_by not in ("total_ms", "max_ms", "count", "rows"):
+            order_by = "total_ms"
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1][order_by], reverse=True)[:top_n]
+            items = [(key, dict(entry)) for key, entry in items]
+
+        report = []
+        for key, entry in items:
+            if entry["plan"] is None:
+                entry["plan"] = self.explain(entry)
+                with self._lock:
+                    # 缓存查询计划，直到出现更慢的一次执行
+                    if key in self._stats and self._stats[key]["params"] is entry["params"]:
+                        self._stats[key]["plan"] = entry["plan"]
+            report.append({
+                "sql": key,
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 3),
+                "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "rows": entry["rows"],
+                "plan": entry["plan"],
+                # SCAN 表 (而不是 SEARCH ... USING INDEX) 说明没有可用索引
+                "full_scan": any(step.startswith("SCAN ") and "USING" not in step for step in entry["plan"]),
+            })
+        return report
+
+
+def format_report(report):
+    """把 report() 的结果格式化为便于阅读的文本"""
+    lines = []
+    for i, item in enumerate(report, 1):
+        flag = "  [全表扫描]" if item["full_scan"] else ""
+        lines.append(f"{i:>3}. 总 {item['total_ms']:.1f} ms  次数 {item['count']}  平均 {item['avg_ms']:.3f} ms  "
+                     f"最大 {item['max_ms']:.3f} ms  行数 {item['rows']}{flag}")
+        lines.append(f"     {item['sql'][:300]}")
+        for step in item["plan"]:
+            lines.append(f"       - {step}")
+    return "\n".join(lines)
+
+
+# 全局追踪器 (DBManager 与 StatisticsManager 共用)
+sql_tracer = SQLTracer(enabled=os.environ.get("SQL_TRACE") == "1")
@@ -3,6 +3,13 @@ import os
 import datetime
 import calendar
 
+try:
+    from server.db_manager import pinned_connection
+    from server.sql_tracer import sql_tracer
+except ImportError:
+    from db_manager import pinned_connection
+    from sql_tracer import sql_tracer
+
 # 获取数据库路径 (与 db_manager 保持一致)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, 'database', 'sports_venue.db')
@@ -12,7 +19,8 @@ class StatisticsManager:
         self.db_path = db_path
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        # 批量请求的只读快照中复用同一连接
+        return pinned_connection(self.db_path) or sql_tracer.wrap(sqlite3.connect(self.db_path), self.db_path)
 
     def get_venue_stats(self, start_date_str=None, end_date_str=None):
         """
@@ -268,6 +276,165 @@ class StatisticsManager:
         finally:
             conn.close()
 
+    # 批量统计时单页最多返回的用户数 / 单条 IN 子句最多携带的参数数
+    MAX_BATCH_PAGE_SIZE = 500
+    MAX_LEADERBOARD_SIZE = 50  # 排行榜最多返回的人数
+    IN_CLAUSE_CHUNK = 500
+
+    @staticmethod
+    def _chunked(items, size):
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    def get_batch_user_stats(self, user_accounts=None, page=1, page_size=50, order_by="account"):
+        """
+        【维度4：批量用户统计】
+        一次返回多个用户的最近7天运动趋势与最常去场馆 Top3，
+        结果与 get_user_stats 一致，但只做少量分组扫描，而不是每个用户两条查询。
+
+        :param user_accounts: 账号列表；为 None 时统计全部用户
+        :param page: 页码 (从 1 开始)
+        :param page_size: 每页用户数 (最大 MAX_BATCH_PAGE_SIZE)
+        :param order_by: 'account' 按账号排序 | 'weekly' 按近7天次数降序 | 'total' 按累计次数降序
+        :return: dict { "dates": [...], "total": N, "page": p, "page_size": s, "users": [...] }
+        """
+        if order_by not in ("account", "weekly", "total"):
+            return False, f"不支持的排序方式: {order_by}"
+        try:
+            page = max(1, int(page or 1))
+            page_size = min(max(1, int(page_size or 50)), self.MAX_BATCH_PAGE_SIZE)
+        except (TypeError, ValueError):
+            return False, "分页参数必须是整数"
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            today = datetime.date.today()
+            seven_days_ago = today - datetime.timedelta(days=6)
+            date_list = [(seven_days_ago + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
+            offset = (page - 1) * page_size
+
+            # --- Scan 1: 确定本页用户 (含排序所需的活跃度) ---
+            # 活跃度统计口径与 get_user_stats 保持一致: confirmed, checked_in, completed
+            activity_sql = """
+                SELECT u.user_account, u.name, u.role,
+                       COALESCE(a.weekly_count, 0) AS weekly_count,
+                       COALESCE(a.total_count, 0) AS total_count
+                FROM users u
+                LEFT JOIN (
+                    SELECT r.user_account,
+                           SUM(CASE WHEN ts.date >= ? AND ts.date <= ? THEN 1 ELSE 0 END) AS weekly_count,
+                           COUNT(*) AS total_count
+                    FROM reservations r
+                    JOIN time_slots ts ON r.slot_id = ts.slot_id
+                    WHERE r.status IN ('confirmed', 'checked_in', 'completed')
+                    GROUP BY r.user_account
+                ) a ON a.user_account = u.user_account
+            """
+            order_sql = {
+                "account": "ORDER BY u.user_account",
+                "weekly": "ORDER BY weekly_count DESC, total_count DESC, u.user_account",
+                "total": "ORDER BY total_count DESC, weekly_count DESC, u.user_account",
+            }[order_by]
+            params = [seven_days_ago, today]
+
+            if user_accounts is None:
+                cursor.execute("SELECT COUNT(*) FROM users")
+                total = cursor.fetchone()[0]
+                cursor.execute(f"{activity_sql} {order_sql} LIMIT ? OFFSET ?", params + [page_size, offset])
+                page_rows = cursor.fetchall()
+            else:
+                # 指定账号集合: 分块查询后在内存中排序分页 (账号集合本身已由调用方限定)
+                accounts = list(dict.fromkeys(a for a in user_accounts if a))
+                rows = []
+                for chunk in self._chunked(accounts, self.IN_CLAUSE_CHUNK):
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(f"{activity_sql} WHERE u.user_account IN ({placeholders})", params + chunk)
+                    rows.extend(cursor.fetchall())
+                if order_by == "account":
+                    rows.sort(key=lambda x: x[0])
+                elif order_by == "weekly":
+                    rows.sort(key=lambda x: (-x[3], -x[4], x[0]))
+                else:
+                    rows.sort(key=lambda x: (-x[4], -x[3], x[0]))
+                total = len(rows)
+                page_rows = rows[offset:offset + page_size]
+
+            page_accounts = [row[0] for row in page_rows]
+            trend_map = {acc: dict.fromkeys(date_list, 0) for acc in page_accounts}
+            fav_map = {acc: [] for acc in page_accounts}
+
+            for chunk in self._chunked(page_accounts, self.IN_CLAUSE_CHUNK):
+                placeholders = ",".join("?" * len(chunk))
+
+                # --- Scan 2: 本页用户最近7天按天分组 ---
+                cursor.execute(f"""
+                    SELECT r.user_account, ts.date, COUNT(*)
+                    FROM reservations r
+                    JOIN time_slots ts ON r.slot_id = ts.slot_id
+                    WHERE r.user_account IN ({placeholders})
+                    AND ts.date >= ? AND ts.date <= ?
+                    AND r.status IN ('confirmed', 'checked_in', 'completed')
+                    GROUP BY r.user_account, ts.date
+                """, chunk + [seven_days_ago, today])
+                for acc, r_date, count in cursor.fetchall():
+                    if r_date in trend_map[acc]:
+                        trend_map[acc][r_date] = count
+
+                # --- Scan 3: 本页用户按场馆分组 (Top3 在内存中截取) ---
+                cursor.execute(f"""
+                    SELECT r.user_account, v.venue_name, COUNT(*) as cnt
+                    FROM reservations r
+                    JOIN time_slots ts ON r.slot_id = ts.slot_id
+                    JOIN courts c ON ts.court_id = c.court_id
+                    JOIN venues v ON c.venue_id = v.venue_id
+                    WHERE r.user_account IN ({placeholders})
+                    AND r.status IN ('confirmed', 'checked_in', 'completed')
+                    GROUP BY r.user_account, v.venue_name
+                    ORDER BY r.user_account, cnt DESC
+                """, chunk)
+                for acc, v_name, cnt in cursor.fetchall():
+                    if len(fav_map[acc]) < 3:
+                        fav_map[acc].append({"name": v_name, "count": cnt})
+
+            users = []
+            for acc, name, role, weekly_count, total_count in page_rows:
+                users.append({
+                    "account": acc,
+                    "name": name,
+                    "role": role,
+                    "weekly_total": weekly_count,
+                    "total_count": total_count,
+                    "weekly_counts": [trend_map[acc][d] for d in date_list],
+                    "top_venues": fav_map[acc]
+                })
+
+            return True, {
+                "dates": date_list,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "users": users
+            }
+
+        except Exception as e:
+            return False, str(e)
+        finally:
+            conn.close()
+
+    def get_activity_leaderboard(self, top_n=10, order_by="weekly"):
+        """
+        【维度5：运动活跃度排行榜】
+        按近7天 (weekly) 或累计 (total) 有效预约次数取前 N 名 (N 最大 MAX_LEADERBOARD_SIZE)
+        """
+        if order_by not in ("weekly", "total"):
+            return False, f"不支持的排序方式: {order_by}"
+        try:
+            top_n = min(max(1, int(top_n or 10)), self.MAX_LEADERBOARD_SIZE)
+        except (TypeError, ValueError):
+            return False, "top_n 必须是整数"
+        return self.get_batch_user_stats(page=1, page_size=top_n, order_by=order_by)
+
 # --- 单元测试代码 ---
 if __name__ == "__main__":
     # 可以在这里直接运行此文件测试逻辑
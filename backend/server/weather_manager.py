@@ -0,0 +1,247 @@
+import sqlite3
+import os
+import re
+import time
+import datetime
+import threading
+from abc import ABC, abstractmethod
+
+# 获取数据库路径 (与 db_manager 保持一致)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, 'database', 'sports_venue.db')
+
+# 可选依赖: 真实天气源需要 requests + BeautifulSoup，缺失时只能使用模拟天气源
+try:
+    import requests
+    from bs4 import BeautifulSoup
+except ImportError:
+    requests = None
+    BeautifulSoup = None
+
+
+class WeatherProvider(ABC):
+    """
+    天气数据源接口 (抽象基类，未实现 fetch_forecast 的子类无法实例化)
+    fetch_forecast() 返回未来若干天的预报:
+        [{"date": "YYYY-MM-DD", "weather_text": "小雨", "temp_low": 18, "temp_high": 25}, ...]
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def fetch_forecast(self):
+        raise NotImplementedError
+
+
+class WeatherComCnProvider(WeatherProvider):
+    """中国天气网 7 天预报 (原客户端 WeatherCrawlerThread 的解析逻辑迁移到服务器)"""
+
+    name = "weather_com_cn"
+    URL = "https://www.weather.com.cn/weather/101010100.shtml"  # 北京
+    TIMEOUT = 20
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    }
+
+    def fetch_forecast(self):
+        if requests is None or BeautifulSoup is None:
+            raise RuntimeError("未安装 requests / beautifulsoup4，无法使用中国天气网数据源")
+        response = requests.get(self.URL, headers=self.HEADERS, timeout=self.TIMEOUT)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        soup = BeautifulSoup(response.text, 'html.parser')
+
+        today = datetime.date.today()
+        # 页面只给出 "22日（今天）" 这样的日，按未来 7 天换算成完整日期
+        upcoming = {(today + datetime.timedelta(days=i)).day: today + datetime.timedelta(days=i) for i in range(7)}
+
+        forecast = []
+        for item in soup.find_all('li', class_='sky'):
+            date_span = item.find('h1')
+            weather_info = item.find('p', class_='wea')
+            temp_info = item.find('p', class_='tem')
+            if not date_span or not weather_info:
+                continue
+            day_matches = re.findall(r'(\d+)日', date_span.get_text(strip=True))
+            if not day_matches or int(day_matches[0]) not in upcoming:
+                continue
+            # 温度形如 "25/18℃"，夜间只有 "18℃"
+            temps = [int(t) for t in re.findall(r'-?\d+', temp_info.get_text(strip=True))] if temp_info else []
+            if not temps:
+                continue
+            forecast.append({
+                "date": upcoming[int(day_matches[0])].strftime("%Y-%m-%d"),
+                "weather_text": weather_info.get_text(strip=True),
+                "temp_low": min(temps),
+                "temp_high": max(temps),
+            })
+        if not forecast:
+            raise RuntimeError("未解析到天气预报条目，页面结构可能已改变")
+        return forecast
+
+
+class FakeWeatherProvider(WeatherProvider):
+    """本地模拟天气源 (离线/测试用)，同一天总是返回相同的天气"""
+
+    name = "fake"
+    WEATHER_TYPES = [
+        "晴", "多云", "阴", "小雨", "中雨", "大雨", "阵雨",
+        "雷阵雨", "小雪", "中雪", "大雪", "雾", "霾"
+    ]
+
+    def __init__(self, days=7):
+        self.days = days
+
+    def fetch_forecast(self):
+        today = datetime.date.today()
+        forecast = []
+        for i in range(self.days):
+            date_obj = today + datetime.timedelta(days=i)
+            day_of_year = date_obj.timetuple().tm_yday
+            temp_high = 15 + (day_of_year % 20)  # 15-35度
+            forecast.append({
+                "date": date_obj.strftime("%Y-%m-%d"),
+                "weather_text": self.WEATHER_TYPES[day_of_year % len(self.WEATHER_TYPES)],
+                "temp_low": temp_high - 10,
+                "temp_high": temp_high,
+            })
+        return forecast
+
+
+# 数据源名称 -> 类，可通过环境变量 WEATHER_PROVIDER 选择
+PROVIDERS = {
+    WeatherComCnProvider.name: WeatherComCnProvider,
+    FakeWeatherProvider.name: FakeWeatherProvider,
+}
+
+
+def default_provider():
+    name = os.environ.get("WEATHER_PROVIDER")
+    if name is None:
+        name = WeatherComCnProvider.name if requests is not None and BeautifulSoup is not None else FakeWeatherProvider.name
+    if name not in PROVIDERS:
+        raise ValueError(f"未知的天气数据源: {name} (可用: {', '.join(PROVIDERS)})")
+    return PROVIDERS[name]()
+
+
+class WeatherManager:
+    """
+    服务器端天气服务
+    后台线程按固定间隔从数据源刷新预报并写入 weather_info 表，
+    get_weather 只读缓存，客户端查询永远不会等待外部网站。
+    """
+
+    REFRESH_INTERVAL = 3 * 3600  # 3 小时刷新一次
+    RETRY_INTERVAL = 10 * 60     # 刷新失败后 10 分钟重试
+    MIN_REFRESH_GAP = 60         # 缓存缺失触发的刷新，两次之间至少间隔 60 秒
+
+    def __init__(self, db_path=DB_PATH, provider=None):
+        self.db_path = db_path
+        self.provider = provider or default_provider()
+        self.running = False
+        self._refresh_now = threading.Event()
+        self._last_attempt = 0
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_path)
+
+    def start(self):
+        """启动后台刷新线程 (启动后立即刷新一次)"""
+        self.running = True
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def stop(self):
+        self.running = False
+        self._refresh_now.set()
+
+    def request_refresh(self):
+        """缓存缺失时唤醒刷新线程，不阻塞调用方 (限频，避免频繁访问外部网站)"""
+        if time.time() - self._last_attempt > self.MIN_REFRESH_GAP:
+            self._refresh_now.set()
+
+    def _run(self):
+        print(f"[Weather] 天气刷新线程已启动 (数据源: {self.provider.name})")
+        while self.running:
+            success, message = self.refresh()
+            print(f"[Weather] {message}")
+            self._refresh_now.wait(self.REFRESH_INTERVAL if success else self.RETRY_INTERVAL)
+            self._refresh_now.clear()
+
+    def refresh(self):
+        """
+        从数据源拉取预报并写入 weather_info (同一日期只保留最新一条)
+        :return: (bool, str)
+        """
+        self._last_attempt = time.time()
+        try:
+            forecast = self.provider.fetch_forecast()
+        except Exception as e:
+            return False, f"天气刷新失败 ({self.provider.name}): {str(e)}"
+
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            for item in forecast:
+                cursor.execute("DELETE FROM weather_info WHERE date = ?", (item["date"],))
+                cursor.execute("""
+                    INSERT INTO weather_info (date, weather_text, temp_low, temp_high, update_time)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (item["date"], item["weather_text"], item["temp_low"], item["temp_high"], now))
+            conn.commit()
+            return True, f"天气已刷新: {len(forecast)} 天 ({self.provider.name})"
+        except Exception as e:
+            conn.rollback()
+            return False, f"天气写入失败: {str(e)}"
+        finally:
+            conn.close()
+
+    def get_weather(self, date_str):
+        """
+        读取缓存的某日天气
+        :return: (bool, dict/str) dict 含 date, weather_text, temp_low, temp_high, update_time, text
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            datetime.datetime.strptime(date_str, "%Y-%m-%d")
+            cursor.execute("""
+                SELECT date, weather_text, temp_low, temp_high, update_time
+                FROM weather_info
+                WHERE date = ?
+                ORDER BY update_time DESC
+                LIMIT 1
+            """, (date_str,))
+            row = cursor.fetchone()
+            if not row:
+                self.request_refresh()
+                return False, "暂无该日期的天气数据"
+            return True, {
+                "date": row[0],
+                "weather_text": row[1],
+                "temp_low": row[2],
+                "temp_high": row[3],
+                "update_time": row[4],
+                # 与原客户端显示格式一致，如 "小雨 18°C ~ 25°C"
+                "text": f"{row[1]} {row[2]}°C ~ {row[3]}°C",
+            }
+        except ValueError:
+            return False, "日期格式错误"
+        except Exception as e:
+            return False, str(e)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    # 手动刷新一次: python weather_manager.py [fake|weather_com_cn]
+    import sys
+    if len(sys.argv) > 1:
+        os.environ["WEATHER_PROVIDER"] = sys.argv[1]
+    manager = WeatherManager()
+    ok, msg = manager.refresh()
+    print(msg)
+    sys.exit(0 if ok else 1)
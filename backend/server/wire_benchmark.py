@@ -0,0 +1,137 @@
+"""
+线路编码基准测试: 比较 JSON 与 MessagePack (含列式表格) 的消息体积与编解码耗时，
+以及各编码再经可协商的压缩算法 (zlib / zstd) 压缩后的体积
+
+消息取自模拟数据集上的真实查询结果 (号源列表、预约记录较多用户的预约历史、
+一次批量请求)，按服务器的响应格式包装后分别用各种编码编码/解码。
+安装了 msgpack 时额外比较 C 扩展实现。
+
+用法:
+    python wire_benchmark.py [--size small|medium|large | --db 数据库] [--repeat 20] [--out 结果.json]
+"""
+import argparse
+import datetime
+import json
+import sqlite3
+import statistics
+import time
+
+try:
+    from server import wire_codec
+    from server.db_manager import DBManager
+    from server.benchmark_suite import SIZES, dataset_path
+except ImportError:
+    import wire_codec
+    from db_manager import DBManager
+    from benchmark_suite import SIZES, dataset_path
+
+
+def load_messages(db_path):
+    """从数据库中取出几类典型响应"""
+    db = DBManager(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        venue_ids = [row[0] for row in conn.execute("SELECT venue_id FROM venues ORDER BY venue_id LIMIT 4")]
+        heavy_user = conn.execute("""
+            SELECT user_account FROM reservations GROUP BY user_account ORDER BY COUNT(*) DESC LIMIT 1
+        """).fetchone()[0]
+    finally:
+        conn.close()
+    date = (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+
+    slots = [db.get_available_slots(venue_id, date)[1] for venue_id in venue_ids]
+    reservations = db.get_user_reservations(heavy_user)[1]
+    return {
+        "slot_list": {"status": "success", "data": slots[0]},
+        "reservation_history": {"status": "success", "data": reservations},
+        "batch_slots": {"status": "success", "results": [{"status": "success", "data": s} for s in slots]},
+    }
+
+
+def codecs_to_compare():
+    """(名称, 编码函数, 解码函数)"""
+    def json_encode(message, table):
+        return wire_codec.encode_message(message, "json", table)
+
+    def json_decode(data, table):
+        message = json.loads(data.decode("utf-8"))
+        return wire_codec.from_table(message) if table else message
+
+    def msgpack_codec(packb, unpackb):
+        header = wire_codec.FRAME_HEADER
+        def encode(message, table):
+            payload = packb(wire_codec.to_table(message) if table else message)
+            return header.pack(len(payload)) + payload
+        def decode(data, table):
+            message = unpackb(data[header.size:])
+            return wire_codec.from_table(message) if table else message
+        return encode, decode
+
+    codecs = [("json", json_encode, json_decode)]
+    codecs.append(("msgpack(python)",) + msgpack_codec(wire_codec.py_packb, wire_codec.py_unpackb))
+    if wire_codec.CODEC_BACKEND == "c":
+        codecs.append(("msgpack(c)",) + msgpack_codec(wire_codec.packb, wire_codec.unpackb))
+    return codecs
+
+
+def time_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(messages, repeat):
+    results = []
+    for message_name, message in messages.items():
+        baseline = None
+        for codec_name, encode, decode in codecs_to_compare():
+            for table in (False, True):
+                data = encode(message, table)
+                if decode(data, table) != message:
+                    raise AssertionError(f"{codec_name} 编解码结果不一致: {message_name}")
+                size = len(data)
+                if baseline is None:
+                    baseline = size
+                result = {
+                    "message": message_name,
+                    "codec": codec_name + ("+table" if table else ""),
+                    "bytes": size,
+                    "ratio": round(size / baseline, 3),
+                    "encode_ms": round(time_ms(lambda: encode(message, table), repeat), 3),
+                    "decode_ms": round(time_ms(lambda: decode(data, table), repeat), 3),
+                }
+                for compression in wire_codec.COMPRESSIONS:
+                    # 单条消息独立压缩 (连接上的流式压缩对后续消息效果更好)
+                    result[f"{compression}_bytes"] = len(wire_codec.StreamCompressor(compression).compress(data))
+                results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON / MessagePack 线路编码基准测试")
+    parser.add_argument("--size", default="small", choices=sorted(SIZES), help="模拟数据集规模")
+    parser.add_argument("--db", help="直接使用已有数据库 (只读)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="结果 JSON 文件")
+    args = parser.parse_args()
+
+    messages = load_messages(args.db or dataset_path(args.size))
+    results = run(messages, args.repeat)
+
+    compressed = "".join(f"{c + '字节':>12}" for c in wire_codec.COMPRESSIONS)
+    print(f"\n{'消息':<22}{'编码':<24}{'字节数':>10}{'相对JSON':>10}{'编码ms':>10}{'解码ms':>10}{compressed}")
+    for r in results:
+        compressed = "".join(f"{r[c + '_bytes']:>12}" for c in wire_codec.COMPRESSIONS)
+        print(f"{r['message']:<22}{r['codec']:<24}{r['bytes']:>10}{r['ratio']:>10}{r['encode_ms']:>10}{r['decode_ms']:>10}"
+              f"{compressed}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"codec_backend": wire_codec.CODEC_BACKEND, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
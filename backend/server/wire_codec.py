@@ -0,0 +1,470 @@
+import json
+import zlib
+import struct
+import threading
+from functools import lru_cache
+
+try:
+    # 安装了 msgpack (C 扩展) 时优先使用，否则使用下面的纯 Python 实现，两者输出兼容
+    import msgpack as _msgpack
+except ImportError:
+    _msgpack = None
+
+try:
+    import zstandard as _zstd
+except ImportError:
+    _zstd = None
+
+# 可协商的编码，按服务器偏好排序；json 为默认编码 (未协商的旧客户端)
+ENCODINGS = ("msgpack", "json")
+CODEC_BACKEND = "c" if _msgpack is not None else "python"
+
+# 可协商的压缩算法 (按偏好排序)，超过 COMPRESS_THRESHOLD 字节的消息才压缩
+COMPRESSIONS = ("zstd", "zlib") if _zstd is not None else ("zlib",)
+COMPRESS_THRESHOLD = 1024
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# 分帧格式: 4 字节大端长度 + 消息体，长度最高位表示消息体已压缩
+# 未协商 (JSON 且不压缩) 的连接不分帧，JSON 靠括号自行分隔
+FRAME_HEADER = struct.Struct(">I")
+COMPRESSED_FLAG = 0x80000000
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+# 列式表格: 键相同的字典列表 [{"a": 1, "b": 2}, ...] 改写为
+#   {"__table__": {"columns": ["a", "b"], "rows": [[1, 2], ...]}}
+# 每个键名只出现一次 (号源列表、预约记录等体积可减少一半左右)
+TABLE_KEY = "__table__"
+TABLE_MIN_ROWS = 2
+
+
+def choose_encoding(offered):
+    """从客户端提供的编码列表中选择第一个服务器支持的编码"""
+    for encoding in offered or ():
+        if encoding in ENCODINGS:
+            return encoding
+    return "json"
+
+
+def choose_compression(offered):
+    """从客户端提供的压缩算法中选择第一个支持的，都不支持时为 None (不压缩)"""
+    for compression in offered or ():
+        if compression in COMPRESSIONS:
+            return compression
+    return None
+
+
+# ---------------- 列式表格 ---------------- #
+def to_table(value):
+    """递归地把键相同的字典列表改写为列式表格"""
+    if isinstance(value, dict):
+        return {key: to_table(item) if isinstance(item, (dict, list)) else item for key, item in value.items()}
+    if isinstance(value, list):
+        first = value[0] if value else None
+        if (len(value) >= TABLE_MIN_ROWS and isinstance(first, dict) and first
+                and all(isinstance(row, dict) and row.keys() == first.keys() for row in value)):
+            columns = list(first)
+            rows = [
+                [to_table(row[c]) if isinstance(row[c], (dict, list)) else row[c] for c in columns]
+                for row in value
+            ]
+            return {TABLE_KEY: {"columns": columns, "rows": rows}}
+        return [to_table(item) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
+def from_table(value):
+    """to_table 的逆操作，还原为字典列表"""
+    if isinstance(value, dict):
+        table = value.get(TABLE_KEY) if len(value) == 1 else None
+        if isinstance(table, dict):
+            columns = table["columns"]
+            return [
+                dict(zip(columns, (from_table(cell) if isinstance(cell, (dict, list)) else cell for cell in row)))
+                for row in table["rows"]
+            ]
+        return {key: from_table(item) if isinstance(item, (dict, list)) else item for key, item in value.items()}
+    if isinstance(value, list):
+        return [from_table(item) if isinstance(item, (dict, list)) else item for item in value]
+    return value
+
+
+# ---------------- MessagePack (纯 Python 实现) ---------------- #
+@lru_cache(maxsize=4096)
+def _pack_str(value):
+    # 键名与状态值等短字符串反复出现，缓存其编码结果
+    data = value.encode("utf-8")
+    n = len(data)
+    if n < 32:
+        return bytes((0xa0 | n,)) + data
+    if n < 0x100:
+        return b"\xd9" + bytes((n,)) + data
+    if n < 0x10000:
+        return b"\xda" + struct.pack(">H", n) + data
+    return b"\xdb" + struct.pack(">I", n) + data
+
+
+def _pack(obj, out):
+    if obj is None:
+        out.append(b"\xc0")
+    elif obj is True:
+        out.append(b"\xc3")
+    elif obj is False:
+        out.append(b"\xc2")
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(bytes((obj,)))
+        elif -32 <= obj < 0:
+            out.append(struct.pack("b", obj))
+        elif obj >= 0:
+            if obj < 0x100:
+                out.append(b"\xcc" + bytes((obj,)))
+            elif obj < 0x10000:
+                out.append(b"\xcd" + struct.pack(">H", obj))
+            elif obj < 0x100000000:
+                out.append(b"\xce" + struct.pack(">I", obj))
+            else:
+                out.append(b"\xcf" + struct.pack(">Q", obj))
+        elif obj >= -0x80:
+            out.append(b"\xd0" + struct.pack("b", obj))
+        elif obj >= -0x8000:
+            out.append(b"\xd1" + struct.pack(">h", obj))
+        elif obj >= -0x80000000:
+            out.append(b"\xd2" + struct.pack(">i", obj))
+        else:
+            out.append(b"\xd3" + struct.pack(">q", obj))
+    elif isinstance(obj, str):
+        out.append(_pack_str(obj) if len(obj) <= 64 else _pack_str.__wrapped__(obj))
+    elif isinstance(obj, float):
+        out.append(b"\xcb" + struct.pack(">d", obj))
+    elif isinstance(obj, dict):
+        n = len(obj)
+        if n < 16:
+            out.append(bytes((0x80 | n,)))
+        elif n < 0x10000:
+            out.append(b"\xde" + struct.pack(">H", n))
+        else:
+            out.append(b"\xdf" + struct.pack(">I", n))
+        for key, item in obj.items():
+            _pack(key, out)
+            _pack(item, out)
+    elif isinstance(obj, (list, tuple)):
+        n = len(obj)
+        if n < 16:
+            out.append(bytes((0x90 | n,)))
+        elif n < 0x10000:
+            out.append(b"\xdc" + struct.pack(">H", n))
+        else:
+            out.append(b"\xdd" + struct.pack(">I", n))
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, (bytes, bytearray)):
+        n = len(obj)
+        if n < 0x100:
+            out.append(b"\xc4" + bytes((n,)))
+        elif n < 0x10000:
+            out.append(b"\xc5" + struct.pack(">H", n))
+        else:
+            out.append(b"\xc6" + struct.pack(">I", n))
+        out.append(bytes(obj))
+    else:
+        # 日期、Decimal 等按字符串发送
+        _pack(str(obj), out)
+
+
+def _unpack(data, pos):
+    b = data[pos]
+    pos += 1
+    if b < 0x80:
+        return b, pos
+    if b >= 0xe0:
+        return b - 0x100, pos
+    if 0xa0 <= b <= 0xbf:
+        end = pos + (b & 0x1f)
+        return data[pos:end].decode("utf-8"), end
+    if 0x90 <= b <= 0x9f:
+        return _unpack_array(data, pos, b & 0x0f)
+    if 0x80 <= b <= 0x8f:
+        return _unpack_map(data, pos, b & 0x0f)
+    if b == 0xc0:
+        return None, pos
+    if b == 0xc2:
+        return False, pos
+    if b == 0xc3:
+        return True, pos
+    if b in _FIXED:
+        fmt = _FIXED[b]
+        return fmt.unpack_from(data, pos)[0], pos + fmt.size
+    if b in _SIZED:
+        kind, fmt = _SIZED[b]
+        n = fmt.unpack_from(data, pos)[0]
+        pos += fmt.size
+        if kind == "str":
+            return data[pos:pos + n].decode("utf-8"), pos + n
+        if kind == "bin":
+            return bytes(data[pos:pos + n]), pos + n
+        if kind == "array":
+            return _unpack_array(data, pos, n)
+        return _unpack_map(data, pos, n)
+    raise ValueError(f"不支持的 MessagePack 类型: 0x{b:02x}")
+
+
+def _unpack_array(data, pos, n):
+    items = []
+    for _ in range(n):
+        item, pos = _unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data, pos, n):
+    result = {}
+    for _ in range(n):
+        key, pos = _unpack(data, pos)
+        result[key], pos = _unpack(data, pos)
+    return result, pos
+
+
+_FIXED = {
+    0xcc: struct.Struct(">B"), 0xcd: struct.Struct(">H"), 0xce: struct.Struct(">I"), 0xcf: struct.Struct(">Q"),
+    0xd0: struct.Struct(">b"), 0xd1: struct.Struct(">h"), 0xd2: struct.Struct(">i"), 0xd3: struct.Struct(">q"),
+    0xca: struct.Struct(">f"), 0xcb: struct.Struct(">d"),
+}
+_SIZED = {
+    0xd9: ("str", struct.Struct(">B")), 0xda: ("str", struct.Struct(">H")), 0xdb: ("str", struct.Struct(">I")),
+    0xc4: ("bin", struct.Struct(">B")), 0xc5: ("bin", struct.Struct(">H")), 0xc6: ("bin", struct.Struct(">I")),
+    0xdc: ("array", struct.Struct(">H")), 0xdd: ("array", struct.Struct(">I")),
+    0xde: ("map", struct.Struct(">H")), 0xdf: ("map", struct.Struct(">I")),
+}
+
+
+def py_packb(obj):
+    out = []
+    _pack(obj, out)
+    return b"".join(out)
+
+
+def py_unpackb(data):
+    try:
+        value, end = _unpack(data, 0)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"MessagePack 数据不完整或已损坏: {e}")
+    except RecursionError:
+        raise ValueError("MessagePack 数据嵌套过深")
+    if end != len(data):
+        raise ValueError("MessagePack 数据结尾有多余字节")
+    return value
+
+
+if _msgpack is not None:
+    def packb(obj):
+        return _msgpack.packb(obj, use_bin_type=True, default=str)
+
+    def unpackb(data):
+        try:
+            return _msgpack.unpackb(data, raw=False, strict_map_key=False)
+        except Exception as e:
+            raise ValueError(f"MessagePack 数据不完整或已损坏: {e}")
+else:
+    packb = py_packb
+    unpackb = py_unpackb
+
+
+# ---------------- 压缩 ---------------- #
+class StreamCompressor:
+    """
+    连接级流式压缩: 同一方向的所有消息共用一个压缩对象，每条消息后同步刷新，
+    后面的消息可以引用前面出现过的内容 (重复的键名、场馆名等)，压缩率高于逐条独立压缩。
+    压缩后的数据必须按压缩顺序发送 (调用方在发送锁内压缩)。
+    """
+
+    def __init__(self, method):
+        if method == "zstd":
+            self._obj = _zstd.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush_mode = _zstd.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(ZLIB_LEVEL)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data):
+        return self._obj.compress(data) + self._obj.flush(self._flush_mode)
+
+
+class _BoundedSink:
+    """zstd 解压输出的接收端: 累计超过上限时立即抛出 ValueError，不再继续解压"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.limit = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.limit is not None and self.size > self.limit:
+            raise ValueError(f"解压后消息过大: 超过 {self.limit} 字节")
+        self.chunks.append(bytes(data))
+        return len(data)
+
+
+class StreamDecompressor:
+    """
+    StreamCompressor 的对端。max_length 限制单条消息解压后的大小:
+    超过时在分配更多内存之前就抛出 ValueError (防止很小的压缩帧解压出巨量数据)
+    """
+
+    def __init__(self, method):
+        self.method = method
+        if method == "zstd":
+            # zstd 的 decompressobj 不支持限制输出大小，改用分块写出到有上限的接收端
+            self._sink = _BoundedSink()
+            self._obj = _zstd.ZstdDecompressor().stream_writer(self._sink)
+        else:
+            self._obj = zlib.decompressobj()
+
+    def decompress(self, data, max_length=None):
+        """
+        :raises ValueError: 解压后超过 max_length 字节
+        """
+        if self.method == "zstd":
+            self._sink.chunks, self._sink.size, self._sink.limit = [], 0, max_length
+            self._obj.write(data)
+            return b"".join(self._sink.chunks)
+        if max_length is None:
+            return self._obj.decompress(data)
+        result = self._obj.decompress(data, max_length + 1)
+        if len(result) > max_length or self._obj.unconsumed_tail:
+            raise ValueError(f"解压后消息过大: 超过 {max_length} 字节")
+        return result
+
+
+class WireStats:
+    """发送方向的流量统计 (原始字节数、实际发送字节数、节省的字节数)，可被多个连接共用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.compressed_messages = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+
+    def record(self, raw_bytes, wire_bytes, compressed):
+        with self._lock:
+            self.messages += 1
+            self.compressed_messages += 1 if compressed else 0
+            self.raw_bytes += raw_bytes
+            self.wire_bytes += wire_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "messages": self.messages,
+                "compressed_messages": self.compressed_messages,
+                "raw_bytes": self.raw_bytes,
+                "wire_bytes": self.wire_bytes,
+                "saved_bytes": self.raw_bytes - self.wire_bytes,
+                "ratio": round(self.wire_bytes / self.raw_bytes, 3) if self.raw_bytes else None,
+            }
+
+
+# ---------------- 消息编码与分帧 ---------------- #
+def serialize(message, encoding="json", table=False):
+    """把一条消息序列化为字节 (不含帧头)"""
+    if table:
+        message = to_table(message)
+    if encoding == "msgpack":
+        return packb(message)
+    return json.dumps(message, ensure_ascii=False).encode("utf-8")
+
+
+def deserialize(payload, encoding="json"):
+    if encoding == "msgpack":
+        return unpackb(payload)
+    try:
+        return json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"JSON 数据无效: {e}")
+    except RecursionError:
+        raise ValueError("JSON 数据嵌套过深")
+
+
+def encode_message(message, encoding="json", table=False):
+    """
+    把一条消息编码为发送用的字节 (不压缩)
+    :param encoding: json (不分帧，与旧协议一致) / msgpack (带长度前缀的帧)
+    :param table: 是否把字典列表改写为列式表格
+    """
+    payload = serialize(message, encoding, table)
+    if encoding == "msgpack":
+        return FRAME_HEADER.pack(len(payload)) + payload
+    return payload
+
+
+class MessageWriter:
+    """
+    一个连接发送方向的编码器 (按协商结果序列化、分帧、压缩)
+    serialize() 可在发送锁外调用；frame() 会推进压缩流，必须在发送锁内按发送顺序调用
+    """
+
+    def __init__(self, encoding="json", table=False, compression=None,
+                 threshold=COMPRESS_THRESHOLD, stats=None):
+        self.encoding = encoding
+        self.table = table
+        self.compression = compression
+        self.threshold = threshold
+        self.stats = stats
+        self.framed = encoding != "json" or compression is not None
+        self._compressor = StreamCompressor(compression) if compression else None
+
+    def serialize(self, message):
+        return serialize(message, self.encoding, self.table)
+
+    def frame(self, payload):
+        if not self.framed:
+            data, compressed = payload, False
+        elif self._compressor is not None and len(payload) >= self.threshold:
+            body = self._compressor.compress(payload)
+            data, compressed = FRAME_HEADER.pack(len(body) | COMPRESSED_FLAG) + body, True
+        else:
+            data, compressed = FRAME_HEADER.pack(len(payload)) + payload, False
+        if self.stats is not None:
+            self.stats.record(len(payload), len(data), compressed)
+        return data
+
+
+class FrameReader:
+    """从字节流中切分帧并解码 (数据可能被拆在多次 recv 之间)"""
+
+    def __init__(self, encoding="msgpack", compression=None, max_frame_bytes=MAX_FRAME_BYTES):
+        self.encoding = encoding
+        self.max_frame_bytes = max_frame_bytes
+        self._decompressor = StreamDecompressor(compression) if compression else None
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """
+        :return: 已接收完整的消息列表
+        :raises ValueError: 帧超过上限或内容无法解码 (此后连接应当关闭)
+        """
+        self._buffer += data
+        messages = []
+        while len(self._buffer) >= FRAME_HEADER.size:
+            (header,) = FRAME_HEADER.unpack_from(self._buffer)
+            length = header & ~COMPRESSED_FLAG
+            if length > self.max_frame_bytes:
+                raise ValueError(f"消息过大: {length} 字节")
+            end = FRAME_HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            payload = bytes(self._buffer[FRAME_HEADER.size:end])
+            del self._buffer[:end]
+            if header & COMPRESSED_FLAG:
+                if self._decompressor is None:
+                    raise ValueError("收到压缩消息，但连接未协商压缩")
+                try:
+                    payload = self._decompressor.decompress(payload, self.max_frame_bytes)
+                except ValueError:
+                    raise
+                except Exception as e:
+                    raise ValueError(f"解压失败: {e}")
+            messages.append(deserialize(payload, self.encoding))
+        return messages
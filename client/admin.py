@@ -1,4 +1,3 @@
-import os
 from PyQt5.QtWidgets import (
     QComboBox,
     QDateEdit,
@@ -12,14 +11,21 @@ from PyQt5.QtWidgets import (
     QPushButton,
     QScrollArea,
     QTabWidget,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QTextEdit,
     QVBoxLayout,
     QWidget,
 )
-from PyQt5.QtCore import Qt, QDate
-from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QDate, QTime, QTimer
+
+try:
+    from charts import BarChart, HeatmapChart
+    from table_models import ActionButtonDelegate, PagedTableModel
+except ImportError:
+    from client.charts import BarChart, HeatmapChart
+    from client.table_models import ActionButtonDelegate, PagedTableModel
 
 
 class AdminWidget(QWidget):
@@ -32,7 +38,7 @@ class AdminWidget(QWidget):
         self.setStyleSheet(
             """
             QWidget { background-color: #f8fafc; color: #0f172a; }
-            QTableWidget { background: white; border: 1px solid #e5e7eb; }
+            QTableWidget, QTableView { background: white; border: 1px solid #e5e7eb; }
             QHeaderView::section { background: #f1f5f9; padding: 6px; border: none; }
             """
         )
@@ -52,6 +58,8 @@ class AdminWidget(QWidget):
         self.setup_announcement_tab()
         self.setup_analytics_tab()
 
+    ANALYTICS_REFRESH_MS = 60 * 1000
+
     def setup_analytics_tab(self):
         self.analytics_tab = QWidget()
         self.tabs.addTab(self.analytics_tab, "数据分析")
@@ -68,27 +76,89 @@ class AdminWidget(QWidget):
         container_layout.setContentsMargins(16, 16, 16, 16)
         container_layout.setSpacing(16)
 
-        base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "stats_output"))
-        images = [
-            ("场馆预约热力图", "heatmap.png"),
-            ("用户运动趋势", "user_stats.png"),
-            ("场馆预约统计", "venue_stats.png"),
-        ]
-
-        for title, filename in images:
+        # 统计时间范围 (留空由服务器使用默认范围：场馆 30 天、热力图 90 天)
+        range_layout = QHBoxLayout()
+        self.stats_start = QDateEdit(QDate.currentDate().addDays(-30))
+        self.stats_start.setCalendarPopup(True)
+        self.stats_end = QDateEdit(QDate.currentDate())
+        self.stats_end.setCalendarPopup(True)
+        btn_refresh = QPushButton("刷新")
+        btn_refresh.clicked.connect(self.load_analytics)
+        self.stats_status = QLabel("")
+        self.stats_status.setStyleSheet("color: #6b7280;")
+        range_layout.addWidget(QLabel("开始日期:"))
+        range_layout.addWidget(self.stats_start)
+        range_layout.addWidget(QLabel("结束日期:"))
+        range_layout.addWidget(self.stats_end)
+        range_layout.addWidget(btn_refresh)
+        range_layout.addStretch()
+        range_layout.addWidget(self.stats_status)
+        container_layout.addLayout(range_layout)
+
+        self.venue_count_chart = BarChart(self.brand_color)
+        self.venue_rate_chart = BarChart("#0ea5e9")
+        self.heatmap_chart = HeatmapChart(self.brand_color)
+        for title, chart in [
+            ("场馆预约次数", self.venue_count_chart),
+            ("场馆预约率", self.venue_rate_chart),
+            ("场馆预约热力图 (星期 x 时段)", self.heatmap_chart),
+        ]:
             title_label = QLabel(title)
             title_label.setStyleSheet("font-size: 16px; font-weight: 800;")
             container_layout.addWidget(title_label)
+            container_layout.addWidget(chart)
+        container_layout.addStretch()
+
+        # 分析页可见时定时刷新，切换到该页时立即刷新
+        self.analytics_timer = QTimer(self)
+        self.analytics_timer.setInterval(self.ANALYTICS_REFRESH_MS)
+        self.analytics_timer.timeout.connect(self.on_analytics_timer)
+        self.analytics_timer.start()
+        self.tabs.currentChanged.connect(lambda index: self.on_analytics_timer())
+        self.analytics_generation = 0
+        self.load_analytics()
+
+    def on_analytics_timer(self):
+        if self.tabs.currentWidget() is self.analytics_tab:
+            self.load_analytics()
+
+    def load_analytics(self):
+        """两项统计放在同一个只读快照批量请求中，图表数据互相一致"""
+        date_range = {
+            "start_date": self.stats_start.date().toString("yyyy-MM-dd"),
+            "end_date": self.stats_end.date().toString("yyyy-MM-dd"),
+        }
+        self.analytics_generation += 1
+        generation = self.analytics_generation
+        self.stats_status.setText("正在刷新...")
+        self.network.batch_async(
+            [("get_venue_stats", date_range), ("get_heatmap_data", date_range)],
+            snapshot=True,
+            callback=lambda results: self.on_analytics_loaded(generation, results),
+        )
 
-            img_label = QLabel()
-            img_label.setAlignment(Qt.AlignCenter)
-            img_path = os.path.join(base_dir, filename)
-            pixmap = QPixmap(img_path)
-            if pixmap.isNull():
-                img_label.setText(f"未找到图片：{filename}")
-            else:
-                img_label.setPixmap(pixmap.scaledToWidth(900, Qt.SmoothTransformation))
-            container_layout.addWidget(img_label)
+    def on_analytics_loaded(self, generation, results):
+        # 忽略被更新的刷新请求取代的旧响应
+        if generation != self.analytics_generation:
+            return
+        venue_res, heatmap_res = results
+        if venue_res.get("status") == "success":
+            venues = venue_res.get("data", [])
+            self.venue_count_chart.set_data(
+                [(v["venue_name"], v["reservation_count"], f"{v['reservation_count']} 次 / {v['total_hours']} 小时") for v in venues]
+            )
+            self.venue_rate_chart.set_data(
+                [(v["venue_name"], v["utilization_rate"], f"{v['utilization_rate']}% ({v['capacity_info']})") for v in venues]
+            )
+        else:
+            message = venue_res.get("message", "获取场馆统计失败")
+            self.venue_count_chart.set_message(message)
+            self.venue_rate_chart.set_message(message)
+        if heatmap_res.get("status") == "success":
+            self.heatmap_chart.set_data(heatmap_res.get("data", {}))
+        else:
+            self.heatmap_chart.set_message(heatmap_res.get("message", "获取热力图数据失败"))
+        self.stats_status.setText(f"更新于 {QTime.currentTime().toString('HH:mm:ss')}")
 
     # ---------------- 场馆管理 ---------------- #
     def setup_venue_tab(self):
@@ -116,41 +186,45 @@ class AdminWidget(QWidget):
 
     def load_venues(self):
         req = {"action": "admin_get_venues"}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            venues = res.get("data", [])
-            self.venue_table.setRowCount(len(venues))
-            for i, v in enumerate(venues):
-                self.venue_table.setItem(i, 0, QTableWidgetItem(str(v["venue_id"])))
-                self.venue_table.setItem(i, 1, QTableWidgetItem(v["venue_name"]))
-                self.venue_table.setItem(i, 2, QTableWidgetItem("室外" if v["is_outdoor"] else "室内"))
-                self.venue_table.setItem(i, 3, QTableWidgetItem(v["location"]))
-                self.venue_table.setItem(i, 4, QTableWidgetItem(v["description"]))
-
-                btn_widget = QWidget()
-                btn_layout = QHBoxLayout(btn_widget)
-                btn_layout.setContentsMargins(0, 0, 0, 0)
-
-                btn_courts = QPushButton("场地")
-                btn_courts.clicked.connect(
-                    lambda checked, vid=v["venue_id"], vname=v["venue_name"]: self.manage_courts(
-                        vid, vname
+        def on_response(res):
+            if res and res.get("status") == "success":
+                venues = res.get("data", [])
+                self.venues_cache = venues
+                if hasattr(self, "res_venue_filter"):
+                    self.fill_reservation_venue_filter()
+                self.venue_table.setRowCount(len(venues))
+                for i, v in enumerate(venues):
+                    self.venue_table.setItem(i, 0, QTableWidgetItem(str(v["venue_id"])))
+                    self.venue_table.setItem(i, 1, QTableWidgetItem(v["venue_name"]))
+                    self.venue_table.setItem(i, 2, QTableWidgetItem("室外" if v["is_outdoor"] else "室内"))
+                    self.venue_table.setItem(i, 3, QTableWidgetItem(v["location"]))
+                    self.venue_table.setItem(i, 4, QTableWidgetItem(v["description"]))
+
+                    btn_widget = QWidget()
+                    btn_layout = QHBoxLayout(btn_widget)
+                    btn_layout.setContentsMargins(0, 0, 0, 0)
+
+                    btn_courts = QPushButton("场地")
+                    btn_courts.clicked.connect(
+                        lambda checked, vid=v["venue_id"], vname=v["venue_name"]: self.manage_courts(
+                            vid, vname
+                        )
                     )
-                )
 
-                btn_edit = QPushButton("编辑")
-                btn_edit.clicked.connect(lambda checked, venue=v: self.edit_venue_dialog(venue))
+                    btn_edit = QPushButton("编辑")
+                    btn_edit.clicked.connect(lambda checked, venue=v: self.edit_venue_dialog(venue))
 
-                btn_del = QPushButton("删除")
-                btn_del.setStyleSheet("color: red;")
-                btn_del.clicked.connect(lambda checked, vid=v["venue_id"]: self.delete_venue(vid))
+                    btn_del = QPushButton("删除")
+                    btn_del.setStyleSheet("color: red;")
+                    btn_del.clicked.connect(lambda checked, vid=v["venue_id"]: self.delete_venue(vid))
 
-                btn_layout.addWidget(btn_courts)
-                btn_layout.addWidget(btn_edit)
-                btn_layout.addWidget(btn_del)
-                self.venue_table.setCellWidget(i, 5, btn_widget)
-        else:
-            QMessageBox.warning(self, "错误", res.get("message", "获取场馆失败"))
+                    btn_layout.addWidget(btn_courts)
+                    btn_layout.addWidget(btn_edit)
+                    btn_layout.addWidget(btn_del)
+                    self.venue_table.setCellWidget(i, 5, btn_widget)
+            else:
+                QMessageBox.warning(self, "错误", res.get("message", "获取场馆失败"))
+        self.network.send_async(req, callback=on_response)
 
     def edit_venue_dialog(self, venue):
         dialog = QDialog(self)
@@ -195,13 +269,14 @@ class AdminWidget(QWidget):
                 "description": desc,
             },
         }
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            QMessageBox.information(dialog, "成功", "更新成功")
-            dialog.accept()
-            self.load_venues()
-        else:
-            QMessageBox.warning(dialog, "错误", res.get("message", "更新失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                QMessageBox.information(dialog, "成功", "更新成功")
+                dialog.accept()
+                self.load_venues()
+            else:
+                QMessageBox.warning(dialog, "错误", res.get("message", "更新失败"))
+        self.network.send_async(req, callback=on_response)
 
     def add_venue_dialog(self):
         dialog = QDialog(self)
@@ -242,13 +317,14 @@ class AdminWidget(QWidget):
                 "description": desc,
             },
         }
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            QMessageBox.information(dialog, "成功", "添加成功")
-            dialog.accept()
-            self.load_venues()
-        else:
-            QMessageBox.warning(dialog, "错误", res.get("message", "添加失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                QMessageBox.information(dialog, "成功", "添加成功")
+                dialog.accept()
+                self.load_venues()
+            else:
+                QMessageBox.warning(dialog, "错误", res.get("message", "添加失败"))
+        self.network.send_async(req, callback=on_response)
 
     def delete_venue(self, venue_id):
         reply = QMessageBox.question(
@@ -260,11 +336,12 @@ class AdminWidget(QWidget):
         )
         if reply == QMessageBox.Yes:
             req = {"action": "admin_delete_venue", "data": {"venue_id": venue_id}}
-            res = self.network.send_request(req)
-            if res and res.get("status") == "success":
-                self.load_venues()
-            else:
-                QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+            def on_response(res):
+                if res and res.get("status") == "success":
+                    self.load_venues()
+                else:
+                    QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+            self.network.send_async(req, callback=on_response)
 
     def manage_courts(self, venue_id, venue_name):
         dialog = QDialog(self)
@@ -293,82 +370,142 @@ class AdminWidget(QWidget):
 
     def load_courts(self, venue_id):
         req = {"action": "admin_get_courts", "data": {"venue_id": venue_id}}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            courts = res.get("data", [])
-            self.court_table.setRowCount(len(courts))
-            for i, c in enumerate(courts):
-                self.court_table.setItem(i, 0, QTableWidgetItem(str(c["court_id"])))
-                self.court_table.setItem(i, 1, QTableWidgetItem(c["court_name"]))
-
-                btn_del = QPushButton("删除")
-                btn_del.setStyleSheet("color: red;")
-                btn_del.clicked.connect(lambda checked, cid=c["court_id"]: self.delete_court(cid, venue_id))
-                self.court_table.setCellWidget(i, 2, btn_del)
+        def on_response(res):
+            if res and res.get("status") == "success":
+                courts = res.get("data", [])
+                self.court_table.setRowCount(len(courts))
+                for i, c in enumerate(courts):
+                    self.court_table.setItem(i, 0, QTableWidgetItem(str(c["court_id"])))
+                    self.court_table.setItem(i, 1, QTableWidgetItem(c["court_name"]))
+
+                    btn_del = QPushButton("删除")
+                    btn_del.setStyleSheet("color: red;")
+                    btn_del.clicked.connect(lambda checked, cid=c["court_id"]: self.delete_court(cid, venue_id))
+                    self.court_table.setCellWidget(i, 2, btn_del)
+        self.network.send_async(req, callback=on_response)
 
     def add_court(self, venue_id, name, dialog):
         if not name:
             return
         req = {"action": "admin_add_court", "data": {"venue_id": venue_id, "name": name}}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            self.load_courts(venue_id)
-        else:
-            QMessageBox.warning(dialog, "错误", res.get("message", "添加失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                self.load_courts(venue_id)
+            else:
+                QMessageBox.warning(dialog, "错误", res.get("message", "添加失败"))
+        self.network.send_async(req, callback=on_response)
 
     def delete_court(self, court_id, venue_id):
         req = {"action": "admin_delete_court", "data": {"court_id": court_id}}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            self.load_courts(venue_id)
-        else:
-            QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                self.load_courts(venue_id)
+            else:
+                QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+        self.network.send_async(req, callback=on_response)
 
     # ---------------- 用户管理 ---------------- #
+    USER_PAGE_SIZE = 100
+    USER_SORT_OPTIONS = [
+        ("按账号", "account"),
+        ("按姓名", "name"),
+        ("信用分从低到高", "credit_asc"),
+        ("信用分从高到低", "credit_desc"),
+        ("最新注册", "create_time"),
+    ]
+
     def setup_user_tab(self):
         self.user_tab = QWidget()
         self.tabs.addTab(self.user_tab, "用户管理")
         layout = QVBoxLayout(self.user_tab)
 
-        btn_refresh = QPushButton("刷新列表")
+        # 搜索与排序 (服务器端分页)
+        search_layout = QHBoxLayout()
+        self.user_search = QLineEdit()
+        self.user_search.setPlaceholderText("账号 / 姓名 / 电话 前缀搜索")
+        self.user_search.returnPressed.connect(self.load_users)
+        self.user_sort = QComboBox()
+        for text, value in self.USER_SORT_OPTIONS:
+            self.user_sort.addItem(text, value)
+        self.user_sort.currentIndexChanged.connect(self.load_users)
+        btn_refresh = QPushButton("搜索/刷新")
         btn_refresh.clicked.connect(self.load_users)
-        layout.addWidget(btn_refresh)
-
-        self.user_table = QTableWidget()
-        self.user_table.setColumnCount(6)
-        self.user_table.setHorizontalHeaderLabels(["账号", "姓名", "角色", "电话", "信用分", "操作"])
+        search_layout.addWidget(self.user_search)
+        search_layout.addWidget(self.user_sort)
+        search_layout.addWidget(btn_refresh)
+        layout.addLayout(search_layout)
+
+        # 模型/视图：滚动到底部时才向服务器取下一页，不为每行创建按钮控件
+        self.user_model = PagedTableModel(
+            [
+                ("账号", lambda u: u["account"]),
+                ("姓名", lambda u: u["name"]),
+                ("角色", lambda u: u["role"]),
+                ("电话", lambda u: u["phone"]),
+                ("信用分", lambda u: u["credit_score"]),
+                ("操作", lambda u: ""),
+            ],
+            self.fetch_users_page,
+            self,
+        )
+        self.user_model.rowsInserted.connect(self.update_user_count_label)
+        self.user_model.modelReset.connect(self.update_user_count_label)
+        self.user_model.load_failed.connect(lambda message: QMessageBox.warning(self, "错误", message))
+        self.user_table = QTableView()
+        self.user_table.setModel(self.user_model)
+        self.user_table.setSelectionBehavior(QTableView.SelectRows)
+        self.user_table.verticalHeader().setVisible(False)
         self.user_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.user_actions = ActionButtonDelegate(
+            lambda u: [("edit", "编辑", None), ("delete", "删除", "red")], self.user_table
+        )
+        self.user_actions.clicked.connect(self.on_user_action)
+        self.user_table.setItemDelegateForColumn(5, self.user_actions)
         layout.addWidget(self.user_table)
 
+        self.user_count_label = QLabel("")
+        self.user_count_label.setAlignment(Qt.AlignRight)
+        layout.addWidget(self.user_count_label)
+
         self.load_users()
 
     def load_users(self):
-        req = {"action": "admin_get_users"}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            users = res.get("data", [])
-            self.user_table.setRowCount(len(users))
-            for i, u in enumerate(users):
-                self.user_table.setItem(i, 0, QTableWidgetItem(u["account"]))
-                self.user_table.setItem(i, 1, QTableWidgetItem(u["name"]))
-                self.user_table.setItem(i, 2, QTableWidgetItem(u["role"]))
-                self.user_table.setItem(i, 3, QTableWidgetItem(u["phone"]))
-                self.user_table.setItem(i, 4, QTableWidgetItem(str(u["credit_score"])))
-
-                btn_widget = QWidget()
-                btn_layout = QHBoxLayout(btn_widget)
-                btn_layout.setContentsMargins(0, 0, 0, 0)
-
-                btn_edit = QPushButton("编辑")
-                btn_edit.clicked.connect(lambda checked, user=u: self.edit_user_dialog(user))
-
-                btn_del = QPushButton("删除")
-                btn_del.setStyleSheet("color: red;")
-                btn_del.clicked.connect(lambda checked, acc=u["account"]: self.delete_user(acc))
-
-                btn_layout.addWidget(btn_edit)
-                btn_layout.addWidget(btn_del)
-                self.user_table.setCellWidget(i, 5, btn_widget)
+        """按当前搜索条件从第一页重新加载"""
+        self.user_model.reload()
+
+    def fetch_users_page(self, page, callback):
+        """PagedTableModel 的取数函数，token 为页码"""
+        page = page or 1
+        req = {
+            "action": "admin_get_users",
+            "data": {
+                "page": page,
+                "page_size": self.USER_PAGE_SIZE,
+                "sort": self.user_sort.currentData(),
+                "keyword": self.user_search.text().strip(),
+            },
+        }
+        def on_response(res):
+            if res and res.get("status") == "success":
+                users = res.get("data", [])
+                total = res.get("total", len(users))
+                has_more = page * self.USER_PAGE_SIZE < total
+                callback(True, users, page + 1 if has_more else None, total)
+            else:
+                callback(False, res.get("message", "获取用户失败"))
+        self.network.send_async(req, callback=on_response)
+
+    def update_user_count_label(self):
+        total = self.user_model.total
+        loaded = self.user_model.rowCount()
+        self.user_count_label.setText("" if total is None else f"已加载 {loaded} / {total} 人")
+
+    def on_user_action(self, row, action):
+        user = self.user_model.row_data(row)
+        if action == "edit":
+            self.edit_user_dialog(user)
+        elif action == "delete":
+            self.delete_user(user["account"])
 
     def edit_user_dialog(self, user):
         dialog = QDialog(self)
@@ -439,14 +576,14 @@ class AdminWidget(QWidget):
                 "credit_score": score_int
             },
         }
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            QMessageBox.information(dialog, "成功", "更新成功")
-            dialog.accept()
-            self.load_users() # 刷新列表
-            self.load_users()
-        else:
-            QMessageBox.warning(dialog, "错误", res.get("message", "更新失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                QMessageBox.information(dialog, "成功", "更新成功")
+                dialog.accept()
+                self.load_users() # 重新加载列表
+            else:
+                QMessageBox.warning(dialog, "错误", res.get("message", "更新失败"))
+        self.network.send_async(req, callback=on_response)
 
     def delete_user(self, account):
         reply = QMessageBox.question(
@@ -458,52 +595,131 @@ class AdminWidget(QWidget):
         )
         if reply == QMessageBox.Yes:
             req = {"action": "admin_delete_user", "data": {"account": account}}
-            res = self.network.send_request(req)
-            if res and res.get("status") == "success":
-                self.load_users()
-            else:
-                QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+            def on_response(res):
+                if res and res.get("status") == "success":
+                    self.load_users()
+                else:
+                    QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+            self.network.send_async(req, callback=on_response)
 
     # ---------------- 预约管理 ---------------- #
+    RES_PAGE_SIZE = 100
+    RES_STATUS_OPTIONS = [
+        ("全部状态", None),
+        ("已预约", "confirmed"),
+        ("排队中", "queued"),
+        ("已签到", "checked_in"),
+        ("已取消", "cancelled"),
+        ("教师占用取消", "cancelled_by_teacher"),
+        ("爽约", "no_show"),
+    ]
+
     def setup_reservation_tab(self):
         self.res_tab = QWidget()
         self.tabs.addTab(self.res_tab, "预约管理")
         layout = QVBoxLayout(self.res_tab)
 
-        btn_refresh = QPushButton("刷新列表")
-        btn_refresh.clicked.connect(self.load_reservations)
-        layout.addWidget(btn_refresh)
-
-        self.res_table = QTableWidget()
-        self.res_table.setColumnCount(7)
-        self.res_table.setHorizontalHeaderLabels(["ID", "用户", "场馆", "场地", "日期", "时间", "状态/操作"])
+        # 筛选条件 (全部由服务器端 SQL 过滤)
+        filter_layout = QHBoxLayout()
+        self.res_user_filter = QLineEdit()
+        self.res_user_filter.setPlaceholderText("用户账号")
+        self.res_venue_filter = QComboBox()
+        self.fill_reservation_venue_filter()
+        self.res_status_filter = QComboBox()
+        for text, value in self.RES_STATUS_OPTIONS:
+            self.res_status_filter.addItem(text, value)
+        self.res_start_filter = QLineEdit()
+        self.res_start_filter.setPlaceholderText("开始日期 YYYY-MM-DD")
+        self.res_end_filter = QLineEdit()
+        self.res_end_filter.setPlaceholderText("结束日期 YYYY-MM-DD")
+        btn_search = QPushButton("查询")
+        btn_search.clicked.connect(self.load_reservations)
+        for widget in [
+            self.res_user_filter,
+            self.res_venue_filter,
+            self.res_status_filter,
+            self.res_start_filter,
+            self.res_end_filter,
+            btn_search,
+        ]:
+            filter_layout.addWidget(widget)
+        layout.addLayout(filter_layout)
+
+        self.res_model = PagedTableModel(
+            [
+                ("ID", lambda r: r["id"]),
+                ("用户", lambda r: r["user"]),
+                ("场馆", lambda r: r["venue"]),
+                ("场地", lambda r: r["court"]),
+                ("日期", lambda r: r["date"]),
+                ("时间", lambda r: r["time"]),
+                ("状态/操作", lambda r: r["status"]),
+            ],
+            self.fetch_reservations_page,
+            self,
+        )
+        self.res_model.load_failed.connect(lambda message: QMessageBox.warning(self, "错误", message))
+        self.res_table = QTableView()
+        self.res_table.setModel(self.res_model)
+        self.res_table.setSelectionBehavior(QTableView.SelectRows)
+        self.res_table.verticalHeader().setVisible(False)
         self.res_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # 只有已预约的记录显示"强制取消"按钮，其余显示状态文本
+        self.res_actions = ActionButtonDelegate(
+            lambda r: [("cancel", "强制取消", "red")] if r["status"] == "confirmed" else [],
+            self.res_table,
+        )
+        self.res_actions.clicked.connect(
+            lambda row, action: self.cancel_reservation(self.res_model.row_data(row)["id"])
+        )
+        self.res_table.setItemDelegateForColumn(6, self.res_actions)
         layout.addWidget(self.res_table)
 
         self.load_reservations()
 
+    def fill_reservation_venue_filter(self):
+        current = self.res_venue_filter.currentData()
+        self.res_venue_filter.clear()
+        self.res_venue_filter.addItem("全部场馆", None)
+        for v in getattr(self, "venues_cache", []):
+            self.res_venue_filter.addItem(v["venue_name"], v["venue_id"])
+        index = self.res_venue_filter.findData(current)
+        self.res_venue_filter.setCurrentIndex(max(0, index))
+
+    def reservation_filters(self):
+        filters = {"limit": self.RES_PAGE_SIZE}
+        user = self.res_user_filter.text().strip()
+        if user:
+            filters["user_account"] = user
+        if self.res_venue_filter.currentData():
+            filters["venue_id"] = self.res_venue_filter.currentData()
+        if self.res_status_filter.currentData():
+            filters["status"] = self.res_status_filter.currentData()
+        start = self.res_start_filter.text().strip()
+        if start:
+            filters["start_date"] = start
+        end = self.res_end_filter.text().strip()
+        if end:
+            filters["end_date"] = end
+        return filters
+
     def load_reservations(self):
-        req = {"action": "admin_get_all_reservations"}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            reservations = res.get("data", [])
-            self.res_table.setRowCount(len(reservations))
-            for i, r in enumerate(reservations):
-                self.res_table.setItem(i, 0, QTableWidgetItem(str(r["id"])))
-                self.res_table.setItem(i, 1, QTableWidgetItem(r["user"]))
-                self.res_table.setItem(i, 2, QTableWidgetItem(r["venue"]))
-                self.res_table.setItem(i, 3, QTableWidgetItem(r["court"]))
-                self.res_table.setItem(i, 4, QTableWidgetItem(r["date"]))
-                self.res_table.setItem(i, 5, QTableWidgetItem(r["time"]))
-
-                status = r["status"]
-                if status == "confirmed":
-                    btn_cancel = QPushButton("强制取消")
-                    btn_cancel.setStyleSheet("color: red;")
-                    btn_cancel.clicked.connect(lambda checked, rid=r["id"]: self.cancel_reservation(rid))
-                    self.res_table.setCellWidget(i, 6, btn_cancel)
-                else:
-                    self.res_table.setItem(i, 6, QTableWidgetItem(status))
+        """按当前筛选条件重新加载第一页"""
+        self.res_model.reload()
+
+    def fetch_reservations_page(self, cursor, callback):
+        """PagedTableModel 的取数函数，token 为服务器返回的游标"""
+        data = self.reservation_filters()
+        if cursor:
+            data["cursor"] = cursor
+        req = {"action": "admin_get_all_reservations", "data": data}
+        def on_response(res):
+            if res and res.get("status") == "success":
+                next_cursor = res.get("next_cursor") if res.get("has_more") else None
+                callback(True, res.get("data", []), next_cursor)
+            else:
+                callback(False, res.get("message", "获取预约失败"))
+        self.network.send_async(req, callback=on_response)
 
     def cancel_reservation(self, res_id):
         reply = QMessageBox.question(
@@ -511,11 +727,12 @@ class AdminWidget(QWidget):
         )
         if reply == QMessageBox.Yes:
             req = {"action": "admin_cancel_reservation", "data": {"reservation_id": res_id}}
-            res = self.network.send_request(req)
-            if res and res.get("status") == "success":
-                self.load_reservations()
-            else:
-                QMessageBox.warning(self, "错误", res.get("message", "取消失败"))
+            def on_response(res):
+                if res and res.get("status") == "success":
+                    self.load_reservations()
+                else:
+                    QMessageBox.warning(self, "错误", res.get("message", "取消失败"))
+            self.network.send_async(req, callback=on_response)
 
     # ---------------- 公告管理 ---------------- #
     def setup_announcement_tab(self):
@@ -542,7 +759,16 @@ class AdminWidget(QWidget):
         form_layout.addRow(btn_pub)
         layout.addLayout(form_layout)
 
-        layout.addWidget(QLabel("有效公告列表:"))
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(QLabel("有效公告列表:"))
+        self.ann_search = QLineEdit()
+        self.ann_search.setPlaceholderText("检索标题/内容 (多个关键词用空格分隔)")
+        self.ann_search.returnPressed.connect(self.load_announcements)
+        btn_search = QPushButton("检索")
+        btn_search.clicked.connect(self.load_announcements)
+        search_layout.addWidget(self.ann_search)
+        search_layout.addWidget(btn_search)
+        layout.addLayout(search_layout)
         self.ann_table = QTableWidget()
         self.ann_table.setColumnCount(5)
         self.ann_table.setHorizontalHeaderLabels(["ID", "标题", "内容", "有效期", "操作"])
@@ -569,36 +795,49 @@ class AdminWidget(QWidget):
             "action": "admin_add_announcement",
             "data": {"title": title, "content": content, "start_date": start, "end_date": end},
         }
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            QMessageBox.information(self, "成功", "发布成功")
-            self.ann_title.clear()
-            self.ann_content.clear()
-            self.load_announcements()
-        else:
-            QMessageBox.warning(self, "错误", res.get("message", "发布失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                QMessageBox.information(self, "成功", "发布成功")
+                self.ann_title.clear()
+                self.ann_content.clear()
+                self.load_announcements()
+            else:
+                QMessageBox.warning(self, "错误", res.get("message", "发布失败"))
+        self.network.send_async(req, callback=on_response)
 
     def load_announcements(self):
-        req = {"action": "get_announcements"}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            anns = res.get("data", [])
-            self.ann_table.setRowCount(len(anns))
-            for i, a in enumerate(anns):
-                self.ann_table.setItem(i, 0, QTableWidgetItem(str(a["id"])))
-                self.ann_table.setItem(i, 1, QTableWidgetItem(a["title"]))
-                self.ann_table.setItem(i, 2, QTableWidgetItem(a["content"]))
-                self.ann_table.setItem(i, 3, QTableWidgetItem(f"{a['start_date']} ~ {a['end_date']}"))
-
-                btn_del = QPushButton("删除")
-                btn_del.setStyleSheet("color: red;")
-                btn_del.clicked.connect(lambda checked, aid=a["id"]: self.delete_announcement(aid))
-                self.ann_table.setCellWidget(i, 4, btn_del)
+        keyword = self.ann_search.text().strip()
+        if keyword:
+            # 有检索词时走服务器全文检索，只返回命中摘要
+            req = {"action": "search_announcements", "data": {"keyword": keyword}}
+        else:
+            req = {"action": "get_announcements"}
+        def on_response(res):
+            if res and res.get("status") == "success":
+                anns = res.get("data", [])
+                self.ann_table.setRowCount(len(anns))
+                for i, a in enumerate(anns):
+                    self.ann_table.setItem(i, 0, QTableWidgetItem(str(a["id"])))
+                    if keyword:
+                        self.ann_table.setItem(i, 1, QTableWidgetItem(a["title_snippet"]))
+                        self.ann_table.setItem(i, 2, QTableWidgetItem(a["content_snippet"]))
+                        self.ann_table.setItem(i, 3, QTableWidgetItem(f"{a['author_name']} · {a['create_time']}"))
+                    else:
+                        self.ann_table.setItem(i, 1, QTableWidgetItem(a["title"]))
+                        self.ann_table.setItem(i, 2, QTableWidgetItem(a["content"]))
+                        self.ann_table.setItem(i, 3, QTableWidgetItem(f"{a['start_date']} ~ {a['end_date']}"))
+
+                    btn_del = QPushButton("删除")
+                    btn_del.setStyleSheet("color: red;")
+                    btn_del.clicked.connect(lambda checked, aid=a["id"]: self.delete_announcement(aid))
+                    self.ann_table.setCellWidget(i, 4, btn_del)
+        self.network.send_async(req, callback=on_response)
 
     def delete_announcement(self, ann_id):
         req = {"action": "admin_delete_announcement", "data": {"ann_id": ann_id}}
-        res = self.network.send_request(req)
-        if res and res.get("status") == "success":
-            self.load_announcements()
-        else:
-            QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+        def on_response(res):
+            if res and res.get("status") == "success":
+                self.load_announcements()
+            else:
+                QMessageBox.warning(self, "错误", res.get("message", "删除失败"))
+        self.network.send_async(req, callback=on_response)
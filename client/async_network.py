@@ -0,0 +1,111 @@
+import itertools
+import queue
+from concurrent.futures import Future
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+
+class RequestWorker(QThread):
+    """
+    后台网络线程
+    按提交顺序依次执行队列中的任务，结果通过信号交回 GUI 线程，
+    因此界面线程永远不会阻塞在 socket 上。
+    任务返回 Future 时 (流水线请求) 不等待其完成，响应到达后再发射信号，
+    所以多个请求可以同时在途。
+    """
+
+    task_finished = pyqtSignal(int, object)  # request_id, 结果
+
+    def __init__(self):
+        super().__init__()
+        self.tasks = queue.Queue()
+
+    def submit(self, request_id, func):
+        self.tasks.put((request_id, func))
+
+    def stop(self):
+        # 丢弃尚未开始的任务，只等待正在执行的一个
+        while True:
+            try:
+                self.tasks.get_nowait()
+            except queue.Empty:
+                break
+        self.tasks.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            request_id, func = task
+            try:
+                result = func()
+            except Exception as e:
+                result = {"status": "error", "message": f"通信错误: {str(e)}"}
+            if isinstance(result, Future):
+                # 由读取线程在响应到达时回调
+                result.add_done_callback(
+                    lambda future, rid=request_id: self.task_finished.emit(rid, future.result())
+                )
+                continue
+            self.task_finished.emit(request_id, result)
+
+
+class AsyncNetwork(QObject):
+    """
+    NetworkClient 的异步包装 (需在 GUI 线程中创建)
+
+    每个请求分配一个 request_id，返回 concurrent.futures.Future；
+    callback 以及 response_received 信号都在 GUI 线程中触发，可以直接操作界面控件。
+    """
+
+    response_received = pyqtSignal(int, object)  # request_id, 响应
+    push_received = pyqtSignal(object)  # 服务器主动推送的消息 (如号源变化)
+
+    def __init__(self, network_client):
+        super().__init__()
+        self.network = network_client
+        self._ids = itertools.count(1)
+        self._pending = {}  # request_id -> (future, callback)
+        self.worker = RequestWorker()
+        # worker 在后台线程发射信号，Qt 自动排队到本对象所在的 GUI 线程执行
+        self.worker.task_finished.connect(self._on_task_finished)
+        self.worker.start()
+        # 推送在读取线程中到达，经信号排队到 GUI 线程
+        self.network.add_push_handler(self.push_received.emit)
+
+    def submit(self, func, callback=None):
+        """在网络线程中执行任意函数 (如 connect)，返回 Future"""
+        request_id = next(self._ids)
+        future = Future()
+        future.request_id = request_id
+        future.set_running_or_notify_cancel()
+        self._pending[request_id] = (future, callback)
+        self.worker.submit(request_id, func)
+        return future
+
+    def request(self, action, data=None, callback=None):
+        """
+        异步发送请求，参数与 NetworkClient.send_request 相同
+        请求在网络线程中发出 (必要时先连接) 后立即处理下一个，多个请求在同一连接上流水线发送
+        """
+        return self.submit(lambda: self.network.submit_request(action, data), callback)
+
+    def shutdown(self):
+        self.worker.stop()
+        for future, _ in self._pending.values():
+            future.set_result({"status": "error", "message": "客户端已关闭"})
+        self._pending.clear()
+
+    def _on_task_finished(self, request_id, result):
+        future, callback = self._pending.pop(request_id, (None, None))
+        if future is None:
+            return
+        future.set_result(result)
+        self.response_received.emit(request_id, result)
+        if callback:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"请求 {request_id} 的回调处理出错: {e}")
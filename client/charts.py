@@ -0,0 +1,173 @@
+from PyQt5.QtCore import QEasingCurve, QRectF, Qt, QVariantAnimation
+from PyQt5.QtGui import QColor, QFont, QPainter
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+
+class AnimatedChart(QWidget):
+    """
+    轻量原生图表基类 (直接用 QPainter 绘制，不依赖 matplotlib)
+    set_values 时从旧数值过渡到新数值，刷新只重绘本控件，不重建界面
+    """
+
+    ANIMATION_MS = 300
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.message = "加载中..."
+        self._from = {}
+        self._to = {}
+        self._progress = 1.0
+        self._animation = QVariantAnimation(self)
+        self._animation.setStartValue(0.0)
+        self._animation.setEndValue(1.0)
+        self._animation.setDuration(self.ANIMATION_MS)
+        self._animation.setEasingCurve(QEasingCurve.OutCubic)
+        self._animation.valueChanged.connect(self._on_progress)
+
+    def set_values(self, values):
+        """values: {key: 数值}，新增的键从 0 开始增长，消失的键直接移除"""
+        self._from = {key: self.value(key) for key in values}
+        self._to = dict(values)
+        self.message = None
+        self._animation.stop()
+        self._progress = 0.0
+        self._animation.start()
+
+    def set_message(self, message):
+        """无数据或加载失败时显示提示文字"""
+        self.message = message
+        self.update()
+
+    def value(self, key):
+        start = self._from.get(key, 0)
+        end = self._to.get(key, 0)
+        return start + (end - start) * self._progress
+
+    def _on_progress(self, progress):
+        self._progress = progress
+        self.update()
+
+    def paint_message(self, painter):
+        painter.setPen(QColor("#9ca3af"))
+        painter.drawText(self.rect(), Qt.AlignCenter, self.message)
+
+
+class BarChart(AnimatedChart):
+    """横向柱状图：每行一个类别，柱长为数值，右侧显示标注文字"""
+
+    ROW_HEIGHT = 30
+    LABEL_WIDTH = 140
+    NOTE_WIDTH = 150
+
+    def __init__(self, color="#84cc16", parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+        self.categories = []
+        self.notes = {}
+        self.setFixedHeight(self.ROW_HEIGHT * 3)
+
+    def set_data(self, items):
+        """items: [(类别, 数值, 标注文字), ...] 按给定顺序绘制"""
+        self.categories = [name for name, _, _ in items]
+        self.notes = {name: note for name, _, note in items}
+        self.setFixedHeight(self.ROW_HEIGHT * max(3, len(items)) + 10)
+        if items:
+            self.set_values({name: value for name, value, _ in items})
+        else:
+            self.set_message("所选时间范围内暂无数据")
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        if self.message:
+            self.paint_message(painter)
+            return
+
+        max_value = max([self._to.get(name, 0) for name in self.categories] + [1])
+        bar_area = max(10, self.width() - self.LABEL_WIDTH - self.NOTE_WIDTH - 20)
+        for i, name in enumerate(self.categories):
+            top = 5 + i * self.ROW_HEIGHT
+            painter.setPen(QColor("#374151"))
+            painter.drawText(
+                QRectF(0, top, self.LABEL_WIDTH - 10, self.ROW_HEIGHT),
+                Qt.AlignRight | Qt.AlignVCenter,
+                name,
+            )
+            value = self.value(name)
+            width = bar_area * value / max_value
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.color)
+            painter.drawRoundedRect(QRectF(self.LABEL_WIDTH, top + 6, width, self.ROW_HEIGHT - 12), 4, 4)
+            painter.setPen(QColor("#6b7280"))
+            painter.drawText(
+                QRectF(self.LABEL_WIDTH + width + 8, top, self.NOTE_WIDTH + bar_area - width, self.ROW_HEIGHT),
+                Qt.AlignLeft | Qt.AlignVCenter,
+                self.notes.get(name, f"{value:.0f}"),
+            )
+
+
+class HeatmapChart(AnimatedChart):
+    """网格热力图：列为 x 轴标签，行为 y 轴标签，颜色深浅表示数值大小"""
+
+    CELL_HEIGHT = 26
+    LABEL_WIDTH = 60
+    HEADER_HEIGHT = 24
+
+    def __init__(self, color="#84cc16", parent=None):
+        super().__init__(parent)
+        self.color = QColor(color)
+        self.x_axis = []
+        self.y_axis = []
+        self.max_value = 0
+        self.setFixedHeight(self.HEADER_HEIGHT + self.CELL_HEIGHT * 13 + 10)
+
+    def set_data(self, heatmap):
+        """heatmap: get_heatmap_data 的结果 {"x_axis", "y_axis", "data": [[x, y, value], ...], "max_value"}"""
+        self.x_axis = heatmap.get("x_axis", [])
+        self.y_axis = heatmap.get("y_axis", [])
+        self.max_value = heatmap.get("max_value", 0)
+        self.setFixedHeight(self.HEADER_HEIGHT + self.CELL_HEIGHT * max(1, len(self.y_axis)) + 10)
+        self.set_values({(x, y): value for x, y, value in heatmap.get("data", [])})
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.message:
+            self.paint_message(painter)
+            return
+        if not self.x_axis or not self.y_axis:
+            return
+
+        cell_width = max(20, (self.width() - self.LABEL_WIDTH - 10) / len(self.x_axis))
+        small = QFont(self.font())
+        small.setPointSize(max(7, small.pointSize() - 1))
+        painter.setFont(small)
+
+        painter.setPen(QColor("#374151"))
+        for x, label in enumerate(self.x_axis):
+            painter.drawText(
+                QRectF(self.LABEL_WIDTH + x * cell_width, 0, cell_width, self.HEADER_HEIGHT),
+                Qt.AlignCenter,
+                label,
+            )
+        for y, label in enumerate(self.y_axis):
+            painter.setPen(QColor("#374151"))
+            painter.drawText(
+                QRectF(0, self.HEADER_HEIGHT + y * self.CELL_HEIGHT, self.LABEL_WIDTH - 8, self.CELL_HEIGHT),
+                Qt.AlignRight | Qt.AlignVCenter,
+                label,
+            )
+            for x in range(len(self.x_axis)):
+                value = self.value((x, y))
+                ratio = value / self.max_value if self.max_value else 0
+                color = QColor(self.color)
+                color.setAlphaF(0.08 + 0.92 * min(1.0, ratio))
+                rect = QRectF(
+                    self.LABEL_WIDTH + x * cell_width + 1,
+                    self.HEADER_HEIGHT + y * self.CELL_HEIGHT + 1,
+                    cell_width - 2,
+                    self.CELL_HEIGHT - 2,
+                )
+                painter.fillRect(rect, color)
+                painter.setPen(QColor("#111827") if ratio < 0.6 else QColor("white"))
+                painter.drawText(rect, Qt.AlignCenter, f"{value:.0f}")
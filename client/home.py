@@ -16,176 +16,34 @@ from PyQt5.QtWidgets import (
     QWidget,
     QMainWindow,
 )
-from PyQt5.QtCore import QDate, Qt, QThread, pyqtSignal, QTimer
+from PyQt5.QtCore import QDate, Qt, QTimer
 from PyQt5.QtGui import QColor, QFont, QPixmap, QIcon
-import requests
-from bs4 import BeautifulSoup
 import datetime
 import time
-import re
 
 # Import LoginWindow and NetworkClient
+# Role-specific dashboards are imported on first use (see load_teacher_dashboard / load_admin_widget):
+# most sessions are students who never open them, so they stay off the cold-start path.
 try:
     from log_in import LoginWindow, NetworkClient
-    from import_class import TeacherDashboard
-    from admin import AdminWidget
 except ImportError:
     from client.log_in import LoginWindow, NetworkClient
-    from client.admin import AdminWidget
 
 
-class WeatherCrawlerThread(QThread):
-    weather_fetched = pyqtSignal(str, str)  # 信号：天气类型和日期
-    error_occurred = pyqtSignal(str)  # 信号：错误信息
+def load_teacher_dashboard():
+    try:
+        from import_class import TeacherDashboard
+    except ImportError:
+        from client.import_class import TeacherDashboard
+    return TeacherDashboard
 
-    def __init__(self, date_str):
-        super().__init__()
-        self.date_str = date_str  # 格式：'YYYY-MM-DD'
 
-    def run(self):
-        try:
-            # 尝试从中国天气网获取数据
-            success = self.fetch_from_weather_com_cn()
-            if not success:
-                print(f"【自检结果】无法从天气网站获取数据，使用模拟数据")
-                self.fetch_mock_weather()
-        except Exception as e:
-            print(f"【自检结果】天气爬取异常: {str(e)}")
-            self.fetch_mock_weather()  # 出现异常时使用模拟数据
-
-    def fetch_from_weather_com_cn(self):
-        """从中国天气网获取天气信息"""
-        print(f"【开始爬取】尝试获取 {self.date_str} 的天气信息")
-        
-        # 中国天气网北京天气的URL
-        url = "https://www.weather.com.cn/weather/101010100.shtml"  # 北京
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0',
-        }
-        
-        try:
-            print(f"【请求发送】向 {url} 发送请求...")
-            response = requests.get(url, headers=headers, timeout=20)
-            print(f"【响应状态】HTTP {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"【自检结果】HTTP状态码错误: {response.status_code}")
-                return False
-                
-            response.encoding = 'utf-8'
-            print(f"【响应编码】{response.encoding}")
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 检查是否能正确解析页面
-            title_tag = soup.find('title')
-            if title_tag:
-                print(f"【页面标题】{title_tag.get_text()}")
-            else:
-                print(f"【自检结果】无法解析页面结构")
-                return False
-            
-            # 查找天气信息表格中的对应日期行
-            forecast_items = soup.find_all('li', class_='sky')
-            print(f"【解析结果】找到 {len(forecast_items)} 个天气预报条目")
-            
-            if not forecast_items:
-                print(f"【自检结果】未找到天气预报条目，可能页面结构已改变")
-                return False
-            
-            # 解析目标日期
-            target_date = datetime.datetime.strptime(self.date_str, '%Y-%m-%d')
-            target_month = target_date.month
-            target_day = target_date.day
-            
-            print(f"【查找目标】查找日期: {target_month}月{target_day}日")
-            
-            for i, item in enumerate(forecast_items):
-                date_span = item.find('h1')
-                weather_info = item.find('p', class_='wea')
-                
-                if date_span and weather_info:
-                    date_text = date_span.get_text(strip=True)
-                    weather_text = weather_info.get_text(strip=True)
-                    
-                    print(f"  - 条目 {i+1}: 日期='{date_text}', 天气='{weather_text}'")
-                    
-                    # 修复日期匹配逻辑
-                    # 中国天气网显示格式可能是 "22日（今天）" 这种格式
-                    # 我们需要提取日期数字部分进行匹配
-                    # 提取所有数字（日期）
-                    day_matches = re.findall(r'(\d+)日', date_text)
-                    if day_matches:
-                        found_day = int(day_matches[0])  # 获取第一个匹配的日
-                        print(f"    - 解析到日: {found_day}, 目标日: {target_day}")
-                        
-                        # 检查日期是否匹配
-                        if found_day == target_day:
-                            print(f"【自检结果】成功找到匹配的天气信息: {weather_text}")
-                            
-                            # 尝试获取温度信息
-                            temp_info = item.find('p', class_='tem')
-                            if temp_info:
-                                temp_text = temp_info.get_text(strip=True)
-                                print(f"    - 温度信息: {temp_text}")
-                                weather_text = f"{weather_text} {temp_text}"
-                            
-                            self.weather_fetched.emit(weather_text, self.date_str)
-                            return True
-                    else:
-                        print(f"    - 未找到日期数字")
-                else:
-                    print(f"  - 条目 {i+1}: 日期或天气信息缺失")
-            
-            print(f"【自检结果】未找到指定日期的天气信息")
-            return False
-                
-        except requests.Timeout:
-            print(f"【自检结果】请求超时 - 可能网络连接缓慢或网站响应时间过长")
-            return False
-        except requests.ConnectionError:
-            print(f"【自检结果】连接错误 - 可能网络连接问题或网站不可达")
-            return False
-        except requests.RequestException as e:
-            print(f"【自检结果】请求异常: {str(e)}")
-            return False
-        except Exception as e:
-            print(f"【自检结果】解析天气数据时出错: {str(e)}")
-            return False
-
-    def fetch_mock_weather(self):
-        """获取模拟天气数据"""
-        # 根据日期生成模拟天气
-        date_obj = datetime.datetime.strptime(self.date_str, '%Y-%m-%d')
-        day_of_year = date_obj.timetuple().tm_yday
-        
-        # 根据日期生成不同的天气（模拟）
-        weather_types = [
-            "晴", "多云", "阴", "小雨", "中雨", "大雨", "阵雨", 
-            "雷阵雨", "小雪", "中雪", "大雪", "雾", "霾"
-        ]
-        
-        # 使用日期作为种子生成相对稳定的天气
-        weather_index = day_of_year % len(weather_types)
-        weather_desc = weather_types[weather_index]
-        
-        # 添加温度信息（模拟）
-        temp_high = 15 + (day_of_year % 20)  # 15-35度
-        temp_low = temp_high - 10  # 昼夜温差10度
-        
-        weather_text = f"{weather_desc} {temp_low}°C ~ {temp_high}°C"
-        
-        print(f"【使用模拟数据】{weather_text}")
-        self.weather_fetched.emit(weather_text, self.date_str)
+def load_admin_widget():
+    try:
+        from admin import AdminWidget
+    except ImportError:
+        from client.admin import AdminWidget
+    return AdminWidget
 
 
 class HomeWindow(QMainWindow):
@@ -208,12 +66,12 @@ class HomeWindow(QMainWindow):
             "游泳馆": 9,
         }
 
-        # Initialize Network Client and connect immediately
+        # Initialize Network Client and connect in the background (UI never blocks on the socket)
         self.network = NetworkClient()
-        if self.network.connect():
-            print("Connected to server successfully")
-        else:
-            print("Failed to connect to server (Guest Mode)")
+        self.network.connect_async(self.on_connect_finished)
+        # Live slot capacity pushed by the server for the last searched venue/date
+        self.watched_slots = None
+        self.network.async_client.push_received.connect(self.on_push_received)
 
         self.setWindowTitle("GoSport · 校园场馆服务")
         self.resize(1280, 860)
@@ -247,8 +105,17 @@ class HomeWindow(QMainWindow):
         self.setup_home_page()
         self.setup_static_pages()
 
-        # 存储当前活跃的天气线程
-        self.active_weather_thread = None
+
+    def on_connect_finished(self, connected):
+        if connected:
+            print("Connected to server successfully")
+        else:
+            print("Failed to connect to server (Guest Mode)")
+
+    def closeEvent(self, event):
+        """Stop the background network thread before the window goes away"""
+        self.network.shutdown()
+        super().closeEvent(event)
 
     # ---------------------------- UI Scaffolding ---------------------------- #
     def setup_navbar(self):
@@ -430,14 +297,16 @@ class HomeWindow(QMainWindow):
             btn.setStyleSheet(active_style if btn == active_btn else base_style)
 
     def fetch_weather_for_today(self):
-        """获取今天天气信息并显示"""
+        """获取今天天气信息并显示 (由服务器缓存提供，不再直接访问天气网站)"""
         today = datetime.date.today().strftime("%Y-%m-%d")
-        
-        # 创建并启动爬虫线程
-        self.weather_thread = WeatherCrawlerThread(today)
-        self.weather_thread.weather_fetched.connect(self.update_weather_display)
-        self.weather_thread.error_occurred.connect(self.handle_weather_error)
-        self.weather_thread.start()
+
+        def on_response(resp):
+            if resp.get("status") == "success":
+                self.update_weather_display(resp["data"]["text"], today)
+            else:
+                self.handle_weather_error(resp.get("message", "未知错误"))
+
+        self.network.send_async("get_weather", {"date": today}, callback=on_response)
 
     def update_weather_display(self, weather_desc, date_str):
         """更新天气显示"""
@@ -766,37 +635,47 @@ class HomeWindow(QMainWindow):
 
     # ---------------------------- Other Pages ---------------------------- #
     def setup_static_pages(self):
+        """Register page builders only; each page is built the first time it is opened (get_page)"""
         self.pages = {}
-        self.pages["venues"] = self.build_cards_page(
-            "场馆一览",
-            [
-                ("篮球馆 · 4 块场地", "余量充足 · 提前 3 天可约", "#eef2ff"),
-                ("羽毛球馆 · 12 块场地", "晚间热门，请提前预约", "#ecfeff"),
-                ("游泳馆", "10 条泳道 · 需携带学生证入场", "#fefce8"),
-                ("室外田径场", "全天开放 · 每周一早间维护", "#f0fdf4"),
-            ],
-        )
-        self.pages["announcements"] = self.build_cards_page(
-            "公告 / 论坛",
-            [
-                ("场馆维护", "本周五 18:00-22:00 篮球馆封闭维护", "#fff7ed"),
-                ("预约规则", "爽约将扣信用分，连续 3 次将限制预约 7 天", "#e0f2fe"),
-                ("招募", "羽毛球校队招募助教与陪练", "#fef2f2"),
-            ],
-        )
-        self.pages["events"] = self.build_cards_page(
-            "校园赛事",
-            [
-                ("阳光长跑 · 打卡第 5 周", "体育场 400m × 5圈，完成即得学时", "#ecfeff"),
-                ("三对三篮球赛 · 复赛", "今晚 19:00 1/2/3 号场", "#eef2ff"),
-                ("羽毛球学院杯", "本周六全天，场馆对外开放至 12:00", "#f0fdf4"),
-            ],
-        )
-        self.pages["profile"] = self.build_profile_page()
-        self.pages["settings"] = self.build_settings_page()
+        self.page_builders = {
+            "venues": lambda: self.build_cards_page(
+                "场馆一览",
+                [
+                    ("篮球馆 · 4 块场地", "余量充足 · 提前 3 天可约", "#eef2ff"),
+                    ("羽毛球馆 · 12 块场地", "晚间热门，请提前预约", "#ecfeff"),
+                    ("游泳馆", "10 条泳道 · 需携带学生证入场", "#fefce8"),
+                    ("室外田径场", "全天开放 · 每周一早间维护", "#f0fdf4"),
+                ],
+            ),
+            "announcements": lambda: self.build_cards_page(
+                "公告 / 论坛",
+                [
+                    ("场馆维护", "本周五 18:00-22:00 篮球馆封闭维护", "#fff7ed"),
+                    ("预约规则", "爽约将扣信用分，连续 3 次将限制预约 7 天", "#e0f2fe"),
+                    ("招募", "羽毛球校队招募助教与陪练", "#fef2f2"),
+                ],
+            ),
+            "events": lambda: self.build_cards_page(
+                "校园赛事",
+                [
+                    ("阳光长跑 · 打卡第 5 周", "体育场 400m × 5圈，完成即得学时", "#ecfeff"),
+                    ("三对三篮球赛 · 复赛", "今晚 19:00 1/2/3 号场", "#eef2ff"),
+                    ("羽毛球学院杯", "本周六全天，场馆对外开放至 12:00", "#f0fdf4"),
+                ],
+            ),
+            "profile": self.build_profile_page,
+            "settings": self.build_settings_page,
+        }
 
-        for page in self.pages.values():
-            self.content_stack.addWidget(page)
+    def get_page(self, key):
+        """Build a static page on first use and add it to the content stack"""
+        if key not in self.pages:
+            builder = self.page_builders.get(key)
+            if builder is None:
+                return None
+            self.pages[key] = builder()
+            self.content_stack.addWidget(self.pages[key])
+        return self.pages[key]
 
     def build_cards_page(self, title, cards):
         page = QWidget()
@@ -835,6 +714,9 @@ class HomeWindow(QMainWindow):
         return page
 
     def refresh_profile_body(self):
+        if not hasattr(self, "profile_body"):
+            # Profile page not built yet: it is filled in when first opened, so there is nothing to refresh
+            return
         self.clear_layout(self.profile_body)
         if not self.current_user:
             prompt = QLabel("请先登录以查看个人信息和预约记录。")
@@ -869,36 +751,74 @@ class HomeWindow(QMainWindow):
                 ],
             )
             self.profile_body.addWidget(info_card)
-            
-            # Fetch reservations
-            res_list = []
-            try:
-                resp = self.network.send_request("get_my_reservations", {"user_account": user['account']})
-                if resp and resp.get("status") == "success":
-                    data = resp.get("data", [])
-                    if data:
-                        for r in data:
-                            # r: {id, venue, court, date, time, status}
-                            status_map = {
-                                "confirmed": "已预约",
-                                "cancelled": "已取消",
-                                "queued": "排队中",
-                                "finished": "已完成"
-                            }
-                            status_text = status_map.get(r['status'], r['status'])
-                            res_list.append(f"{r['date']} {r['time']} | {r['venue']} {r['court']} | {status_text}")
-                    else:
-                        res_list.append("暂无预约记录")
-                else:
-                    res_list.append("获取预约失败")
-            except Exception as e:
-                print(f"Error fetching reservations: {e}")
-                res_list.append("获取预约出错")
-
-            self.profile_body.addWidget(
-                self.list_card("最近预约", res_list)
+
+            # Fetch reservations and activity stats in one batch round trip; placeholders meanwhile
+            self.profile_generation = getattr(self, "profile_generation", 0) + 1
+            generation = self.profile_generation
+            self.profile_stats_card = self.list_card("运动统计", ["加载中..."])
+            self.profile_res_card = self.list_card("最近预约", ["加载中..."])
+            self.profile_body.addWidget(self.profile_stats_card)
+            self.profile_body.addWidget(self.profile_res_card)
+            self.network.batch_async(
+                [
+                    ("get_my_reservations", {"user_account": user['account']}),
+                    ("get_user_stats", {"user_account": user['account']}),
+                ],
+                snapshot=True,
+                callback=lambda results: self.on_profile_data_loaded(generation, results),
             )
 
+    def on_profile_data_loaded(self, generation, results):
+        # Ignore responses for a profile view that has since been rebuilt
+        if generation != getattr(self, "profile_generation", 0) or not self.current_user:
+            return
+        res_resp, stats_resp = results
+
+        stats_list = []
+        if stats_resp and stats_resp.get("status") == "success":
+            stats = stats_resp.get("data", {})
+            weekly = sum(stats.get("weekly_trend", {}).get("counts", []))
+            stats_list.append(f"近 7 天运动 {weekly} 次")
+            venues = stats.get("top_venues", [])
+            if venues:
+                stats_list.append("常去场馆: " + "、".join(f"{v['name']} ({v['count']})" for v in venues))
+        else:
+            stats_list.append("获取统计失败")
+        self.replace_profile_card("profile_stats_card", self.list_card("运动统计", stats_list))
+
+        resp = res_resp
+
+        res_list = []
+        if resp and resp.get("status") == "success":
+            data = resp.get("data", [])
+            if data:
+                for r in data:
+                    # r: {id, venue, court, date, time, status}
+                    status_map = {
+                        "confirmed": "已预约",
+                        "cancelled": "已取消",
+                        "queued": "排队中",
+                        "finished": "已完成"
+                    }
+                    status_text = status_map.get(r['status'], r['status'])
+                    res_list.append(f"{r['date']} {r['time']} | {r['venue']} {r['court']} | {status_text}")
+            else:
+                res_list.append("暂无预约记录")
+        else:
+            print(f"Error fetching reservations: {resp.get('message') if resp else resp}")
+            res_list.append("获取预约失败")
+
+        self.replace_profile_card("profile_res_card", self.list_card("最近预约", res_list))
+
+    def replace_profile_card(self, attr, card):
+        """Swap a placeholder card in the profile body for its loaded version, keeping its position"""
+        old_card = getattr(self, attr)
+        index = self.profile_body.indexOf(old_card)
+        self.profile_body.removeWidget(old_card)
+        old_card.deleteLater()
+        self.profile_body.insertWidget(index, card)
+        setattr(self, attr, card)
+
     def build_settings_page(self):
         page = QWidget()
         layout = QVBoxLayout(page)
@@ -937,64 +857,100 @@ class HomeWindow(QMainWindow):
         self.login_window.show_register()
         self.login_window.show()
 
+    # Search time bands -> (start, end) window sent to the server; "任何时间" means no window
+    TIME_RANGES = {
+        "06:00 - 10:00 早间": ("06:00:00", "10:00:00"),
+        "10:00 - 14:00 午间": ("10:00:00", "14:00:00"),
+        "14:00 - 18:00 下午": ("14:00:00", "18:00:00"),
+        "18:00 - 22:00 夜间": ("18:00:00", "22:00:00"),
+    }
+
+    def watch_slots(self, search_params):
+        """Subscribe to live capacity pushes for the searched venue/date, replacing the previous subscription"""
+        key = (search_params["venue_id"], search_params["date"])
+        watched = self.watched_slots
+        if watched and watched["key"] == key:
+            # Same key: keep the cached slots; nothing to do while the subscription's connection is still up
+            if watched["generation"] == self.network.generation and self.network.client_socket is not None:
+                return
+        else:
+            if watched:
+                old_venue_id, old_date = watched["key"]
+                self.network.send_async("unsubscribe_slots", {"venue_id": old_venue_id, "date": old_date})
+            watched = self.watched_slots = {"key": key, "venue": search_params["venue"], "slots": {}, "version": None}
+        # Subscriptions die with the connection; after a reconnect only the changes since the cached version come back
+        watched["generation"] = None
+        data = {"venue_id": key[0], "date": key[1]}
+        if watched["version"] is not None:
+            data["since_version"] = watched["version"]
+        self.network.send_async("subscribe_slots", data, lambda resp: self.on_slot_subscribed(key, resp))
+
+    def on_slot_subscribed(self, key, resp):
+        if resp.get("status") == "success" and self.watched_slots and self.watched_slots["key"] == key:
+            self.watched_slots["generation"] = self.network.generation
+            self.apply_slot_changes(resp.get("data", {}))
+
+    def on_push_received(self, message):
+        if message.get("event") != "slot_changes" or not self.watched_slots:
+            return
+        changes = message.get("data", {})
+        if (changes.get("venue_id"), changes.get("date")) == self.watched_slots["key"]:
+            self.apply_slot_changes(changes)
+
+    def apply_slot_changes(self, changes):
+        slots = self.watched_slots["slots"]
+        if changes.get("full"):
+            slots.clear()
+        for slot in changes.get("slots", []):
+            slots[slot["slot_id"]] = slot
+        for slot_id in changes.get("deleted", []):
+            slots.pop(slot_id, None)
+        if changes.get("version") is not None:
+            self.watched_slots["version"] = changes["version"]
+        remaining = sum(max(0, slot.get("max", 0) - slot.get("current", 0)) for slot in slots.values())
+        venue_id, date = self.watched_slots["key"]
+        self.statusBar().showMessage(f"{self.watched_slots['venue']} {date} 实时剩余名额：{remaining}")
+
     def show_available_slots(self, search_params):
+        """Step 1: ask the server for a per-time-block availability summary within the chosen window"""
+        self.watch_slots(search_params)
+        start_time, end_time = self.TIME_RANGES.get(search_params["time"], (None, None))
+        self.network.send_async(
+            "get_available_slots",
+            {
+                "venue_id": search_params["venue_id"],
+                "date": search_params["date"],
+                "start_time": start_time,
+                "end_time": end_time,
+                "only_available": True,
+                "summary": True,
+            },
+            lambda resp: self.on_slot_summary_loaded(search_params, resp),
+        )
+
+    def on_slot_summary_loaded(self, search_params, resp):
+        """Step 2: let the user pick a time block, then fetch only that block's slots"""
         venue_text = search_params["venue"]
         date = search_params["date"]
         time_text = search_params["time"]
-        venue_id = search_params["venue_id"]
 
-        resp = self.network.send_request(
-            "get_available_slots", {"venue_id": venue_id, "date": date}
-        )
         if not resp or resp.get("status") != "success":
             QMessageBox.warning(
                 self, "提示", resp.get("message", "可预约时段查询失败")
             )
             return
 
-        slots = resp.get("data", [])
-        time_ranges = {
-            "06:00 - 10:00 早间": ("06:00:00", "10:00:00"),
-            "10:00 - 14:00 午间": ("10:00:00", "14:00:00"),
-            "14:00 - 18:00 下午": ("14:00:00", "18:00:00"),
-            "18:00 - 22:00 夜间": ("18:00:00", "22:00:00"),
-        }
-        if time_text in time_ranges:
-            start_time, end_time = time_ranges[time_text]
-            slots = [
-                slot
-                for slot in slots
-                if start_time <= slot.get("start_time", "") < end_time
-            ]
-
-        available_slots = [
-            slot for slot in slots if slot.get("current", 0) < slot.get("max", 0)
-        ]
-        if not available_slots:
+        blocks = resp.get("data", [])
+        if not blocks:
             QMessageBox.information(
                 self, "提示", f"{date} 的 {venue_text} 暂无可预约时段。"
             )
             return
 
-        grouped = {}
-        for slot in available_slots:
-            time_key = f"{slot.get('start_time', '')[:5]}-{slot.get('end_time', '')[:5]}"
-            info = grouped.setdefault(
-                time_key, {"courts": 0, "remaining": 0, "slots": []}
-            )
-            info["courts"] += 1
-            remaining = max(0, slot.get("max", 0) - slot.get("current", 0))
-            info["remaining"] += remaining
-            info["slots"].append(slot)
-
-        display_items = []
-        time_keys = []
-        for time_key in sorted(grouped.keys()):
-            info = grouped[time_key]
-            display_items.append(
-                f"{time_key}（可约场地：{info['courts']}，剩余名额：{info['remaining']}）"
-            )
-            time_keys.append(time_key)
+        display_items = [
+            f"{b['start_time'][:5]}-{b['end_time'][:5]}（可约场地：{b['courts']}，剩余名额：{b['remaining']}）"
+            for b in blocks
+        ]
 
         prompt = f"{date} 的 {venue_text} 可预约时间段："
         if time_text != "任何时间":
@@ -1006,9 +962,38 @@ class HomeWindow(QMainWindow):
         if not ok:
             return
 
-        selected_index = display_items.index(selection)
-        selected_time_key = time_keys[selected_index]
-        slots_for_time = grouped[selected_time_key]["slots"]
+        block = blocks[display_items.index(selection)]
+        self.network.send_async(
+            "get_available_slots",
+            {
+                "venue_id": search_params["venue_id"],
+                "date": date,
+                "start_time": block["start_time"],
+                "end_time": block["end_time"],
+                "only_available": True,
+            },
+            lambda resp: self.on_block_slots_loaded(search_params, block, resp),
+        )
+
+    def on_block_slots_loaded(self, search_params, block, resp):
+        """Step 3: book the court with the most remaining capacity in the picked block"""
+        venue_text = search_params["venue"]
+        date = search_params["date"]
+        time_key = f"{block['start_time'][:5]}-{block['end_time'][:5]}"
+
+        if not resp or resp.get("status") != "success":
+            QMessageBox.warning(
+                self, "提示", resp.get("message", "可预约时段查询失败")
+            )
+            return
+
+        # The block may have filled up between the summary and this request
+        slots_for_time = [
+            slot for slot in resp.get("data", []) if slot.get("start_time") == block["start_time"]
+        ]
+        if not slots_for_time:
+            QMessageBox.information(self, "提示", f"{date} {time_key} 的名额已被约满，请选择其他时段。")
+            return
 
         def slot_sort_key(slot):
             remaining = max(0, slot.get("max", 0) - slot.get("current", 0))
@@ -1020,16 +1005,20 @@ class HomeWindow(QMainWindow):
             QMessageBox.warning(self, "提示", "预约失败：时间段信息异常")
             return
 
-        resp = self.network.send_request(
+        self.network.send_async(
             "book_venue",
             {"user_account": self.current_user["account"], "slot_id": slot_id},
+            lambda resp: self.on_booking_finished(
+                f"{date} {time_key} | {venue_text} {chosen_slot.get('court_name', '')}", resp
+            ),
         )
+
+    def on_booking_finished(self, booking_desc, resp):
         if resp and resp.get("status") == "success":
-            court_name = chosen_slot.get("court_name", "")
             QMessageBox.information(
                 self,
                 "预约成功",
-                f"{date} {selected_time_key} | {venue_text} {court_name}\n{resp.get('message', '预约成功')}",
+                f"{booking_desc}\n{resp.get('message', '预约成功')}",
             )
         else:
             QMessageBox.warning(
@@ -1062,15 +1051,6 @@ class HomeWindow(QMainWindow):
             QMessageBox.warning(self, "提示", "仅支持查询今天、明天、后天的可预约时段")
             return
 
-        # 如果存在活跃的天气线程，先停止它
-        if self.active_weather_thread and self.active_weather_thread.isRunning():
-            self.active_weather_thread.wait()  # 等待线程结束
-
-        # 爬取当天天气信息
-        weather_thread = WeatherCrawlerThread(date)
-        # 存储当前线程引用
-        self.active_weather_thread = weather_thread
-        
         # 创建临时变量存储参数，以便传递给回调函数
         search_params = {
             "venue": venue_text,
@@ -1078,13 +1058,15 @@ class HomeWindow(QMainWindow):
             "time": time_text,
             "venue_id": venue_id,
         }
-        weather_thread.weather_fetched.connect(
-            lambda weather, date: self.check_weather_and_show_reservation(search_params, weather)
-        )
-        weather_thread.error_occurred.connect(
-            lambda error: self.handle_weather_error_during_search(search_params, error)
-        )
-        weather_thread.start()
+
+        # 查询当天天气 (服务器缓存，不会阻塞在外部网站上)
+        def on_weather(resp):
+            if resp.get("status") == "success":
+                self.check_weather_and_show_reservation(search_params, resp["data"]["text"])
+            else:
+                self.handle_weather_error_during_search(search_params, resp.get("message", "未知错误"))
+
+        self.network.send_async("get_weather", {"date": date}, callback=on_weather)
 
     def check_weather_and_show_reservation(self, search_params, weather_desc):
         """检查天气并显示预约信息"""
@@ -1135,6 +1117,9 @@ class HomeWindow(QMainWindow):
 
     def on_logout_success(self):
         """Callback when user logs out from dashboard"""
+        if self.current_user:
+            # 通知服务器注销会话 (不等待响应)
+            self.network.send_async("logout")
         self.current_user = None
         print("User logged out")
 
@@ -1175,7 +1160,7 @@ class HomeWindow(QMainWindow):
                 return
 
             if not hasattr(self, "teacher_page"):
-                self.teacher_page = TeacherDashboard(
+                self.teacher_page = load_teacher_dashboard()(
                     self.network, self.current_user, self.on_logout_success
                 )
                 self.content_stack.addWidget(self.teacher_page)
@@ -1194,7 +1179,7 @@ class HomeWindow(QMainWindow):
                 return
 
             if not hasattr(self, "admin_page"):
-                self.admin_page = AdminWidget(self.network, self.current_user)
+                self.admin_page = load_admin_widget()(self.network, self.current_user)
                 self.content_stack.addWidget(self.admin_page)
 
             self.content_stack.setCurrentWidget(self.admin_page)
@@ -1202,15 +1187,17 @@ class HomeWindow(QMainWindow):
             return
 
         # Other static tabs
-        page = self.pages.get(key)
-        if page:
+        if key in self.page_builders:
             # Restricted pages
             if key in ["profile", "settings"]:
                 if not self.current_user:
                     self.open_login_window()
                     return
 
-            if key == "profile":
+            is_new = key not in self.pages
+            page = self.get_page(key)
+            if key == "profile" and not is_new:
+                # A freshly built profile page has already loaded its data
                 self.refresh_profile_body()
             self.content_stack.setCurrentWidget(page)
             self.set_active_nav(btn)
@@ -174,9 +174,7 @@ class TeacherDashboard(QWidget):
 
         self.log(f"正在请求添加课表: {day_str} {start_time}-{end_time} @ 场馆 {venue_name}...")
 
-        try:
-            response = self.network.send_request("add_schedule", data)
-
+        def on_response(response):
             if response.get("status") == "success":
                 self.log("✅ 添加成功！未来 4 个月的对应时段已自动锁定。")
                 QMessageBox.information(self, "成功", "课表添加成功，已锁定未来 4 个月。")
@@ -184,21 +182,24 @@ class TeacherDashboard(QWidget):
                 error_msg = response.get("message", "未知错误")
                 self.log(f"❌ 添加失败: {error_msg}")
                 QMessageBox.critical(self, "失败", f"添加失败: {error_msg}")
-        except Exception as e:
-            self.log(f"❌ 通信错误: {str(e)}")
-            QMessageBox.critical(self, "错误", f"通信错误: {str(e)}")
+
+        # 通信异常由网络线程转换为 error 响应，这里无需 try/except
+        self.network.send_async("add_schedule", data, callback=on_response)
 
 
     def load_venues(self):
         self.combo_venue.clear()
         self.combo_venue.addItem("?????", None)
-        resp = self.network.send_request("admin_get_venues")
-        if resp and resp.get("status") == "success":
-            venues = resp.get("data", [])
-            for v in venues:
-                self.combo_venue.addItem(v["venue_name"], v["venue_id"])
-        else:
-            QMessageBox.warning(self, "??", resp.get("message", "????????"))
+
+        def on_response(resp):
+            if resp and resp.get("status") == "success":
+                venues = resp.get("data", [])
+                for v in venues:
+                    self.combo_venue.addItem(v["venue_name"], v["venue_id"])
+            else:
+                QMessageBox.warning(self, "??", resp.get("message", "????????"))
+
+        self.network.send_async("admin_get_venues", callback=on_response)
 
     def logout(self):
         reply = QMessageBox.question(
@@ -1,6 +1,11 @@
+import codecs
+import itertools
 import json
+import os
 import socket
 import sys
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from PyQt5.QtWidgets import (
     QApplication,
     QComboBox,
@@ -16,64 +21,315 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
+try:
+    from async_network import AsyncNetwork
+except ImportError:
+    from client.async_network import AsyncNetwork
+
+# 编码协商使用服务器端的 wire_codec (backend/server)；客户端单独部署、找不到时只使用 JSON
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+if os.path.isdir(BACKEND_DIR) and BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+try:
+    from server import wire_codec
+except ImportError:
+    wire_codec = None
+
 
 class NetworkClient:
+    """
+    单连接多路复用客户端
+    每个请求带 request_id，可以连续发送多个请求而不等待响应 (流水线)；
+    后台读取线程按 request_id 把服务器乱序返回的响应交给对应的 Future。
+    """
+
+    REQUEST_TIMEOUT = 10
+    # 连接后通过 hello 协商的编码 (按偏好排序)、列式表格与压缩；旧服务器不支持时自动使用 JSON
+    # 纯 Python 的 msgpack 编解码比 json 模块慢，只有安装了 msgpack C 扩展时才优先使用
+    ENCODINGS = ("msgpack", "json") if wire_codec is not None and wire_codec.CODEC_BACKEND == "c" else ("json",)
+    USE_TABLES = True
+    COMPRESSIONS = wire_codec.COMPRESSIONS if wire_codec is not None else ()
+
     def __init__(self, host="127.0.0.1", port=8888):
         self.host = host
         self.port = port
         self.client_socket = None
+        self._writer = None  # 当前连接发送方向的编码器 (wire_codec.MessageWriter)
+        # login 返回的会话 token，之后的请求都携带它，断线重连后服务器仍能识别调用者
+        self.session_token = None
+        # 本客户端发出的流量统计 (各次连接累计)
+        self.wire_stats = wire_codec.WireStats() if wire_codec is not None else None
+        # 保护 socket 与未完成请求表 (后台网络线程、读取线程与同步调用可能并存)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._pending = {}  # request_id -> (socket, Future)
+        self._push_handlers = []  # 服务器推送消息的处理函数 (在读取线程中调用)
+        self._async = None
+        # 每次成功建立连接加一；订阅等随连接存在的状态据此判断是否需要在新连接上恢复
+        self.generation = 0
 
     def connect(self):
-        try:
-            self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.client_socket.connect((self.host, self.port))
+        with self._lock:
+            self.close()
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                sock.connect((self.host, self.port))
+                negotiated = self._negotiate(sock)
+            except Exception as e:
+                print(f"连接服务器失败: {e}")
+                sock.close()
+                return False
+            self.client_socket = sock
+            self.generation += 1
+            if wire_codec is not None:
+                self._writer = wire_codec.MessageWriter(
+                    negotiated["encoding"], False, negotiated["compression"],
+                    negotiated.get("threshold", wire_codec.COMPRESS_THRESHOLD), self.wire_stats,
+                )
+            reader = threading.Thread(target=self._read_loop, args=(sock, negotiated), daemon=True)
+            reader.start()
             return True
-        except Exception as e:
-            print(f"连接服务器失败: {e}")
-            return False
 
-    def send_request(self, action, data=None):
+    def _negotiate(self, sock):
+        """
+        同步发送 hello 协商编码与压缩 (读取线程启动之前，此时连接上没有其他消息)
+        :return: dict {encoding, table, compression[, threshold]}
+        """
+        negotiated = {"encoding": "json", "table": False, "compression": None}
+        if wire_codec is None or (tuple(self.ENCODINGS) == ("json",) and not self.USE_TABLES and not self.COMPRESSIONS):
+            return negotiated
+        hello = {"action": "hello", "data": {
+            "encodings": list(self.ENCODINGS),
+            "table": self.USE_TABLES,
+            "compression": list(self.COMPRESSIONS),
+        }}
+        sock.settimeout(self.REQUEST_TIMEOUT)
+        try:
+            sock.sendall(json.dumps(hello).encode("utf-8"))
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            buffer = ""
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    raise ConnectionError("服务器关闭了连接")
+                buffer += decoder.decode(chunk)
+                try:
+                    response, _ = json.JSONDecoder().raw_decode(buffer.lstrip())
+                    break
+                except json.JSONDecodeError:
+                    continue
+        finally:
+            sock.settimeout(None)
+        if response.get("status") != "success":
+            return negotiated  # 旧服务器不认识 hello
+        negotiated.update(response.get("data") or {})
+        return negotiated
+
+    def _encode(self, message):
+        """在 self._lock 内调用 (压缩流要求按发送顺序编码)"""
+        if self._writer is None:
+            return json.dumps(message, ensure_ascii=False).encode("utf-8")
+        return self._writer.frame(self._writer.serialize(message))
+
+    @property
+    def async_client(self):
+        """首次使用时在 GUI 线程中创建后台网络线程"""
+        if self._async is None:
+            self._async = AsyncNetwork(self)
+        return self._async
+
+    def send_async(self, action, data=None, callback=None):
+        """
+        非阻塞发送请求，参数与 send_request 相同
+        :param callback: 收到响应后在 GUI 线程中调用 callback(response)
+        :return: Future (future.request_id 为本次请求编号)
+        """
+        return self.async_client.request(action, data, callback)
+
+    def batch_async(self, requests, snapshot=False, callback=None):
+        """
+        一次往返发送多个请求 (服务器 batch 动作)
+        :param requests: [(action, data), ...]
+        :param snapshot: True 时服务器在同一只读事务中执行，结果互相一致 (仅限查询类动作)
+        :param callback: callback(results)，results 与 requests 一一对应；整体失败时每项均为该错误响应
+        """
+        def on_response(resp):
+            if resp.get("status") == "success":
+                results = resp.get("results", [])
+            else:
+                results = [resp] * len(requests)
+            callback(results)
+
+        data = {
+            "requests": [{"action": action, "data": data} for action, data in requests],
+            "snapshot": snapshot,
+        }
+        return self.send_async("batch", data, on_response if callback else None)
+
+    def connect_async(self, callback=None):
+        """非阻塞连接服务器，callback(bool)"""
+        return self.async_client.submit(self.connect, callback)
+
+    def shutdown(self):
+        """退出程序前停止后台网络线程并关闭连接"""
+        if self._async is not None:
+            self._async.shutdown()
+            self._async = None
+        self.close()
+
+    def add_push_handler(self, handler):
+        """
+        注册服务器推送 ({"type": "push", ...}) 的处理函数
+        注意 handler 在读取线程中调用；界面代码请使用 async_client.push_received 信号
+        订阅随连接存在，断线重连后需要重新订阅
+        """
+        self._push_handlers.append(handler)
+
+    def submit_request(self, action, data=None):
+        """
+        发送请求后立即返回，不等待响应
+        :return: Future，结果为响应字典 (通信失败时为 status=error 的字典)
+        """
         if isinstance(action, dict) and data is None:
             data = action.get("data", {})
             action = action.get("action")
 
-        if not self.client_socket:
-            if not self.connect():
-                return {"status": "error", "message": "无法连接到服务器"}
+        future = Future()
+        with self._lock:
+            if not self.client_socket:
+                if not self.connect():
+                    future.set_result({"status": "error", "message": "无法连接到服务器"})
+                    return future
+            sock = self.client_socket
+            request_id = next(self._ids)
+            future.request_id = request_id
+            self._pending[request_id] = (sock, future)
+            request = {"action": action, "data": data, "request_id": request_id}
+            if self.session_token and action != "login":
+                request["token"] = self.session_token
+            if action == "login":
+                future.add_done_callback(self._on_login_response)
+            elif action == "logout":
+                self.session_token = None
+            try:
+                sock.sendall(self._encode(request))
+            except Exception as e:
+                self._pending.pop(request_id, None)
+                self.close()
+                future.set_result({"status": "error", "message": f"通信错误: {str(e)}"})
+        return future
+
+    def _on_login_response(self, future):
+        response = future.result()
+        if response.get("status") == "success" and response.get("session"):
+            self.session_token = response["session"]
 
-        previous_timeout = None
+    def send_request(self, action, data=None):
+        """同步发送请求并等待响应 (可与其他线程的请求共用同一连接)"""
+        future = self.submit_request(action, data)
+        try:
+            return future.result(timeout=self.REQUEST_TIMEOUT)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(future.request_id, None)
+            return {"status": "error", "message": "通信错误: 等待响应超时"}
+
+    def _read_loop(self, sock, negotiated):
+        """读取线程: 从连接中切分出完整的响应并按 request_id 分发"""
+        table = negotiated["table"]
+        if negotiated["encoding"] != "json" or negotiated["compression"]:
+            self._read_frames(sock, negotiated)
+            return
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        json_decoder = json.JSONDecoder()
+        buffer = ""
         try:
-            request = {"action": action, "data": data}
-            self.client_socket.send(
-                json.dumps(request, ensure_ascii=False).encode("utf-8")
-            )
-            previous_timeout = self.client_socket.gettimeout()
-            self.client_socket.settimeout(5)
-            chunks = []
             while True:
-                chunk = self.client_socket.recv(4096)
+                chunk = sock.recv(65536)
                 if not chunk:
                     break
-                chunks.append(chunk)
-                try:
-                    response_data = b"".join(chunks).decode("utf-8")
-                    return json.loads(response_data)
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    continue
-            return {"status": "error", "message": "通信错误: 响应不完整"}
-        except Exception as e:
-            return {"status": "error", "message": f"通信错误: {str(e)}"}
+                buffer += decoder.decode(chunk)
+                while True:
+                    buffer = buffer.lstrip()
+                    if not buffer:
+                        break
+                    try:
+                        response, end = json_decoder.raw_decode(buffer)
+                    except json.JSONDecodeError:
+                        break  # 响应尚未收完
+                    buffer = buffer[end:]
+                    self._dispatch(sock, wire_codec.from_table(response) if table else response)
+        except Exception:
+            pass
         finally:
-            if self.client_socket and previous_timeout is not None:
-                self.client_socket.settimeout(previous_timeout)
+            self._on_disconnected(sock)
+
+    def _read_frames(self, sock, negotiated):
+        """二进制编码 (msgpack) 或压缩连接的读取循环: 按长度前缀切分帧"""
+        frames = wire_codec.FrameReader(negotiated["encoding"], negotiated["compression"])
+        table = negotiated["table"]
+        try:
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                for response in frames.feed(chunk):
+                    self._dispatch(sock, wire_codec.from_table(response) if table else response)
+        except Exception:
+            pass
+        finally:
+            self._on_disconnected(sock)
+
+    def _dispatch(self, sock, response):
+        if isinstance(response, dict) and response.get("type") == "push":
+            for handler in list(self._push_handlers):
+                try:
+                    handler(response)
+                except Exception as e:
+                    print(f"处理推送消息出错: {e}")
+            return
+        request_id = response.pop("request_id", None) if isinstance(response, dict) else None
+        with self._lock:
+            if request_id is None:
+                # 服务器无法识别请求 (如 JSON 格式错误) 时不带 request_id，交给最早的请求
+                own = [rid for rid, (s, _) in self._pending.items() if s is sock]
+                request_id = min(own) if own else None
+            entry = self._pending.pop(request_id, None)
+        if entry:
+            entry[1].set_result(response)
+
+    def _on_disconnected(self, sock):
+        with self._lock:
+            if self.client_socket is sock:
+                self.client_socket = None
+            failed = [rid for rid, (s, _) in self._pending.items() if s is sock]
+            futures = [self._pending.pop(rid)[1] for rid in failed]
+        try:
+            sock.close()
+        except OSError:
+            pass
+        for future in futures:
+            future.set_result({"status": "error", "message": "通信错误: 连接已断开"})
+
+    def reset_host(self, host):
+        """关闭旧连接并切换服务器地址，下次请求时按新地址重连"""
+        self.close()
+        self.host = host or "127.0.0.1"
+        self.session_token = None  # 会话只在签发它的服务器上有效
 
     def close(self):
-        if self.client_socket:
-            try:
-                self.client_socket.close()
-            except:
-                pass
-            self.client_socket = None
+        with self._lock:
+            if self.client_socket:
+                try:
+                    # shutdown 让读取线程的 recv 立即返回，由其清理未完成的请求
+                    self.client_socket.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                try:
+                    self.client_socket.close()
+                except OSError:
+                    pass
+                self.client_socket = None
 
 
 class LoginWindow(QWidget):
@@ -189,11 +445,11 @@ class LoginWindow(QWidget):
 
         btn_row = QHBoxLayout()
         btn_row.setSpacing(10)
-        login_btn = self.primary_button("登录")
-        login_btn.clicked.connect(self.handle_login)
+        self.login_btn = self.primary_button("登录")
+        self.login_btn.clicked.connect(self.handle_login)
         reg_btn = self.ghost_button("去注册")
         reg_btn.clicked.connect(self.show_register)
-        btn_row.addWidget(login_btn)
+        btn_row.addWidget(self.login_btn)
         btn_row.addWidget(reg_btn)
         layout.addLayout(btn_row)
 
@@ -239,11 +495,11 @@ class LoginWindow(QWidget):
 
         btn_row = QHBoxLayout()
         btn_row.setSpacing(10)
-        submit_btn = self.primary_button("提交注册")
-        submit_btn.clicked.connect(self.handle_register)
+        self.submit_btn = self.primary_button("提交注册")
+        self.submit_btn.clicked.connect(self.handle_register)
         back_btn = self.ghost_button("返回登录")
         back_btn.clicked.connect(self.show_login)
-        btn_row.addWidget(submit_btn)
+        btn_row.addWidget(self.submit_btn)
         btn_row.addWidget(back_btn)
         layout.addLayout(btn_row)
 
@@ -261,17 +517,23 @@ class LoginWindow(QWidget):
         self.stacked_widget.setCurrentWidget(self.register_page)
         self.setWindowTitle("GoSport - 注册")
 
-    def handle_login(self):
-        # 更新服务器 IP
+    def switch_server_and_send(self, action, data, callback):
+        """在网络线程中切换服务器 IP (强制关闭旧连接) 后发送请求，界面不阻塞"""
         ip = self.server_ip.text().strip()
-        # 强制关闭旧连接，以便使用新 IP 重新连接
-        self.network.close()
-        
-        if ip:
-            self.network.host = ip
-        else:
-            self.network.host = "127.0.0.1"
 
+        def task():
+            self.network.reset_host(ip)
+            return self.network.send_request(action, data)
+
+        self.set_busy(True)
+        return self.network.async_client.submit(task, callback)
+
+    def set_busy(self, busy):
+        """请求进行中时禁用提交按钮，防止重复提交"""
+        self.login_btn.setEnabled(not busy)
+        self.submit_btn.setEnabled(not busy)
+
+    def handle_login(self):
         account = self.login_account.text().strip()
         password = self.login_password.text().strip()
 
@@ -279,10 +541,12 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "提示", "请输入账号和密码")
             return
 
-        resp = self.network.send_request(
-            "login", {"account": account, "password": password}
+        self.switch_server_and_send(
+            "login", {"account": account, "password": password}, self.on_login_response
         )
 
+    def on_login_response(self, resp):
+        self.set_busy(False)
         if resp.get("status") == "success":
             user = resp.get("user")
             if self.login_callback:
@@ -297,16 +561,6 @@ class LoginWindow(QWidget):
             QMessageBox.critical(self, "登录失败", resp.get("message", "未知错误"))
 
     def handle_register(self):
-        # 更新服务器 IP (使用登录页面的输入框)
-        ip = self.server_ip.text().strip()
-        # 强制关闭旧连接，以便使用新 IP 重新连接
-        self.network.close()
-
-        if ip:
-            self.network.host = ip
-        else:
-            self.network.host = "127.0.0.1"
-
         account = self.reg_account.text().strip()
         password = self.reg_password.text().strip()
         name = self.reg_name.text().strip()
@@ -331,8 +585,11 @@ class LoginWindow(QWidget):
             "phone": phone,
         }
 
-        resp = self.network.send_request("register", data)
+        # 服务器 IP 使用登录页面的输入框
+        self.switch_server_and_send("register", data, self.on_register_response)
 
+    def on_register_response(self, resp):
+        self.set_busy(False)
         if resp.get("status") == "success":
             QMessageBox.information(self, "成功", "注册成功！请返回登录。")
             self.show_login()
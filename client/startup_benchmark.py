@@ -0,0 +1,116 @@
+"""
+客户端冷启动基准测试
+
+每一轮都在全新的 Python 子进程中测量 (避免模块缓存影响结果)：
+  - import: 导入 home 模块耗时
+  - first_paint: 从进程开始导入到 HomeWindow 第一次绘制完成的耗时
+多轮取中位数。无显示器的机器上可加 --offscreen 使用 Qt offscreen 平台。
+
+用法:
+    python startup_benchmark.py [--runs 5] [--offscreen] [--importtime] [--json 结果.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CLIENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import home
+print(time.perf_counter() - t0)
+"""
+
+FIRST_PAINT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent
+app = QApplication([])
+import home
+
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            print(time.perf_counter() - t0)
+            app.quit()
+        return False
+
+window = home.HomeWindow()
+watcher = FirstPaint()
+window.installEventFilter(watcher)
+window.show()
+app.exec_()
+window.network.shutdown()
+"""
+
+
+def run_snippet(snippet, offscreen=False, extra_args=()):
+    env = dict(os.environ)
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    result = subprocess.run(
+        [sys.executable, *extra_args, "-c", snippet],
+        cwd=CLIENT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "子进程异常退出")
+    # 客户端会打印连接日志，耗时总是最后一行
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def top_imports(offscreen=False, limit=15):
+    """使用 python -X importtime 找出最耗时的模块 (累计时间，微秒)"""
+    _, stderr = run_snippet(IMPORT_SNIPPET, offscreen, ("-X", "importtime"))
+    rows = []
+    for line in stderr.splitlines():
+        # 格式: "import time:  自身耗时 | 累计耗时 | 模块名"，跳过表头
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GoSport 客户端冷启动基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="测量轮数 (取中位数)")
+    parser.add_argument("--offscreen", action="store_true", help="使用 Qt offscreen 平台 (无显示器时)")
+    parser.add_argument("--importtime", action="store_true", help="额外列出导入最慢的模块")
+    parser.add_argument("--json", help="把结果写入 JSON 文件，便于前后对比")
+    args = parser.parse_args()
+
+    results = {}
+    for name, snippet in (("import", IMPORT_SNIPPET), ("first_paint", FIRST_PAINT_SNIPPET)):
+        samples = [run_snippet(snippet, args.offscreen)[0] for _ in range(args.runs)]
+        results[name] = {
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+            "runs": args.runs,
+        }
+        print(f"{name:<12} 中位数 {results[name]['median_ms']:>8.1f} ms  "
+              f"(最小 {results[name]['min_ms']:.1f} / 最大 {results[name]['max_ms']:.1f}, {args.runs} 轮)")
+
+    if args.importtime:
+        print("\n导入耗时最多的模块 (累计 / 自身, 毫秒):")
+        for cumulative_us, self_us, module in top_imports(args.offscreen):
+            print(f"  {cumulative_us / 1000:>8.1f} / {self_us / 1000:>7.1f}  {module}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
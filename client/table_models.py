@@ -0,0 +1,160 @@
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, Qt, pyqtSignal
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+
+class PagedTableModel(QAbstractTableModel):
+    """
+    按需分页加载的表格模型
+    视图滚动到底部时 Qt 调用 canFetchMore/fetchMore，模型再向服务器异步请求下一页，
+    界面上不为每行创建控件，内存与渲染开销只和可见行有关。
+
+    :param columns: [(表头, 取值函数 row -> 显示文本), ...]
+    :param loader: loader(token, callback) 发起一次异步请求；
+                   token 为上一页返回的续取标记 (首页为 None)，
+                   回调 callback(ok, rows_or_message, next_token, total)，next_token 为 None 表示没有更多
+    """
+
+    loading_changed = pyqtSignal(bool)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, columns, loader, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.loader = loader
+        self.rows = []
+        self.total = None
+        self._next_token = None
+        self._has_more = True
+        self._loading = False
+        self._generation = 0
+
+    # ---- Qt 模型接口 ---- #
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section][0]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            value = self.columns[index.column()][1](self.rows[index.row()])
+            return "" if value is None else str(value)
+        if role == Qt.UserRole:
+            return self.rows[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._set_loading(True)
+        generation = self._generation
+        self.loader(
+            self._next_token,
+            lambda ok, result, next_token=None, total=None: self._on_page_loaded(
+                generation, ok, result, next_token, total
+            ),
+        )
+
+    # ---- 对外方法 ---- #
+    def reload(self):
+        """清空并从第一页重新加载 (筛选条件变化或数据被修改后调用)"""
+        self._generation += 1  # 丢弃尚未返回的旧请求
+        self.beginResetModel()
+        self.rows = []
+        self.total = None
+        self._next_token = None
+        self._has_more = True
+        self._set_loading(False)
+        self.endResetModel()
+        self.fetchMore()
+
+    def row_data(self, row):
+        return self.rows[row]
+
+    # ---- 内部 ---- #
+    def _set_loading(self, loading):
+        if self._loading != loading:
+            self._loading = loading
+            self.loading_changed.emit(loading)
+
+    def _on_page_loaded(self, generation, ok, result, next_token, total):
+        if generation != self._generation:
+            return
+        self._set_loading(False)
+        if not ok:
+            self._has_more = False
+            self.load_failed.emit(result)
+            return
+        self.total = total
+        self._next_token = next_token
+        self._has_more = next_token is not None
+        if result:
+            start = len(self.rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(result) - 1)
+            self.rows.extend(result)
+            self.endInsertRows()
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """
+    在单元格内直接绘制操作按钮 (不创建真实控件)，点击时发出 clicked(row, action)
+
+    :param buttons_for_row: buttons_for_row(row_data) -> [(action, 文本, 文字颜色或 None), ...]；
+                            返回空列表时按普通文本显示该单元格
+    """
+
+    clicked = pyqtSignal(int, str)
+
+    BUTTON_SPACING = 6
+    BUTTON_MARGIN = 3
+
+    def __init__(self, buttons_for_row, parent=None):
+        super().__init__(parent)
+        self.buttons_for_row = buttons_for_row
+
+    def _button_rects(self, option_rect, buttons):
+        if not buttons:
+            return []
+        width = (option_rect.width() - self.BUTTON_SPACING * (len(buttons) - 1)) // len(buttons)
+        rects = []
+        for i in range(len(buttons)):
+            x = option_rect.x() + i * (width + self.BUTTON_SPACING)
+            rects.append(QRect(x, option_rect.y(), width, option_rect.height()).adjusted(
+                self.BUTTON_MARGIN, self.BUTTON_MARGIN, -self.BUTTON_MARGIN, -self.BUTTON_MARGIN
+            ))
+        return rects
+
+    def paint(self, painter, option, index):
+        buttons = self.buttons_for_row(index.data(Qt.UserRole))
+        if not buttons:
+            super().paint(painter, option, index)
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        for (action, text, color), rect in zip(buttons, self._button_rects(option.rect, buttons)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = text
+            button.state = QStyle.State_Enabled
+            if color:
+                button.palette.setColor(button.palette.ButtonText, QColor(color))
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            buttons = self.buttons_for_row(index.data(Qt.UserRole))
+            for (action, text, color), rect in zip(buttons, self._button_rects(option.rect, buttons)):
+                if rect.contains(event.pos()):
+                    self.clicked.emit(index.row(), action)
+                    return True
+        return super().editorEvent(event, model, option, index)
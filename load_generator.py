@@ -0,0 +1,546 @@
+"""
+闭环压测工具: 多进程模拟大量学生/教师/管理员并发访问 SportsVenueServer
+
+每个模拟用户独占一个连接，循环执行 "发请求 -> 等响应 -> 思考时间"，
+动作按配置的权重抽取 (查号源/预约/取消/签到/查看预约/检索公告/管理员查询等)。
+--burst 模式模拟 "每天 08:00 开放预约"：所有学生和教师在同一时刻抢同一场馆明晚的热门时段。
+
+结果 (吞吐量、各动作延迟分位数、错误数、超卖检查) 打印到终端并写入 JSON 文件。
+
+用法 (先用 data_generator.py 生成数据并启动服务器，服务器日志较多时建议重定向):
+    python backend/server/data_generator.py /tmp/load.db
+    python backend/server/server.py /tmp/load.db 9999 > /dev/null
+    python load_generator.py --port 9999 --db /tmp/load.db --users 2000 --processes 8 --duration 60 --burst
+
+--db 指向服务器使用的同一数据库时，账号从库中抽取，结束后直接查库检查超卖；
+不指定时注册 load_* 账号，超卖只根据抢号结果在客户端判断。
+"""
+import argparse
+import datetime
+import json
+import math
+import multiprocessing
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+HOST = '127.0.0.1'
+PORT = 8888
+REQUEST_TIMEOUT = 30
+
+# 默认压测配置，可用 --profile 指定 JSON 文件覆盖其中任意部分
+DEFAULT_PROFILE = {
+    # 各角色用户占比
+    "mix": {"student": 0.9, "teacher": 0.08, "admin": 0.02},
+    # 两次请求之间的平均思考时间 (毫秒，指数分布)
+    "think_ms": 500,
+    # 各角色的动作权重
+    "actions": {
+        "student": {
+            "search_slots": 35, "book": 20, "cancel": 8, "check_in": 7,
+            "my_reservations": 15, "search_announcements": 5, "announcements": 5, "weather": 5,
+        },
+        "teacher": {
+            "search_slots": 30, "book": 15, "cancel": 5, "my_reservations": 15,
+            "my_schedules": 20, "announcements": 10, "weather": 5,
+        },
+        "admin": {
+            "admin_reservations": 35, "admin_users": 25, "venue_stats": 20, "heatmap": 10, "announcements": 10,
+        },
+    },
+    # 抢号模式: 开抢时刻 (相对压测开始的秒数) 与目标时段
+    "burst": {"delay_s": 10, "start_time": "19:00", "end_time": "21:00", "retries": 3},
+}
+
+SEARCH_KEYWORDS = ["维修", "开放时间", "比赛", "通知", "安全", "报名", "场馆"]
+ACTIVE_STATUSES = ("confirmed", "checked_in", "no_show")
+
+
+def merge_profile(base, override):
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merged[key] = merge_profile(base[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+class Session:
+    """一个模拟用户的连接 (使用 request_id 匹配响应，与 NetworkClient 相同的协议)"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.sock = None
+        self.buffer = ""
+        self.decoder = json.JSONDecoder()
+        self.next_id = 0
+
+    def connect(self):
+        self.close()
+        self.sock = socket.create_connection((self.host, self.port), timeout=REQUEST_TIMEOUT)
+        self.buffer = ""
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def call(self, action, data):
+        """发送请求并阻塞等待对应响应，返回 (响应, 延迟毫秒)；传输错误时抛出 OSError/ValueError"""
+        if self.sock is None:
+            self.connect()
+        self.next_id += 1
+        request_id = self.next_id
+        started = time.perf_counter()
+        self.sock.sendall(json.dumps({"action": action, "data": data, "request_id": request_id}).encode('utf-8'))
+        while True:
+            message = self._next_message()
+            # 跳过推送消息与其他请求的响应
+            if isinstance(message, dict) and message.get("request_id") == request_id:
+                return message, (time.perf_counter() - started) * 1000
+
+    def _next_message(self):
+        while True:
+            buffer = self.buffer.lstrip()
+            if buffer:
+                try:
+                    message, end = self.decoder.raw_decode(buffer)
+                    self.buffer = buffer[end:]
+                    return message
+                except json.JSONDecodeError:
+                    pass
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("服务器关闭了连接")
+            self.buffer = buffer + chunk.decode('utf-8', errors='replace')
+
+
+class Stats:
+    """单个线程内的统计 (最后在进程/主进程中合并)"""
+
+    def __init__(self):
+        self.actions = {}
+
+    def record(self, action, latency_ms, outcome):
+        entry = self.actions.setdefault(action, {"latencies": [], "success": 0, "fail": 0, "error": 0})
+        if latency_ms is not None:
+            entry["latencies"].append(latency_ms)
+        entry[outcome] += 1
+
+    def merge(self, other_actions):
+        for action, entry in other_actions.items():
+            target = self.actions.setdefault(action, {"latencies": [], "success": 0, "fail": 0, "error": 0})
+            target["latencies"].extend(entry["latencies"])
+            for outcome in ("success", "fail", "error"):
+                target[outcome] += entry[outcome]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return round(sorted_values[index], 2)
+
+
+class SimulatedUser:
+    """一个闭环用户: 登录后按权重循环执行动作直到压测结束"""
+
+    def __init__(self, account, password, role, config, stats, burst_results):
+        self.account = account
+        self.password = password
+        self.role = role
+        self.config = config
+        self.profile = config["profile"]
+        self.stats = stats
+        self.burst_results = burst_results
+        self.rng = random.Random(f"{config['seed']}-{account}")
+        self.session = Session(config["host"], config["port"])
+        self.venues = []
+        self.reservations = []  # 最近一次查询到的本人 confirmed 预约 ID
+        actions = self.profile["actions"].get(role, {})
+        self.action_names = list(actions)
+        self.action_weights = [actions[name] for name in self.action_names]
+
+    # ---- 请求与记录 ---- #
+    def call(self, label, action, data):
+        """发送请求并记录结果: success / fail (业务拒绝，如已满) / error (参数或服务器错误、超时、断线)"""
+        try:
+            response, latency = self.session.call(action, data)
+        except (OSError, ValueError) as e:
+            self.stats.record(label, None, "error")
+            self.session.close()
+            return None
+        status = response.get("status")
+        outcome = "success" if status == "success" else "fail" if status == "fail" else "error"
+        self.stats.record(label, latency, outcome)
+        return response
+
+    def run(self):
+        start_at, stop_at = self.config["start_at"], self.config["stop_at"]
+        # 在爬坡时间内错开上线
+        time.sleep(max(0.0, start_at - time.time()) + self.rng.random() * self.config["ramp_s"])
+        if self.config["register"]:
+            self.call("register", "register", {
+                "account": self.account, "password": self.password, "name": self.account,
+                "role": self.role, "phone": "13800000000",
+            })
+        response = self.call("login", "login", {"account": self.account, "password": self.password})
+        if not response or response.get("status") != "success":
+            return
+        response = self.call("venues", "admin_get_venues", {})
+        if response and response.get("status") == "success":
+            self.venues = [v["venue_id"] for v in response.get("data", [])]
+
+        burst_at = self.config.get("burst_at")
+        burst_done = burst_at is None or self.role == "admin"
+        think = self.profile["think_ms"] / 1000
+        while time.time() < stop_at:
+            if not burst_done and time.time() >= burst_at - 0.05:
+                time.sleep(max(0.0, burst_at - time.time()))
+                self.burst()
+                burst_done = True
+                continue
+            if self.action_names:
+                action = self.rng.choices(self.action_names, self.action_weights)[0]
+                getattr(self, f"do_{action}")()
+            pause = self.rng.expovariate(1 / think) if think > 0 else 0
+            if not burst_done:
+                pause = min(pause, max(0.0, burst_at - time.time()))
+            time.sleep(min(pause, max(0.0, stop_at - time.time())))
+        self.session.close()
+
+    # ---- 动作 ---- #
+    def random_date(self):
+        # 服务器只开放未来 3 天内的号源
+        return (datetime.date.today() + datetime.timedelta(days=self.rng.randrange(3))).strftime("%Y-%m-%d")
+
+    def list_slots(self, label, venue_id, date_str, **filters):
+        response = self.call(label, "get_available_slots", dict({"venue_id": venue_id, "date": date_str}, **filters))
+        if response and response.get("status") == "success":
+            return response.get("data", [])
+        return []
+
+    def do_search_slots(self):
+        if self.venues:
+            self.list_slots("search_slots", self.rng.choice(self.venues), self.random_date(),
+                            summary=self.rng.random() < 0.5)
+
+    def do_book(self):
+        if not self.venues:
+            return
+        slots = self.list_slots("search_slots", self.rng.choice(self.venues), self.random_date(), only_available=True)
+        if slots:
+            self.call("book", "book_venue", {"user_account": self.account, "slot_id": self.rng.choice(slots)["slot_id"]})
+
+    def do_my_reservations(self):
+        response = self.call("my_reservations", "get_my_reservations", {"user_account": self.account})
+        if response and response.get("status") == "success":
+            self.reservations = [r["id"] for r in response.get("data", []) if r["status"] == "confirmed"]
+
+    def do_cancel(self):
+        if not self.reservations:
+            self.do_my_reservations()
+        if self.reservations:
+            reservation_id = self.reservations.pop(self.rng.randrange(len(self.reservations)))
+            self.call("cancel", "cancel_booking", {"user_account": self.account, "reservation_id": reservation_id})
+
+    def do_check_in(self):
+        if not self.reservations:
+            self.do_my_reservations()
+        if self.reservations:
+            reservation_id = self.reservations.pop(self.rng.randrange(len(self.reservations)))
+            self.call("check_in", "check_in", {"user_account": self.account, "reservation_id": reservation_id})
+
+    def do_my_schedules(self):
+        self.call("my_schedules", "get_my_schedules", {"teacher_account": self.account})
+
+    def do_announcements(self):
+        self.call("announcements", "get_announcements", {})
+
+    def do_search_announcements(self):
+        self.call("search_announcements", "search_announcements", {"keyword": self.rng.choice(SEARCH_KEYWORDS)})
+
+    def do_weather(self):
+        self.call("weather", "get_weather", {"date": self.random_date()})
+
+    def do_admin_reservations(self):
+        self.call("admin_reservations", "admin_get_all_reservations", {"limit": 100})
+
+    def do_admin_users(self):
+        self.call("admin_users", "admin_get_users", {"page": self.rng.randint(1, 20), "page_size": 100})
+
+    def do_venue_stats(self):
+        self.call("venue_stats", "get_venue_stats", {})
+
+    def do_heatmap(self):
+        self.call("heatmap", "get_heatmap_data", {})
+
+    def burst(self):
+        """开抢: 列出目标时段，随机选一个有余量的预约，满了换一个再试"""
+        burst = self.profile["burst"]
+        target = self.config["burst_target"]
+        for _ in range(burst["retries"] + 1):
+            slots = self.list_slots("burst_search", target["venue_id"], target["date"], only_available=True,
+                                    start_time=burst["start_time"], end_time=burst["end_time"])
+            if not slots:
+                return
+            slot_id = self.rng.choice(slots)["slot_id"]
+            response = self.call("burst_book", "book_venue", {"user_account": self.account, "slot_id": slot_id})
+            if response and response.get("status") == "success":
+                # 只统计真正占到名额的预约 (候补不占容量)
+                if "候补" not in response.get("message", ""):
+                    self.burst_results.append(slot_id)
+                return
+
+
+def worker_process(accounts, config, result_queue):
+    """一个压测进程: 每个账号一个线程"""
+    stats_list = []
+    burst_results = []
+    threads = []
+    for account, password, role in accounts:
+        stats = Stats()
+        stats_list.append(stats)
+        user = SimulatedUser(account, password, role, config, stats, burst_results)
+        thread = threading.Thread(target=user.run, daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join(timeout=max(0.0, config["stop_at"] - time.time()) + REQUEST_TIMEOUT + 5)
+    merged = Stats()
+    for stats in stats_list:
+        merged.merge(stats.actions)
+    result_queue.put((merged.actions, burst_results))
+
+
+def pick_accounts(args, profile, rng):
+    """按角色占比确定模拟账号 [(account, password, role), ...]"""
+    mix = profile["mix"]
+    total_weight = sum(mix.values())
+    counts = {role: int(round(args.users * weight / total_weight)) for role, weight in mix.items()}
+    accounts = []
+    if args.db:
+        conn = sqlite3.connect(args.db)
+        try:
+            for role, count in counts.items():
+                rows = conn.execute("SELECT user_account, password FROM users WHERE role = ? ORDER BY user_account",
+                                    (role,)).fetchall()
+                if len(rows) < count:
+                    print(f"[!] 数据库中 {role} 账号只有 {len(rows)} 个，少于需要的 {count} 个")
+                for account, password in rng.sample(rows, min(count, len(rows))):
+                    accounts.append((account, password, role))
+        finally:
+            conn.close()
+    else:
+        for role, count in counts.items():
+            accounts.extend((f"load_{role}_{i:05d}", "123456", role) for i in range(count))
+    rng.shuffle(accounts)
+    return accounts
+
+
+def prepare_burst(args, profile):
+    """选定抢号目标 (默认第一个场馆明天的热门时段)"""
+    session = Session(args.host, args.port)
+    try:
+        venue_id = args.burst_venue
+        if venue_id is None:
+            response, _ = session.call("admin_get_venues", {})
+            venues = response.get("data", [])
+            if not venues:
+                raise RuntimeError("服务器上没有场馆，无法进行抢号测试")
+            venue_id = venues[0]["venue_id"]
+        date_str = (datetime.date.today() + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        return {"venue_id": venue_id, "date": date_str}
+    finally:
+        session.close()
+
+
+def snapshot_burst_slots(args, profile, target):
+    """开抢前记录目标时段的已约人数与容量 {slot_id: (current, max)}"""
+    burst = profile["burst"]
+    session = Session(args.host, args.port)
+    try:
+        response, _ = session.call("get_available_slots", {
+            "venue_id": target["venue_id"], "date": target["date"],
+            "start_time": burst["start_time"], "end_time": burst["end_time"],
+        })
+        return {s["slot_id"]: (s["current"], s["max"]) for s in response.get("data", [])}
+    finally:
+        session.close()
+
+
+def check_db_oversell(db_path):
+    """直接查库: 有效预约数超过容量的时段，以及 current_reservations 与实际预约数不一致的时段"""
+    conn = sqlite3.connect(db_path)
+    try:
+        today = datetime.date.today().strftime("%Y-%m-%d")
+        placeholders = ",".join("?" * len(ACTIVE_STATUSES))
+        rows = conn.execute(f"""
+            SELECT ts.slot_id, ts.max_reservations, ts.current_reservations, COUNT(r.reservation_id)
+            FROM time_slots ts
+            LEFT JOIN reservations r ON r.slot_id = ts.slot_id AND r.status IN ({placeholders})
+            WHERE ts.date >= ?
+            GROUP BY ts.slot_id
+        """, (*ACTIVE_STATUSES, today)).fetchall()
+    finally:
+        conn.close()
+    oversold = [slot_id for slot_id, max_res, _, active in rows if active > max_res]
+    drift = [slot_id for slot_id, _, current, active in rows if current != active]
+    return {
+        "oversold_slots": len(oversold),
+        "counter_mismatch_slots": len(drift),
+        "examples": oversold[:10],
+    }
+
+
+def summarize(actions, elapsed):
+    summary = {}
+    total = errors = 0
+    for action, entry in sorted(actions.items()):
+        latencies = sorted(entry["latencies"])
+        count = entry["success"] + entry["fail"] + entry["error"]
+        total += count
+        errors += entry["error"]
+        summary[action] = {
+            "count": count,
+            "success": entry["success"],
+            "fail": entry["fail"],
+            "error": entry["error"],
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": round(latencies[-1], 2) if latencies else None,
+        }
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1) if elapsed > 0 else 0,
+        "actions": summary,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SportsVenueServer 闭环压测")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--users", type=int, default=200, help="并发模拟用户数")
+    parser.add_argument("--processes", type=int, default=max(1, multiprocessing.cpu_count() // 2))
+    parser.add_argument("--duration", type=float, default=60, help="压测时长 (秒)")
+    parser.add_argument("--ramp", type=float, default=5, help="用户在多少秒内陆续上线")
+    parser.add_argument("--profile", help="覆盖默认配置的 JSON 文件 (角色占比、动作权重、思考时间、抢号参数)")
+    parser.add_argument("--db", help="服务器使用的数据库 (用于抽取账号与检查超卖)")
+    parser.add_argument("--burst", action="store_true", help="模拟 08:00 开放预约的抢号高峰")
+    parser.add_argument("--burst-venue", type=int, help="抢号目标场馆 ID (默认第一个场馆)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="load_results.json", help="结果 JSON 文件")
+    args = parser.parse_args()
+
+    profile = DEFAULT_PROFILE
+    if args.profile:
+        with open(args.profile, "r", encoding="utf-8") as f:
+            profile = merge_profile(DEFAULT_PROFILE, json.load(f))
+
+    rng = random.Random(args.seed)
+    accounts = pick_accounts(args, profile, rng)
+    if not accounts:
+        print("[!] 没有可用的模拟账号")
+        return
+
+    start_at = time.time() + 1
+    config = {
+        "host": args.host,
+        "port": args.port,
+        "profile": profile,
+        "seed": args.seed,
+        "register": not args.db,
+        "ramp_s": args.ramp,
+        "start_at": start_at,
+        "stop_at": start_at + args.ramp + args.duration,
+        "burst_at": None,
+        "burst_target": None,
+    }
+    if args.burst:
+        config["burst_target"] = prepare_burst(args, profile)
+        config["burst_at"] = start_at + args.ramp + profile["burst"]["delay_s"]
+
+    processes = max(1, min(args.processes, len(accounts)))
+    print(f"[*] {len(accounts)} 个模拟用户 / {processes} 个进程，压测 {args.duration:.0f} 秒"
+          + (f"，第 {args.ramp + profile['burst']['delay_s']:.0f} 秒开抢" if args.burst else ""))
+    result_queue = multiprocessing.Queue()
+    workers = []
+    for i in range(processes):
+        worker = multiprocessing.Process(target=worker_process, args=(accounts[i::processes], config, result_queue))
+        worker.start()
+        workers.append(worker)
+
+    baseline = None
+    if args.burst:
+        time.sleep(max(0.0, config["burst_at"] - 1 - time.time()))
+        baseline = snapshot_burst_slots(args, profile, config["burst_target"])
+
+    merged = Stats()
+    burst_results = []
+    for _ in workers:
+        actions, burst_slots = result_queue.get()
+        merged.merge(actions)
+        burst_results.extend(burst_slots)
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start_at
+
+    results = {
+        "config": {
+            "users": len(accounts), "processes": processes, "duration_s": args.duration,
+            "ramp_s": args.ramp, "burst": args.burst, "profile": profile,
+        },
+        "elapsed_s": round(elapsed, 1),
+    }
+    results.update(summarize(merged.actions, elapsed))
+
+    if args.burst:
+        booked = {}
+        for slot_id in burst_results:
+            booked[slot_id] = booked.get(slot_id, 0) + 1
+        oversold = {
+            slot_id: baseline[slot_id][0] + count - baseline[slot_id][1]
+            for slot_id, count in booked.items()
+            if slot_id in baseline and baseline[slot_id][0] + count > baseline[slot_id][1]
+        }
+        results["burst"] = dict(config["burst_target"], **{
+            "target_slots": len(baseline or {}),
+            "booked": len(burst_results),
+            "oversold_slots": len(oversold),
+            "oversold_bookings": sum(oversold.values()),
+        })
+    if args.db:
+        results["db_check"] = check_db_oversell(args.db)
+
+    print(f"\n{'动作':<22}{'次数':>8}{'成功':>8}{'拒绝':>8}{'错误':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for action, s in results["actions"].items():
+        cells = [s[k] if s[k] is not None else "-" for k in ("p50_ms", "p90_ms", "p99_ms", "max_ms")]
+        print(f"{action:<22}{s['count']:>8}{s['success']:>8}{s['fail']:>8}{s['error']:>8}"
+              + "".join(f"{c:>9}" for c in cells))
+    print(f"\n总请求 {results['requests']}，错误 {results['errors']}，吞吐量 {results['throughput_rps']} 请求/秒")
+    if "burst" in results:
+        b = results["burst"]
+        print(f"抢号: 场馆 {b['venue_id']} {b['date']} 共 {b['target_slots']} 个时段，抢到 {b['booked']} 个，"
+              f"超卖时段 {b['oversold_slots']} 个 (多出 {b['oversold_bookings']} 个预约)")
+    if "db_check" in results:
+        d = results["db_check"]
+        print(f"查库: 超卖时段 {d['oversold_slots']} 个，计数不一致时段 {d['counter_mismatch_slots']} 个")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.out}")
+
+
+if __name__ == '__main__':
+    main()
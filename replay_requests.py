@@ -0,0 +1,430 @@
+"""
+请求重放工具: 把服务器录制的请求日志 (admin_set_recorder / RECORD_REQUESTS=1) 重新发送给服务器并比较响应
+
+每个录制的连接在独立线程中按原顺序重放；默认按原始时间间隔发送 (--speed 可加速)，
+--fast 则不等待、尽快发送，用于基准测试。每个请求的响应与录制时的原始响应比较:
+默认比较 status 和 message，--strict 比较除 request_id 与会话 token 以外的全部字段；
+请求携带的会话 token 替换为重放时登录得到的新 token。录制日志不含密码与真实 token
+(密码记为 ***，token 记为假名)，重放时密码按数据库快照补回。
+
+默认会把录制开始时保存的数据库快照复制一份，在其上启动一个独立的服务器进程再重放，
+保证重放的起始数据与录制时一致 (不会修改快照和 sports_venue.db)；
+也可以用 --host/--port --no-server 指向已经运行的服务器。
+
+用法:
+    python replay_requests.py backend/recordings/requests_XXXX.log.gz [--fast | --speed 2] [--strict]
+                              [--snapshot 快照.db] [--out replay_results.json]
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVER_DIR = os.path.join(ROOT_DIR, 'backend', 'server')
+sys.path.append(SERVER_DIR)
+from request_recorder import read_log, REDACTED  # noqa: E402
+
+HOST = '127.0.0.1'
+PORT = 8888
+REQUEST_TIMEOUT = 30
+SERVER_START_TIMEOUT = 60
+
+
+class ReplaySession:
+    """重放连接: 带 request_id 的请求按 ID 匹配响应，不带的按顺序取下一条非推送消息"""
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port), timeout=REQUEST_TIMEOUT)
+        self.buffer = ""
+        self.decoder = json.JSONDecoder()
+
+    def call(self, request):
+        request_id = request.get("request_id") if isinstance(request, dict) else None
+        started = time.perf_counter()
+        self.sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8"))
+        while True:
+            message = self._next_message()
+            if isinstance(message, dict) and message.get("type") == "push":
+                continue
+            if request_id is None or (isinstance(message, dict) and message.get("request_id") == request_id):
+                return message, (time.perf_counter() - started) * 1000
+
+    def _next_message(self):
+        while True:
+            buffer = self.buffer.lstrip()
+            if buffer:
+                try:
+                    message, end = self.decoder.raw_decode(buffer)
+                    self.buffer = buffer[end:]
+                    return message
+                except json.JSONDecodeError:
+                    pass
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("服务器关闭了连接")
+            self.buffer = buffer + chunk.decode("utf-8", errors="replace")
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class TokenMap:
+    """
+    录制时的会话 token -> 重放时登录得到的新 token (各连接共用)
+    其他连接上使用某 token 的请求需等到对应的 login 重放完成
+    """
+
+    WAIT_TIMEOUT = 10
+
+    def __init__(self, recorded_tokens):
+        self.pending = set(recorded_tokens)
+        self.mapping = {}
+        self._cond = threading.Condition()
+
+    def add(self, recorded, replayed):
+        with self._cond:
+            self.mapping[recorded] = replayed
+            self._cond.notify_all()
+
+    def translate(self, token):
+        with self._cond:
+            if token in self.pending:
+                self._cond.wait_for(lambda: token in self.mapping, timeout=self.WAIT_TIMEOUT)
+            return self.mapping.get(token, token)
+
+
+class Credentials:
+    """
+    补回录制时隐去的密码: 快照中已有的账号使用快照中的密码，
+    录制期间注册或被管理员改过密码的账号统一使用 REPLAY_PASSWORD
+    """
+
+    REPLAY_PASSWORD = "replay-password"
+    # 设置密码的动作 -> 取得账号的函数
+    SETTERS = {
+        'register': lambda data: data.get('account'),
+        'admin_update_user': lambda data: data.get('new_account') or data.get('old_account') or data.get('account'),
+    }
+    # 校验密码的动作 (录制时失败的请求重放时仍发送错误密码)
+    VERIFIERS = {'login', 'delete_my_account'}
+
+    def __init__(self, snapshot=None):
+        self.passwords = {}
+        self._lock = threading.Lock()
+        if snapshot and os.path.exists(snapshot):
+            conn = sqlite3.connect(snapshot)
+            try:
+                self.passwords = dict(conn.execute("SELECT user_account, password FROM users"))
+            finally:
+                conn.close()
+
+    def restore(self, action, data, expected, account=None):
+        """
+        :param account: 连接当前登录的账号 (delete_my_account 等由会话补全账号的请求)
+        :return: 补回密码后的 data (没有隐去的密码时原样返回)
+        """
+        if not isinstance(data, dict) or data.get('password') != REDACTED:
+            return data
+        succeeded = not isinstance(expected, dict) or expected.get('status') == 'success'
+        if action in self.SETTERS:
+            if succeeded:
+                with self._lock:
+                    self.passwords[self.SETTERS[action](data)] = self.REPLAY_PASSWORD
+            return dict(data, password=self.REPLAY_PASSWORD)
+        if action in self.VERIFIERS and succeeded:
+            with self._lock:
+                password = self.passwords.get(data.get('account') or account, self.REPLAY_PASSWORD)
+            return dict(data, password=password)
+        return data
+
+
+def restore_request(request, expected, tokens, credentials, state):
+    """
+    把录制时隐去的字段补回: 会话 token 换成重放时的 token，密码按 Credentials 补回 (含批量子请求)
+    :param state: 连接的重放状态，"account" 为按录制响应推断的当前登录账号
+    """
+    if not isinstance(request, dict):
+        return request
+    request = dict(request)
+    action = request.get("action")
+    if request.get("token"):
+        request["token"] = tokens.translate(request["token"])
+    data = request.get("data")
+    if isinstance(data, dict):
+        if action == "resume_session" and data.get("token"):
+            data = dict(data, token=tokens.translate(data["token"]))
+        elif action == "batch" and isinstance(data.get("requests"), list):
+            results = expected.get("results") if isinstance(expected, dict) else None
+            results = results if isinstance(results, list) else []
+            data = dict(data, requests=[
+                restore_request(sub, results[i] if i < len(results) else None, tokens, credentials, state)
+                for i, sub in enumerate(data["requests"])
+            ])
+        request["data"] = credentials.restore(action, data, expected, state.get("account"))
+    if action in ("login", "resume_session") and isinstance(expected, dict) and isinstance(expected.get("user"), dict):
+        state["account"] = expected["user"].get("account")
+    return request
+
+
+def load_connections(path):
+    """
+    把日志整理为按连接分组的请求列表
+    :return: (起始时间戳, {连接 ID: {"connect": ts, "requests": [(ts, request, 原始响应或 None), ...]}})
+    """
+    connections = {}
+    start = None
+    for timestamp, connection_id, event, body in read_log(path):
+        if start is None:
+            start = timestamp
+        conn = connections.setdefault(connection_id, {
+            "connect": timestamp, "requests": [], "by_id": {}, "ordered": [],
+        })
+        if event == "request":
+            # 重放统一使用 JSON，不重放编码协商 (仍占位，使其响应不会被配给后面的请求)
+            index = None
+            if not (isinstance(body, dict) and body.get("action") == "hello"):
+                conn["requests"].append([timestamp, body, None])
+                index = len(conn["requests"]) - 1
+            if isinstance(body, dict) and body.get("request_id") is not None:
+                conn["by_id"][body["request_id"]] = index
+            else:
+                conn["ordered"].append(index)
+        elif event == "response" and isinstance(body, dict):
+            # 带 ID 的响应按 ID 配对，其余按顺序对应不带 ID 的请求
+            if body.get("request_id") is not None:
+                index = conn["by_id"].pop(body["request_id"], None)
+            else:
+                index = conn["ordered"].pop(0) if conn["ordered"] else None
+            if index is not None:
+                conn["requests"][index][2] = body
+    return start, {cid: {"connect": c["connect"], "requests": c["requests"]} for cid, c in connections.items() if c["requests"]}
+
+
+def responses_match(expected, actual, strict):
+    if expected is None:
+        return None  # 录制时没有收到响应 (连接中断等)，无法比较
+    if not isinstance(actual, dict):
+        return False
+    if strict:
+        # 会话 token 每次登录随机生成，不参与比较 (含批量请求中 login 的结果)
+        def strip(response):
+            if not isinstance(response, dict):
+                return response
+            result = {k: v for k, v in response.items() if k not in ("request_id", "session")}
+            if isinstance(result.get("results"), list):
+                result["results"] = [strip(r) for r in result["results"]]
+            return result
+        return strip(expected) == strip(actual)
+    return expected.get("status") == actual.get("status") and expected.get("message") == actual.get("message")
+
+
+def replay_connection(args, start, replay_start, conn, results, tokens, credentials):
+    """
+    重放一个录制连接 (每个连接一个线程)
+    :param tokens: TokenMap (录制时的会话 token -> 重放时登录得到的 token)
+    :param credentials: Credentials (补回录制时隐去的密码)
+    """
+    def wait_until(timestamp):
+        if not args.fast:
+            delay = replay_start + (timestamp - start) / args.speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+    wait_until(conn["connect"])
+    try:
+        session = ReplaySession(args.host, args.port)
+    except OSError as e:
+        for _, request, _ in conn["requests"]:
+            results.append({"action": request.get("action") if isinstance(request, dict) else None,
+                            "error": f"连接失败: {e}"})
+        return
+    state = {"account": None}
+    try:
+        for timestamp, request, expected in conn["requests"]:
+            wait_until(timestamp)
+            action = request.get("action") if isinstance(request, dict) else None
+            request = restore_request(request, expected, tokens, credentials, state)
+            try:
+                actual, latency = session.call(request)
+            except (OSError, ValueError) as e:
+                results.append({"action": action, "error": str(e)})
+                session.close()
+                session = ReplaySession(args.host, args.port)
+                continue
+            if isinstance(expected, dict) and isinstance(actual, dict):
+                if expected.get("session") and actual.get("session"):
+                    tokens.add(expected["session"], actual["session"])
+                # 批量请求中的 login
+                for sub_expected, sub_actual in zip(expected.get("results") or [], actual.get("results") or []):
+                    if isinstance(sub_expected, dict) and isinstance(sub_actual, dict) \
+                            and sub_expected.get("session") and sub_actual.get("session"):
+                        tokens.add(sub_expected["session"], sub_actual["session"])
+            results.append({
+                "action": action,
+                "latency_ms": latency,
+                "match": responses_match(expected, actual, args.strict),
+                "request": request,
+                "expected": expected,
+                "actual": actual,
+            })
+    finally:
+        session.close()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return round(sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)], 2)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def start_server(snapshot, port):
+    """在快照副本上启动独立的服务器进程"""
+    workdir = tempfile.mkdtemp(prefix="replay_")
+    db_path = os.path.join(workdir, "replay.db")
+    shutil.copyfile(snapshot, db_path)
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "server.py"), db_path, str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("重放服务器启动失败")
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return process, workdir
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("等待重放服务器启动超时")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重放录制的请求并比较响应")
+    parser.add_argument("log", help="录制日志 (.log.gz)")
+    parser.add_argument("--snapshot", help="数据库快照 (默认使用与日志同名的 .db)")
+    parser.add_argument("--no-server", action="store_true", help="不启动服务器，直接重放到 --host/--port")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--fast", action="store_true", help="忽略原始时间间隔，尽快发送")
+    parser.add_argument("--speed", type=float, default=1.0, help="按原始时间间隔的 N 倍速重放")
+    parser.add_argument("--strict", action="store_true", help="比较完整响应 (默认只比较 status 与 message)")
+    parser.add_argument("--show", type=int, default=10, help="显示的不一致示例条数")
+    parser.add_argument("--out", default="replay_results.json", help="结果 JSON 文件")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed 必须大于 0")
+
+    start, connections = load_connections(args.log)
+    total_requests = sum(len(c["requests"]) for c in connections.values())
+    if not total_requests:
+        print("日志中没有请求")
+        return
+    print(f"[*] {len(connections)} 个连接，{total_requests} 个请求")
+
+    server = workdir = None
+    snapshot = args.snapshot or (args.log[:-len(".log.gz")] + ".db" if args.log.endswith(".log.gz") else None)
+    if not args.no_server:
+        if not snapshot or not os.path.exists(snapshot):
+            parser.error("找不到数据库快照，请用 --snapshot 指定，或加 --no-server 重放到已运行的服务器")
+        args.host, args.port = HOST, free_port()
+        print(f"[*] 在快照 {snapshot} 的副本上启动服务器 (端口 {args.port}) ...")
+        server, workdir = start_server(snapshot, args.port)
+
+    results = []
+    tokens = TokenMap(
+        r["session"] for conn in connections.values() for _, _, response in conn["requests"]
+        if isinstance(response, dict)
+        for r in [response] + [sub for sub in response.get("results") or [] if isinstance(sub, dict)]
+        if r.get("session")
+    )
+    credentials = Credentials(snapshot)
+    try:
+        replay_start = time.time()
+        threads = [
+            threading.Thread(target=replay_connection, args=(args, start, replay_start, conn, results, tokens, credentials),
+                             daemon=True)
+            for conn in connections.values()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - replay_start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    actions = {}
+    for r in results:
+        entry = actions.setdefault(r["action"], {"latencies": [], "match": 0, "mismatch": 0, "unknown": 0, "error": 0})
+        if "error" in r:
+            entry["error"] += 1
+            continue
+        entry["latencies"].append(r["latency_ms"])
+        entry["match" if r["match"] else "unknown" if r["match"] is None else "mismatch"] += 1
+
+    summary = {}
+    for action, entry in sorted(actions.items(), key=lambda item: str(item[0])):
+        latencies = sorted(entry.pop("latencies"))
+        entry.update({"count": len(latencies) + entry["error"], "p50_ms": percentile(latencies, 50),
+                      "p90_ms": percentile(latencies, 90), "p99_ms": percentile(latencies, 99)})
+        summary[str(action)] = entry
+    mismatches = [r for r in results if r.get("match") is False]
+    errors = sum(1 for r in results if "error" in r)
+    output = {
+        "log": args.log,
+        "mode": "fast" if args.fast else f"{args.speed}x",
+        "strict": args.strict,
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed > 0 else 0,
+        "mismatches": len(mismatches),
+        "errors": errors,
+        "actions": summary,
+        "mismatch_examples": [
+            {k: r[k] for k in ("action", "request", "expected", "actual")} for r in mismatches[:args.show]
+        ],
+    }
+
+    print(f"\n{'动作':<28}{'次数':>7}{'一致':>7}{'不一致':>7}{'错误':>7}{'p50':>9}{'p90':>9}{'p99':>9}  (ms)")
+    for action, s in summary.items():
+        cells = [s[k] if s[k] is not None else "-" for k in ("p50_ms", "p90_ms", "p99_ms")]
+        print(f"{action:<28}{s['count']:>7}{s['match']:>7}{s['mismatch']:>7}{s['error']:>7}"
+              + "".join(f"{c:>9}" for c in cells))
+    print(f"\n重放 {len(results)} 个请求，耗时 {output['elapsed_s']} 秒 ({output['throughput_rps']} 请求/秒)，"
+          f"响应不一致 {len(mismatches)} 个，错误 {errors} 个")
+    for r in output["mismatch_examples"]:
+        print(f"  - {r['action']}: 录制 {json.dumps(r['expected'], ensure_ascii=False)[:160]}")
+        print(f"    {'':<{len(str(r['action']))}}  重放 {json.dumps(r['actual'], ensure_ascii=False)[:160]}")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.out}")
+    if mismatches or errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()